@@ -1,75 +1,204 @@
+import os
 import json
 import matplotlib.pyplot as plt
 
+from instrumentacao import FASES, PRINCIPAL
+from estatistica import karp_flatt, ajustar_amdahl, ajustar_gustafson
+from comparar import carregar_linha_base, comparar, mostrar_comparacao, LIMIAR, REGRESSAO, MELHORA
+
 # Função simples pra ler o JSON.
 # Se o arquivo não existir, o Python avisa com erro, não preciso tratar aqui.
-def carregar_dados():
-    with open("resultados/resultados_benchmark.json", "r", encoding="utf-8") as f:
+# O JSON antigo era só a lista de resultados; o novo traz também o ambiente e a
+# configuração (aquecimento, repetições). Devolvo sempre no formato novo.
+def carregar_dados(caminho="resultados/resultados_benchmark.json"):
+    with open(caminho, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+    if isinstance(dados, list):
+        dados = {"ambiente": None, "configuracao": None, "resultados": dados}
+    return dados
+
+def mostrar_ambiente(dados):
+    ambiente, config = dados.get("ambiente"), dados.get("configuracao")
+    if ambiente:
+        print(f"\nAmbiente: {ambiente['sistema']}, {ambiente['cpus_disponiveis']} de {ambiente['cpus']} CPUs, "
+              f"Python {ambiente['python']}, NumPy {ambiente['numpy']} ({ambiente.get('blas') or 'BLAS ?'})")
+    if config:
+        print(f"Medição: {config['iteracoes']} iterações depois de {config['aquecimento']} de aquecimento, "
+              f"{config['repeticoes']} repetições (mediana e IC95 da mediana), "
+              f"escala {config.get('modo', 'forte')}")
+
+# A instrumentação (benchmark.py --instrumentar) é opcional: sem o arquivo, lista vazia
+def carregar_instrumentacao(caminho="resultados/instrumentacao.json"):
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, "r", encoding="utf-8") as f:
         return json.load(f)
 
 def calcular_metricas(dados):
     # 1. Primeiro preciso achar os tempos do Sequencial pra usar de base (Speedup = 1)
+    # A base é o sequencial com o mesmo núcleo (resultados antigos são todos "soma")
     tempos_seq = {}
     for d in dados:
+        d.setdefault('nucleo', 'soma')
+        # Resultados antigos são todos de escala forte, com o próprio tamanho de base
+        d.setdefault('modo', 'forte')
+        d.setdefault('base', [d['largura'], d['altura']])
         if d['versao'] == 'sequencial':
-            tempos_seq[(d['largura'], d['altura'])] = d['tempo']
+            tempos_seq[(d['largura'], d['altura'], d['nucleo'])] = d['tempo']
 
     lista_final = []
     
     # 2. Agora calculo Speedup e Eficiência pra todo mundo
     for d in dados:
-        chave = (d['largura'], d['altura'])
+        # Na escala fraca o sequencial de referência é o do tamanho base (uma faixa só)
+        chave = (d['base'][0], d['base'][1], d['nucleo'])
         tempo_base = tempos_seq.get(chave)
         
         # Se não tiver tempo base ou tempo for 0, speedup é 0
         speedup = 0.0
         eficiencia = 0.0
+        # Escala fraca: p recursos fazem p vezes o trabalho do sequencial, então o speedup
+        # (escalado, do Gustafson) é p * T_seq / T; o ideal é T igual ao T_seq
+        fator = d['recursos'] if d['modo'] == 'fraca' else 1
         
         if tempo_base and d['tempo'] > 0:
-            speedup = tempo_base / d['tempo']
+            speedup = fator * tempo_base / d['tempo']
             if d['recursos'] > 0:
                 eficiencia = speedup / d['recursos']
 
+        # Intervalo de confiança do tempo (o IC95 é do tempo por geração, e o tempo é a
+        # mediana das repetições, então é só escalar). Resultado antigo: sem intervalo
+        geracao = d.get('tempo_geracao')
+        if geracao and geracao.get('mediana'):
+            escala = d['tempo'] / geracao['mediana']
+            d['ic_tempo'] = [geracao['ic95'][0] * escala, geracao['ic95'][1] * escala]
+        else:
+            d['ic_tempo'] = [d['tempo'], d['tempo']]
+        # O do speedup vem do intervalo do tempo (a base entra só pela mediana)
+        if tempo_base and d['ic_tempo'][0] > 0:
+            d['ic_speedup'] = [fator * tempo_base / d['ic_tempo'][1], fator * tempo_base / d['ic_tempo'][0]]
+        else:
+            d['ic_speedup'] = [speedup, speedup]
+        d['ic_eficiencia'] = [s / max(d['recursos'], 1) for s in d['ic_speedup']]
+
         # Adiciono os campos novos no dicionário
         d['speedup'] = speedup
         d['eficiencia'] = eficiencia
+        # Fração serial experimental (Karp-Flatt): só existe com mais de um recurso
+        d['karp_flatt'] = karp_flatt(speedup, d['recursos']) if speedup > 0 else None
         lista_final.append(d)
 
     return lista_final
 
+def _fracao(valor, casas=3):
+    # Fração serial para as tabelas. Acima de 1 não é fração nenhuma: a execução foi mais
+    # lenta que o sequencial (speedup < 1). O valor cru continua nos dados
+    if valor is None:
+        return '-'
+    if valor > 1:
+        return "> 1 (sem ganho)"
+    return f"{valor:.{casas}f}"
+
 def mostrar_tabela(dados):
-    print("\n" + "="*85)
-    print(f"{'VERSÃO':<15} | {'TAMANHO':<12} | {'RECURSOS':<10} | {'TEMPO (s)':<10} | {'SPEEDUP':<10} | {'EFIC.':<10}")
-    print("-" * 85)
+    print("\n" + "="*191)
+    print(f"{'VERSÃO':<15} | {'NÚCLEO':<8} | {'ESCALA':<6} | {'TAMANHO':<12} | {'RECURSOS':<10} | {'TEMPO (s)':<10} | {'IC95 (s)':<17} | {'SPEEDUP':<10} | {'EFIC.':<10} | {'K-F':<15} | {'MCÉL/S':<9} | {'ITER.':<7} | {'CICLO':<10}")
+    print("-" * 191)
 
     # --- GAMBIARRA PRA ORDENAR ---
-    # Quero que apareça na ordem: Sequencial -> Paralelo -> Distribuído.
+    # Quero que apareça na ordem: Sequencial -> Esparso -> Paralelo -> Processos -> Distribuído.
     # Crio um mapinha de prioridade pra forçar essa ordem no sort.
-    ordem = {'sequencial': 1, 'paralelo': 2, 'distribuido': 3}
+    ordem = {'sequencial': 1, 'esparso': 2, 'paralelo': 3, 'processos': 4, 'distribuido': 5}
 
-    # Ordena por: Tipo (1,2,3) -> Tamanho -> Recursos
-    dados.sort(key=lambda x: (ordem.get(x['versao'], 9), x['largura'], x['recursos']))
+    # Ordena por: Tipo (1,2,3,4) -> Núcleo -> Escala -> Tamanho -> Recursos
+    dados.sort(key=lambda x: (ordem.get(x['versao'], 9), x['nucleo'], x['modo'], x['base'], x['recursos']))
 
     for d in dados:
         tam = f"{d['largura']}x{d['altura']}"
-        print(f"{d['versao']:<15} | {tam:<12} | {d['recursos']:<10} | {d['tempo']:<10.4f} | {d['speedup']:<10.2f} | {d['eficiencia']:<10.2f}")
-    print("="*85 + "\n")
+        # Resultados antigos não têm esses campos
+        feitas = d.get('iteracoes_feitas', '-')
+        ciclo = f"p{d['periodo']} @{d['ciclo_inicio']}" if d.get('periodo') else '-'
+        ic = f"{d['ic_tempo'][0]:.4f}-{d['ic_tempo'][1]:.4f}" if 'tempo_geracao' in d else '-'
+        vazao = f"{d['celulas_por_segundo'] / 1e6:.1f}" if 'celulas_por_segundo' in d else '-'
+        kf = _fracao(d['karp_flatt'])
+        print(f"{d['versao']:<15} | {d['nucleo']:<8} | {d['modo']:<6} | {tam:<12} | {d['recursos']:<10} | {d['tempo']:<10.4f} | {ic:<17} | {d['speedup']:<10.2f} | {d['eficiencia']:<10.2f} | {kf:<15} | {vazao:<9} | {feitas:<7} | {ciclo:<10}")
+    print("="*191 + "\n")
+
+def calcular_fracao_serial(dados):
+    # Uma linha por versão/núcleo/tamanho base/escala: a fração serial que melhor explica
+    # todos os speedups medidos (Amdahl na escala forte, Gustafson na fraca) e o
+    # Karp-Flatt de cada ponto, pra ver se ele cresce com os recursos
+    grupos = {}
+    for d in dados:
+        if d['versao'] in ('sequencial', 'esparso') or d['speedup'] <= 0:
+            continue
+        chave = (d['versao'], d['nucleo'], tuple(d['base']), d['modo'])
+        grupos.setdefault(chave, []).append(d)
+
+    linhas = []
+    for (versao, nucleo, base, modo), lista in grupos.items():
+        lista.sort(key=lambda x: x['recursos'])
+        ps = [d['recursos'] for d in lista]
+        speedups = [d['speedup'] for d in lista]
+        ajustar = ajustar_gustafson if modo == 'fraca' else ajustar_amdahl
+        linhas.append({
+            "versao": versao,
+            "nucleo": nucleo,
+            "base": base,
+            "modo": modo,
+            "lei": "Gustafson" if modo == 'fraca' else "Amdahl",
+            "fracao": ajustar(ps, speedups),
+            "karp_flatt": [(d['recursos'], d['karp_flatt']) for d in lista if d['karp_flatt'] is not None],
+        })
+    return linhas
+
+def mostrar_fracao_serial(linhas):
+    print("\n" + "=" * 100)
+    print(f"{'VERSÃO':<15} | {'NÚCLEO':<8} | {'BASE':<10} | {'ESCALA':<6} | {'LEI':<10} | {'FRAÇÃO SERIAL':<15} | KARP-FLATT POR RECURSOS")
+    print("-" * 100)
+    for l in linhas:
+        base = f"{l['base'][0]}x{l['base'][1]}"
+        fracao = _fracao(l['fracao'], 4)
+        kf = ", ".join(f"{p}: {_fracao(e)}" for p, e in l['karp_flatt']) or '-'
+        print(f"{l['versao']:<15} | {l['nucleo']:<8} | {base:<10} | {l['modo']:<6} | {l['lei']:<10} | {fracao:<15} | {kf}")
+    print("=" * 100 + "\n")
+
+def _com_intervalo(lista, chave, **estilo):
+    # Linha da mediana com a barra do IC95 (resultado antigo: barra de tamanho zero)
+    xs = [d['recursos'] for d in lista]
+    ys = [d[chave] for d in lista]
+    barras = [[y - d[f'ic_{chave}'][0] for d, y in zip(lista, ys)],
+              [d[f'ic_{chave}'][1] - y for d, y in zip(lista, ys)]]
+    plt.errorbar(xs, ys, yerr=barras, capsize=4, **estilo)
 
 def gerar_graficos(dados):
+    # Só a escala forte: os resultados da fraca têm tamanhos próprios (gerar_graficos_fraca)
+    dados = [d for d in dados if d['modo'] == 'forte']
     # Pega os tamanhos únicos que testamos (ex: 100x100, 200x200...)
     # Uso 'set' pra remover duplicados
     tamanhos = sorted(list(set((d['largura'], d['altura']) for d in dados)))
+    # Um conjunto de gráficos por núcleo (o "soma" fica com os nomes de sempre)
+    nucleos = sorted(set(d['nucleo'] for d in dados))
 
-    for w, h in tamanhos:
-        # Pega só os dados desse tamanho específico
-        dados_tamanho = [d for d in dados if d['largura'] == w and d['altura'] == h]
+    for (w, h), nucleo in [(t, n) for t in tamanhos for n in nucleos]:
+        # Pega só os dados desse tamanho (e núcleo) específico
+        dados_tamanho = [d for d in dados if d['largura'] == w and d['altura'] == h and d['nucleo'] == nucleo]
+        if not dados_tamanho:
+            continue
+        sufixo = "" if nucleo == 'soma' else f"_{nucleo}"
+        titulo = f"Matriz {w}x{h}" + ("" if nucleo == 'soma' else f" (núcleo {nucleo})")
 
         # Separa por versão
         sequencial = [d for d in dados_tamanho if d['versao'] == 'sequencial']
+        esparso = [d for d in dados_tamanho if d['versao'] == 'esparso']
         paralelos = [d for d in dados_tamanho if d['versao'] == 'paralelo']
         paralelos.sort(key=lambda x: x['recursos'])
+        processos = [d for d in dados_tamanho if d['versao'] == 'processos']
+        processos.sort(key=lambda x: x['recursos'])
         distrib = [d for d in dados_tamanho if d['versao'] == 'distribuido']
         distrib.sort(key=lambda x: x['recursos'])
+        # Só o sequencial (o resto rodou na escala fraca): nada pra comparar
+        if not (paralelos or processos or distrib):
+            continue
 
         # ========== GRÁFICO 1: TEMPO DE EXECUÇÃO ==========
         plt.figure(figsize=(10, 6))
@@ -81,24 +210,35 @@ def gerar_graficos(dados):
             max_rec = max([d['recursos'] for d in dados_tamanho])
             plt.plot([1, max_rec], [tempo_seq, tempo_seq],
                      label='Sequencial', color='green', linestyle='-', linewidth=2)
+            plt.fill_between([1, max_rec], *([v, v] for v in sequencial[0]['ic_tempo']), color='green', alpha=0.15)
+
+        # Esparso: também não usa recursos, vira outra linha horizontal
+        if esparso:
+            tempo_esp = esparso[0]['tempo']
+            max_rec = max([d['recursos'] for d in dados_tamanho])
+            plt.plot([1, max_rec], [tempo_esp, tempo_esp],
+                     label='Esparso', color='orange', linestyle=':', linewidth=2)
+            plt.fill_between([1, max_rec], *([v, v] for v in esparso[0]['ic_tempo']), color='orange', alpha=0.15)
 
         # Paralelo
         if paralelos:
-            plt.plot([x['recursos'] for x in paralelos], [y['tempo'] for y in paralelos],
-                     marker='o', label='Paralelo (Threads)', color='blue')
+            _com_intervalo(paralelos, 'tempo', marker='o', label='Paralelo (Threads)', color='blue')
+
+        # Processos
+        if processos:
+            _com_intervalo(processos, 'tempo', marker='^', label='Paralelo (Processos)', color='purple')
 
         # Distribuído
         if distrib:
-            plt.plot([x['recursos'] for x in distrib], [y['tempo'] for y in distrib],
-                     marker='s', label='Distribuído (Workers)', color='red', linestyle='--')
+            _com_intervalo(distrib, 'tempo', marker='s', label='Distribuído (Workers)', color='red', linestyle='--')
 
-        plt.title(f"Tempo de Execução - Matriz {w}x{h}")
+        plt.title(f"Tempo de Execução (mediana e IC95) - {titulo}")
         plt.xlabel("Número de Recursos (Threads/Workers)")
         plt.ylabel("Tempo (segundos)")
         plt.legend()
         plt.grid(True, alpha=0.3)
 
-        nome_arq = f"resultados/tempo_{w}x{h}.png"
+        nome_arq = f"resultados/tempo_{w}x{h}{sufixo}.png"
         plt.savefig(nome_arq)
         print(f"Gráfico salvo: {nome_arq}")
         plt.close()
@@ -108,28 +248,274 @@ def gerar_graficos(dados):
 
         # Paralelo
         if paralelos:
-            plt.plot([x['recursos'] for x in paralelos], [y['speedup'] for y in paralelos],
-                     marker='o', label='Paralelo (Threads)', color='blue')
+            _com_intervalo(paralelos, 'speedup', marker='o', label='Paralelo (Threads)', color='blue')
+
+        # Processos
+        if processos:
+            _com_intervalo(processos, 'speedup', marker='^', label='Paralelo (Processos)', color='purple')
 
         # Distribuído
         if distrib:
-            plt.plot([x['recursos'] for x in distrib], [y['speedup'] for y in distrib],
-                     marker='s', label='Distribuído (Workers)', color='red', linestyle='--')
+            _com_intervalo(distrib, 'speedup', marker='s', label='Distribuído (Workers)', color='red', linestyle='--')
 
-        plt.title(f"Speedup - Matriz {w}x{h}")
+        plt.title(f"Speedup (mediana e IC95) - {titulo}")
         plt.xlabel("Número de Recursos (Threads/Workers)")
         plt.ylabel("Speedup")
         plt.legend()
         plt.grid(True, alpha=0.3)
 
-        nome_arq = f"resultados/speedup_{w}x{h}.png"
+        nome_arq = f"resultados/speedup_{w}x{h}{sufixo}.png"
         plt.savefig(nome_arq)
         print(f"Gráfico salvo: {nome_arq}")
         plt.close()
 
+def gerar_graficos_fraca(dados):
+    # Escala fraca: eficiência T_seq(base) / T por recursos. O ideal é ficar em 1 (cada
+    # um com a sua faixa, o tempo não muda); o quanto cai é o custo de coordenar mais gente
+    fraca = [d for d in dados if d['modo'] == 'fraca']
+    estilos = {
+        'paralelo': dict(marker='o', label='Paralelo (Threads)', color='blue'),
+        'processos': dict(marker='^', label='Paralelo (Processos)', color='purple'),
+        'distribuido': dict(marker='s', label='Distribuído (Workers)', color='red', linestyle='--'),
+    }
+    bases = sorted(set(tuple(d['base']) for d in fraca))
+    nucleos = sorted(set(d['nucleo'] for d in fraca))
+
+    for (w, h), nucleo in [(b, n) for b in bases for n in nucleos]:
+        dados_base = [d for d in fraca if tuple(d['base']) == (w, h) and d['nucleo'] == nucleo]
+        if not dados_base:
+            continue
+        sufixo = "" if nucleo == 'soma' else f"_{nucleo}"
+        titulo = f"Faixa {w}x{h} por recurso" + ("" if nucleo == 'soma' else f" (núcleo {nucleo})")
+
+        # ========== GRÁFICO 6: EFICIÊNCIA NA ESCALA FRACA ==========
+        plt.figure(figsize=(10, 6))
+        max_rec = max(d['recursos'] for d in dados_base)
+        plt.plot([1, max_rec], [1, 1], label='Ideal', color='green', linestyle='-', linewidth=2)
+        for versao, estilo in estilos.items():
+            lista = sorted((d for d in dados_base if d['versao'] == versao), key=lambda x: x['recursos'])
+            if lista:
+                _com_intervalo(lista, 'eficiencia', **estilo)
+
+        plt.title(f"Eficiência na Escala Fraca (mediana e IC95) - {titulo}")
+        plt.xlabel("Número de Recursos (Threads/Workers)")
+        plt.ylabel("Eficiência (T sequencial / T)")
+        plt.legend()
+        plt.grid(True, alpha=0.3)
+
+        nome_arq = f"resultados/fraca_{w}x{h}{sufixo}.png"
+        plt.savefig(nome_arq)
+        print(f"Gráfico salvo: {nome_arq}")
+        plt.close()
+
+def gerar_graficos_divisao(dados):
+    # Distribuído: cada geração quebrada em cálculo (worker mais lento), comunicação
+    # (o resto da troca) e servidor (montar mensagens, juntar), em ms por geração
+    distrib = [d for d in dados if d['versao'] == 'distribuido' and d.get('divisao')]
+    partes = [('calculo', 'Cálculo', 'tab:blue'), ('comunicacao', 'Comunicação', 'tab:red'),
+              ('servidor', 'Servidor', 'tab:gray')]
+    grupos = sorted(set((d['modo'], tuple(d['base']), d['nucleo']) for d in distrib))
+
+    for modo, (w, h), nucleo in grupos:
+        lista = sorted((d for d in distrib if d['modo'] == modo and tuple(d['base']) == (w, h)
+                        and d['nucleo'] == nucleo), key=lambda x: x['recursos'])
+        sufixo = ("" if modo == 'forte' else "_fraca") + ("" if nucleo == 'soma' else f"_{nucleo}")
+        titulo = (f"Matriz {w}x{h}" if modo == 'forte' else f"Faixa {w}x{h} por worker") + \
+            ("" if nucleo == 'soma' else f" (núcleo {nucleo})")
+
+        # ========== GRÁFICO 7: CÁLCULO x COMUNICAÇÃO NO DISTRIBUÍDO ==========
+        plt.figure(figsize=(10, 6))
+        rotulos = [str(d['recursos']) for d in lista]
+        base = [0.0] * len(lista)
+        for parte, rotulo, cor in partes:
+            # Por garantia: uma parte quase zero não pode empurrar a pilha pra baixo
+            valores = [max(d['divisao'][parte], 0.0) * 1e3 for d in lista]
+            plt.bar(rotulos, valores, bottom=base, label=rotulo, color=cor)
+            base = [b + v for b, v in zip(base, valores)]
+
+        plt.title(f"Cálculo x Comunicação no Distribuído - {titulo}")
+        plt.xlabel("Número de Workers")
+        plt.ylabel("Tempo por geração (ms)")
+        plt.legend()
+        plt.grid(True, axis='y', alpha=0.3)
+
+        nome_arq = f"resultados/distribuido_{w}x{h}{sufixo}.png"
+        plt.savefig(nome_arq)
+        print(f"Gráfico salvo: {nome_arq}")
+        plt.close()
+
+def gerar_graficos_comparacao(linhas, limiar=LIMIAR):
+    # Variação da mediana contra a linha de base (comparar.py), uma barra por versão/recursos:
+    # vermelho = regressão, verde = melhora, cinza = dentro do ruído
+    ordem = {'sequencial': 1, 'esparso': 2, 'paralelo': 3, 'processos': 4, 'distribuido': 5}
+    cores = {REGRESSAO: 'red', MELHORA: 'green'}
+    linhas = [l for l in linhas if l['variacao'] is not None]
+    tamanhos = sorted(set((l['largura'], l['altura']) for l in linhas))
+    nucleos = sorted(set(l['nucleo'] for l in linhas))
+
+    for (w, h), nucleo in [(t, n) for t in tamanhos for n in nucleos]:
+        dados_tamanho = [l for l in linhas if l['largura'] == w and l['altura'] == h and l['nucleo'] == nucleo]
+        if not dados_tamanho:
+            continue
+        dados_tamanho.sort(key=lambda x: (ordem.get(x['versao'], 9), x['recursos']))
+        sufixo = "" if nucleo == 'soma' else f"_{nucleo}"
+        titulo = f"Matriz {w}x{h}" + ("" if nucleo == 'soma' else f" (núcleo {nucleo})")
+
+        plt.figure(figsize=(10, 6))
+        rotulos = [f"{l['versao']}\n{l['recursos']}" for l in dados_tamanho]
+        variacoes = [l['variacao'] * 100 for l in dados_tamanho]
+        plt.bar(rotulos, variacoes, color=[cores.get(l['situacao'], 'gray') for l in dados_tamanho])
+        # Faixa do limiar: dentro dela nada conta como regressão, mesmo significativo
+        plt.axhline(limiar * 100, color='red', linestyle='--', linewidth=1)
+        plt.axhline(-limiar * 100, color='green', linestyle='--', linewidth=1)
+        plt.axhline(0, color='black', linewidth=0.8)
+        for x, (l, v) in enumerate(zip(dados_tamanho, variacoes)):
+            plt.annotate(f"p={l['p']:.3f}", (x, v), ha='center', va='bottom' if v >= 0 else 'top', fontsize=8)
+
+        plt.title(f"Variação contra a Linha de Base - {titulo}")
+        plt.xlabel("Versão / Recursos")
+        plt.ylabel("Variação do tempo por geração (%)")
+        plt.grid(True, axis='y', alpha=0.3)
+
+        nome_arq = f"resultados/comparacao_{w}x{h}{sufixo}.png"
+        plt.savefig(nome_arq)
+        print(f"Gráfico salvo: {nome_arq}")
+        plt.close()
+
+def _total_por_fase(fases):
+    # Segundos por fase de uma execução. O que as threads/workers fazem ao mesmo tempo
+    # entra pela média entre eles (senão 4 threads calculando 1 s viravam 4 s); o que
+    # é do principal entra direto
+    totais = {}
+    for fase, origens in fases.items():
+        do_principal = origens.get(PRINCIPAL, {}).get('total', 0.0)
+        outros = [d['total'] for o, d in origens.items() if o != PRINCIPAL]
+        totais[fase] = do_principal + (sum(outros) / len(outros) if outros else 0.0)
+    return totais
+
+def gerar_graficos_fases(instrumentacao):
+    cores = dict(zip(FASES, plt.cm.tab10.colors))
+    ordem = {'sequencial': 1, 'esparso': 2, 'paralelo': 3, 'processos': 4, 'distribuido': 5}
+    tamanhos = sorted(set((d['largura'], d['altura']) for d in instrumentacao))
+    nucleos = sorted(set(d['nucleo'] for d in instrumentacao))
+
+    for (w, h), nucleo in [(t, n) for t in tamanhos for n in nucleos]:
+        execucoes = [d for d in instrumentacao if d['largura'] == w and d['altura'] == h and d['nucleo'] == nucleo]
+        if not execucoes:
+            continue
+        execucoes.sort(key=lambda x: (ordem.get(x['versao'], 9), x['recursos']))
+        sufixo = "" if nucleo == 'soma' else f"_{nucleo}"
+        titulo = f"Matriz {w}x{h}" + ("" if nucleo == 'soma' else f" (núcleo {nucleo})")
+
+        # ========== GRÁFICO 3: TEMPO POR FASE (uma barra empilhada por execução) ==========
+        plt.figure(figsize=(12, 6))
+        rotulos = [f"{d['versao']}\n{d['recursos']}" for d in execucoes]
+        totais = [_total_por_fase(d['fases']) for d in execucoes]
+        base = [0.0] * len(execucoes)
+        for fase in FASES:
+            valores = [t.get(fase, 0.0) for t in totais]
+            if not any(valores):
+                continue
+            plt.bar(rotulos, valores, bottom=base, label=fase, color=cores[fase])
+            base = [b + v for b, v in zip(base, valores)]
+        plt.title(f"Tempo por Fase - {titulo}")
+        plt.xlabel("Versão / Recursos")
+        plt.ylabel("Tempo (segundos)")
+        plt.legend()
+        plt.grid(True, axis='y', alpha=0.3)
+
+        nome_arq = f"resultados/fases_{w}x{h}{sufixo}.png"
+        plt.savefig(nome_arq)
+        print(f"Gráfico salvo: {nome_arq}")
+        plt.close()
+
+        # ========== GRÁFICO 4: QUEM GASTOU O QUÊ (maior execução de cada versão) ==========
+        # Uma barra por thread/processo/worker: é aqui que aparece o desbalanceamento
+        maiores = {}
+        for d in execucoes:
+            maiores[d['versao']] = d
+        fig, eixos = plt.subplots(1, len(maiores), figsize=(5 * len(maiores), 5), squeeze=False)
+        for eixo, d in zip(eixos[0], maiores.values()):
+            # O principal primeiro, depois na ordem em que aparecem ("thread 0", "thread 1", ...)
+            origens = [PRINCIPAL]
+            for por_origem in d['fases'].values():
+                origens += [o for o in por_origem if o not in origens]
+            if not any(PRINCIPAL in por_origem for por_origem in d['fases'].values()):
+                origens.remove(PRINCIPAL)
+            base = [0.0] * len(origens)
+            for fase in FASES:
+                valores = [d['fases'].get(fase, {}).get(o, {}).get('total', 0.0) for o in origens]
+                if not any(valores):
+                    continue
+                eixo.bar(origens, valores, bottom=base, label=fase, color=cores[fase])
+                base = [b + v for b, v in zip(base, valores)]
+            eixo.set_title(f"{d['versao']} ({d['recursos']})")
+            eixo.tick_params(axis='x', rotation=45)
+            eixo.grid(True, axis='y', alpha=0.3)
+        eixos[0][0].set_ylabel("Tempo (segundos)")
+        # Uma legenda só, com todas as fases que apareceram em algum dos gráficos
+        legenda = {}
+        for eixo in eixos[0]:
+            legenda.update(zip(*reversed(eixo.get_legend_handles_labels())))
+        fig.legend([legenda[f] for f in FASES if f in legenda], [f for f in FASES if f in legenda],
+                   loc='upper right')
+        fig.suptitle(f"Tempo por Origem - {titulo}")
+        fig.tight_layout()
+
+        nome_arq = f"resultados/origens_{w}x{h}{sufixo}.png"
+        fig.savefig(nome_arq)
+        print(f"Gráfico salvo: {nome_arq}")
+        plt.close(fig)
+
+        # ========== GRÁFICO 5: DISTRIBUIÇÃO POR GERAÇÃO (histogramas log2) ==========
+        # Cálculo e espera da maior execução de cada versão, somando as origens.
+        # O balde k vai de 2^(k-1) a 2^k ns (o 0 são os zeros); no eixo x fica o início dele em ms
+        fig, eixos = plt.subplots(1, 2, figsize=(14, 5))
+        for eixo, fase in zip(eixos, ("calculo", "espera")):
+            for d in maiores.values():
+                baldes = {}
+                for estat in d['fases'].get(fase, {}).values():
+                    for k, quantos in estat['baldes'].items():
+                        baldes[int(k)] = baldes.get(int(k), 0) + quantos
+                if not baldes:
+                    continue
+                # Todos os baldes do menor ao maior (os vazios no meio com 0) e mais um ponto
+                # no fim, pra o último degrau ter largura
+                ks = list(range(min(baldes), max(baldes) + 2))
+                contagens = [baldes.get(k, 0) for k in ks[:-1]]
+                eixo.step([2 ** (k - 1) * 1e-6 for k in ks], contagens + contagens[-1:], where='post',
+                          label=f"{d['versao']} ({d['recursos']})")
+            eixo.set_xscale('log')
+            eixo.set_title(fase)
+            eixo.set_xlabel("Duração (ms)")
+            eixo.set_ylabel("Gerações")
+            eixo.grid(True, alpha=0.3)
+            if eixo.get_legend_handles_labels()[0]:
+                eixo.legend()
+        fig.suptitle(f"Histograma por Geração - {titulo}")
+        fig.tight_layout()
+
+        nome_arq = f"resultados/histogramas_{w}x{h}{sufixo}.png"
+        fig.savefig(nome_arq)
+        print(f"Gráfico salvo: {nome_arq}")
+        plt.close(fig)
+
 if __name__ == "__main__":
     # Script principal: carrega -> calcula -> mostra -> desenha
-    dados = carregar_dados()
-    dados = calcular_metricas(dados)
+    bruto = carregar_dados()
+    mostrar_ambiente(bruto)
+    dados = calcular_metricas(bruto['resultados'])
     mostrar_tabela(dados)
-    gerar_graficos(dados)
\ No newline at end of file
+    mostrar_fracao_serial(calcular_fracao_serial(dados))
+    gerar_graficos(dados)
+    gerar_graficos_fraca(dados)
+    gerar_graficos_divisao(dados)
+    # Com linha de base (python comparar.py salvar), a tabela e o gráfico da diferença
+    base = carregar_linha_base()
+    if base:
+        linhas = comparar(bruto, base)
+        mostrar_comparacao(linhas)
+        gerar_graficos_comparacao(linhas)
+    instrumentacao = carregar_instrumentacao()
+    if instrumentacao:
+        gerar_graficos_fases(instrumentacao)
\ No newline at end of file
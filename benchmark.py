@@ -1,26 +1,99 @@
 import sys
 import os
+import gc
 import time
 import json
+import socket
+import platform
 import subprocess
 import argparse
 import atexit
 
-# Importo as funcoes das outras versoes
-from sequencial import executar_simulacao_sequencial
-from paralelo import executar_simulacao_paralela
-from distribuido import executar_servidor_distribuido
+import numpy as np
+
+# Importo os motores das outras versoes (o benchmark monta cada um direto, em vez de
+# chamar os executar_*, pra separar o tempo de montar do tempo de rodar)
+from sequencial import VidaSequencial
+from paralelo import VidaParalela, VidaProcessos
+from distribuido import VidaDistribuida, preparar_conexao, ler_ola
+from esparso import VidaEsparsa
+from padroes import carregar_padrao, grade_com_padrao
+from regras import ler_regra
+from instrumentacao import Medidor, salvar_instrumentacao
+from estatistica import resumir
+
+
+def descrever_ambiente():
+    # Onde o benchmark rodou: sem isso nao da pra comparar um JSON com outro
+    info = {
+        "data": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "sistema": platform.platform(),
+        "processador": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        # No Linux o processo pode estar preso a menos CPUs que a maquina tem (taskset, container)
+        "cpus_disponiveis": len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        # Variaveis que mudam quantas threads o BLAS/OpenMP abre
+        "threads": {v: os.environ[v] for v in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+                    if v in os.environ},
+    }
+    # O BLAS que o NumPy usa (o NumPy 2 devolve a configuracao num dicionario; os antigos so imprimem)
+    try:
+        blas = np.show_config(mode="dicts")["Build Dependencies"]["blas"]
+        info["blas"] = f"{blas.get('name')} {blas.get('version', '')}".strip()
+    except Exception:
+        info["blas"] = None
+    return info
 
 
 class BenchmarkVida:
-    def __init__(self, iteracoes, tamanhos, recursos):
+    def __init__(self, iteracoes, tamanhos, recursos, janela_ciclos=0, padrao=None, tipo_nucleo="soma", regra=None,
+                 toroidal=False, instrumentar=False, aquecimento=10, repeticoes=5, fraca=False, memoria=True,
+                 dividir_2d=True):
         self.iteracoes = iteracoes
+        # Cada configuracao roda 'repeticoes' vezes do zero. Em cada uma: monta o motor
+        # (matriz, threads, processos, conexoes = preparo), roda 'aquecimento' geracoes
+        # fora do cronometro (cache, paginas da memoria, workers acordando) e so entao
+        # mede as 'iteracoes' geracoes (regime)
+        self.aquecimento = aquecimento
+        self.repeticoes = repeticoes
+        # Nucleo usado pelas versoes densas ("soma" ou "tabela"); o main troca entre
+        # rodadas pra comparar os dois
+        self.tipo_nucleo = tipo_nucleo
+        # Se > 0, cada simulacao para quando entra num ciclo (ver DetectorCiclos)
+        self.janela_ciclos = janela_ciclos
+        # Carga de trabalho: matriz aleatoria (None) ou um padrao (nome embutido ou arquivo
+        # .rle/.cells), lido uma vez so e colocado no centro de cada tamanho
+        self.padrao = carregar_padrao(padrao) if padrao else None
+        # Regra B/S de todas as versoes. Sem regra, uso a do arquivo do padrao (se tiver)
+        # e senao o Conway
+        if regra is None and self.padrao is not None:
+            regra = self.padrao.regra
+        self.regra = ler_regra(regra).texto
+        # Bordas que dao a volta (o esparso nao tem esse modo, fica de fora)
+        self.toroidal = toroidal
         self.resultados = []
-        
+        # Com instrumentar, cada execucao ganha um Medidor (ver instrumentacao.py) e o
+        # tempo por fase vai para resultados/instrumentacao.json. Desligado, os motores
+        # recebem medidor=None e nao medem nada
+        self.instrumentar = instrumentar
+        self.instrumentacao = []
+        # Escala forte (padrao): o mesmo tabuleiro com mais recursos. Escala fraca: o
+        # tabuleiro cresce junto com os recursos, cada thread/processo/worker fica com uma
+        # faixa do tamanho do tabuleiro base (ver _tamanho). O sequencial roda no base
+        self.fraca = fraca
+        # Os workers do pool estao na mesma maquina: por padrao as faixas vao por memoria
+        # compartilhada (ver _Memoria no distribuido.py). memoria=False forca o TCP, pra comparar
+        self.memoria = memoria
+        # Paralelo e distribuido escolhem sozinhos entre faixas e blocos px x py (ver
+        # escolher_particao no paralelo.py). dividir_2d=False forca as faixas, pra comparar
+        self.dividir_2d = dividir_2d
+
         # Crio as tuplas (largura, altura)
         self.tamanhos = [(t, t) for t in tamanhos]
         self.lista_recursos = recursos
-        
+
         # Abrir e fechar processo no Windows demora muito
         # e trava as portas TCP. Entao, em vez de criar workers pra cada teste,
         # eu crio um "pool" no comeco e deixo eles rodando em background.
@@ -28,22 +101,40 @@ class BenchmarkVida:
         self.porta_distribuida = 9999
         self.max_workers = max(recursos)
         self.processos_workers = []
-        
+        self.ouvinte = None
+        # Conexoes ja aceitas (e o MSG_OLA ja lido) esperando a primeira execucao
+        self.prontos = []
+
         self._iniciar_pool_workers()
 
     def _iniciar_pool_workers(self):
         print(f"\nIniciando Pool de {self.max_workers} Workers na porta {self.porta_distribuida}...")
-        
+
+        # Uma porta so, aberta o benchmark inteiro: quando uma execucao fecha as conexoes,
+        # o worker reconecta na hora e fica na fila do listen ate a proxima. Assim nao
+        # precisa de sleep entre execucoes (nem porta em TIME_WAIT)
+        self.ouvinte = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.ouvinte.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.ouvinte.bind(("", self.porta_distribuida))
+        self.ouvinte.listen(self.max_workers)
+        # Timeout de 1 min para nao travar para sempre se um worker nao vier
+        self.ouvinte.settimeout(60)
+
         for _ in range(self.max_workers):
             # Chamo o script distribuido no modo worker
             cmd = [sys.executable, "distribuido.py", "worker", "localhost", str(self.porta_distribuida)]
-            
+
             # Mando a saida pro DEVNULL pro terminal nao virar uma bagunca de prints
             p = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
             self.processos_workers.append(p)
-        
-        # Espero um pouco pra garantir que todos subiram
-        time.sleep(3)
+
+        # Espero todos se apresentarem (MSG_OLA) antes de medir qualquer coisa: quando
+        # sobe, cada worker mede a propria velocidade (medir_capacidade), e isso rodando
+        # junto com o sequencial estragava as primeiras medidas
+        for _ in range(self.max_workers):
+            conn, _ = self.ouvinte.accept()
+            preparar_conexao(conn)
+            self.prontos.append((conn, ler_ola(conn, 60)))
         print("Pool pronto.\n")
 
     def limpar_pool(self):
@@ -55,112 +146,344 @@ class BenchmarkVida:
         for p in self.processos_workers:
             if p.poll() is None: # Se ainda ta vivo
                 p.terminate()
-        
+
         for p in self.processos_workers:
             p.wait()
-            
+
         self.processos_workers = []
+        for conn, _ in self.prontos:
+            conn.close()
+        self.prontos = []
+        if self.ouvinte is not None:
+            self.ouvinte.close()
+            self.ouvinte = None
         print("Limpeza concluida.")
 
     def rodar_sequencial(self):
         print("\n=== INICIANDO BENCHMARK SEQUENCIAL ===")
-        
+
+        for largura, altura in self.tamanhos:
+            self._medir("sequencial", largura, altura, 1, lambda medidor: VidaSequencial(
+                largura, altura, janela_ciclos=self.janela_ciclos,
+                grade_inicial=self._grade_inicial(largura, altura), tipo_nucleo=self.tipo_nucleo,
+                regra=self.regra, toroidal=self.toroidal, medidor=medidor
+            ))
+
+    def rodar_esparso(self):
+        print("\n=== INICIANDO BENCHMARK ESPARSO ===")
+        if self.toroidal:
+            print("O esparso nao tem modo toroidal, pulando.")
+            return
+
         for largura, altura in self.tamanhos:
-            try:
-                # Roda e pega o tempo
-                tempo = executar_simulacao_sequencial(largura, altura, self.iteracoes)
-                
-                self.resultados.append({
-                    "versao": "sequencial",
-                    "largura": largura, 
-                    "altura": altura,
-                    "recursos": 1,
-                    "tempo": tempo
-                })
-            except Exception as e:
-                print(f"Deu ruim no sequencial {largura}x{altura}: {e}")
+            # So guarda as celulas vivas: o tempo depende da populacao, nao do tamanho
+            self._medir("esparso", largura, altura, 1, lambda medidor: VidaEsparsa(
+                largura, altura, janela_ciclos=self.janela_ciclos,
+                grade_inicial=self._grade_inicial(largura, altura), regra=self.regra, medidor=medidor
+            ))
 
     def rodar_paralelo(self):
         print("\n=== INICIANDO BENCHMARK PARALELO ===")
-        
-        for largura, altura in self.tamanhos:
+
+        for base in self.tamanhos:
             for n_threads in self.lista_recursos:
-                try:
-                    tempo = executar_simulacao_paralela(largura, altura, self.iteracoes, n_threads)
-                    
-                    self.resultados.append({
-                        "versao": "paralelo",
-                        "largura": largura,
-                        "altura": altura,
-                        "recursos": n_threads,
-                        "tempo": tempo
-                    })
-                except Exception as e:
-                    print(f"Deu ruim no paralelo {largura}x{altura} ({n_threads} threads): {e}")
+                largura, altura = self._tamanho(base, n_threads)
+                # As threads nascem no construtor: isso conta como preparo
+                self._medir("paralelo", largura, altura, n_threads, lambda medidor: VidaParalela(
+                    largura, altura, n_threads, janela_ciclos=self.janela_ciclos,
+                    grade_inicial=self._grade_inicial(largura, altura), tipo_nucleo=self.tipo_nucleo,
+                    regra=self.regra, toroidal=self.toroidal, medidor=medidor, dividir_2d=self.dividir_2d
+                ), base)
+
+    def rodar_processos(self):
+        print("\n=== INICIANDO BENCHMARK PARALELO (PROCESSOS) ===")
+
+        for base in self.tamanhos:
+            for n_processos in self.lista_recursos:
+                largura, altura = self._tamanho(base, n_processos)
+                self._medir("processos", largura, altura, n_processos, lambda medidor: VidaProcessos(
+                    largura, altura, n_processos, janela_ciclos=self.janela_ciclos,
+                    grade_inicial=self._grade_inicial(largura, altura), tipo_nucleo=self.tipo_nucleo,
+                    regra=self.regra, toroidal=self.toroidal, medidor=medidor
+                ), base)
 
     def rodar_distribuido(self):
         print("\n=== INICIANDO BENCHMARK DISTRIBUÍDO ===")
-        
-        for largura, altura in self.tamanhos:
+
+        for base in self.tamanhos:
             for n_workers in self.lista_recursos:
+                largura, altura = self._tamanho(base, n_workers)
+                # Aqui eh rapido: o servidor so aceita as conexoes dos workers
+                # que ja estao parados esperando no Pool.
+                self._medir("distribuido", largura, altura, n_workers,
+                            lambda medidor: self._montar_distribuido(largura, altura, n_workers, medidor), base)
+
+    def _tamanho(self, base, recursos):
+        # Escala fraca: as versoes dividem o tabuleiro em faixas de linhas, entao so a
+        # altura cresce. O interior fica com recursos * (altura - 2) linhas: cada um
+        # calcula exatamente o interior do tabuleiro base (tabuleiro alto assim a
+        # escolher_particao sempre divide em faixas, mesmo com dividir_2d)
+        largura, altura = base
+        if not self.fraca:
+            return largura, altura
+        return largura, (altura - 2) * recursos + 2
+
+    def _montar_distribuido(self, largura, altura, n_workers, medidor):
+        # Mesma montagem do executar_servidor_distribuido, mas na porta do pool
+        vida = VidaDistribuida(largura, altura, janela_ciclos=self.janela_ciclos,
+                               grade_inicial=self._grade_inicial(largura, altura), tipo_nucleo=self.tipo_nucleo,
+                               regra=self.regra, toroidal=self.toroidal, medidor=medidor, memoria=self.memoria,
+                               dividir_2d=self.dividir_2d)
+        try:
+            for _ in range(min(n_workers, vida.maximo_workers())):
+                if self.prontos:
+                    conn, capacidade = self.prontos.pop(0)
+                else:
+                    conn, _ = self.ouvinte.accept()
+                    preparar_conexao(conn)
+                    capacidade = None
+                vida.add_worker(conn, capacidade=capacidade)
+        except Exception:
+            self._desmontar(vida, rodou=True)
+            raise
+        return vida
+
+    def _medir(self, versao, largura, altura, recursos, montar, base=None):
+        # base: o tamanho (largura, altura) da lista de tamanhos que gerou esse (na escala
+        # fraca e o tamanho de cada faixa; e com ele que o analisar acha o sequencial)
+        base = base or (largura, altura)
+        print(f"--- {versao} {largura}x{altura} ({recursos}) ---")
+        medidor = self._novo_medidor()
+        preparos, regimes, por_geracao = [], [], []
+        # So o distribuido: calculo (worker mais lento), comunicacao e servidor por geracao
+        divisao = {"calculo": [], "comunicacao": [], "servidor": []}
+        reais, ciclo = 0, None
+
+        try:
+            for _ in range(self.repeticoes):
+                t0 = time.perf_counter()
+                vida = montar(medidor)
+                preparos.append(time.perf_counter() - t0)
+
+                rodou = False
                 try:
-                    # Aqui eh rapido: o servidor so aceita as conexoes dos workers
-                    # que ja estao parados esperando no Pool.
-                    tempo = executar_servidor_distribuido(
-                        largura, altura, self.iteracoes, n_workers, self.porta_distribuida
-                    )
-                    
-                    self.resultados.append({
-                        "versao": "distribuido",
-                        "largura": largura,
-                        "altura": altura,
-                        "recursos": n_workers,
-                        "tempo": tempo
-                    })
-                    
-                    # Dou uma respirada pro Windows liberar as conexoes TCP antigas
-                    time.sleep(0.5)
-                    
-                except Exception as e:
-                    print(f"Deu ruim no distribuido {largura}x{altura} ({n_workers} workers): {e}")
+                    for _ in range(self.aquecimento):
+                        vida.atualizar()
+
+                    # O coletor de lixo fica desligado so no trecho medido (igual o timeit)
+                    gc.collect()
+                    gc.disable()
+                    rodou = True
+                    calculo, troca = getattr(vida, "tempo_calculo", 0.0), getattr(vida, "tempo_troca", 0.0)
+                    t0 = time.perf_counter()
+                    inicio = vida.geracao
+                    reais = vida.simular(self.iteracoes)
+                    regimes.append(time.perf_counter() - t0)
+                finally:
+                    gc.enable()
+                    self._desmontar(vida, rodou)
+
+                geracoes = max(reais, 1)
+                por_geracao.append(regimes[-1] / geracoes)
+                # O motor conta a geracao desde o comeco; aqui vale a partir do aquecimento
+                ciclo = (vida.ciclo[0] - inicio, vida.ciclo[1]) if vida.ciclo else None
+                if isinstance(vida, VidaDistribuida):
+                    calculo = (vida.tempo_calculo - calculo) / geracoes
+                    troca = (vida.tempo_troca - troca) / geracoes
+                    divisao["calculo"].append(calculo)
+                    divisao["comunicacao"].append(troca - calculo)
+                    divisao["servidor"].append(por_geracao[-1] - troca)
+        except Exception as e:
+            print(f"Deu ruim no {versao} {largura}x{altura} ({recursos}): {e}")
+            return
+
+        geracao = resumir(por_geracao)
+        # Celulas atualizadas por geracao: o interior (a moldura nao e calculada)
+        celulas = max(largura - 2, 0) * max(altura - 2, 0)
+        vazao = celulas / geracao["mediana"] if geracao["mediana"] > 0 else 0.0
+        baixo, alto = geracao["ic95"]
+        print(f"  {geracao['mediana'] * 1e3:.3f} ms/geracao (IC95 {baixo * 1e3:.3f}-{alto * 1e3:.3f}), "
+              f"preparo {np.median(preparos) * 1e3:.1f} ms, {vazao / 1e6:.1f} Mcelulas/s")
+        if divisao["calculo"]:
+            divisao = {parte: float(np.median(v)) for parte, v in divisao.items()}
+            print(f"  calculo {divisao['calculo'] * 1e3:.3f} ms, comunicacao {divisao['comunicacao'] * 1e3:.3f} ms, "
+                  f"servidor {divisao['servidor'] * 1e3:.3f} ms por geracao")
+        else:
+            divisao = None
+
+        self.resultados.append({
+            "versao": versao,
+            "largura": largura,
+            "altura": altura,
+            "recursos": recursos,
+            # "forte" (tamanho fixo) ou "fraca" (tamanho cresce com os recursos)
+            "modo": "fraca" if self.fraca and versao in ("paralelo", "processos", "distribuido") else "forte",
+            "base": list(base),
+            # Mediana das repeticoes, so o regime (sem montar o motor nem o aquecimento):
+            # e o que o speedup usa
+            "tempo": float(np.median(regimes)),
+            "tempo_geracao": geracao,
+            "tempo_preparo": resumir(preparos),
+            "celulas_por_segundo": vazao,
+            # Tempo por geracao de cada repeticao (a comparacao entre execucoes usa isso)
+            "amostras": por_geracao,
+            # Mediana por geracao do que o worker mais lento calculou, do resto da troca
+            # (rede, serializacao, fila) e do que o servidor fez sozinho. None fora do distribuido
+            "divisao": divisao,
+            **self._info_execucao(reais, ciclo)
+        })
+        self._guardar_fases(versao, largura, altura, recursos, medidor)
+
+    def _desmontar(self, vida, rodou):
+        if isinstance(vida, VidaDistribuida):
+            # Fecha as conexoes (os workers voltam pra fila da porta do pool) e apaga as
+            # memorias compartilhadas
+            vida.fechar()
+        elif not rodou and hasattr(vida, "_parar_tudo"):
+            # Threads/processos param sozinhos no fim do simular; se deu erro antes, paro aqui
+            vida._parar_tudo()
+
+    def _grade_inicial(self, largura, altura):
+        if self.padrao is None:
+            return None
+        return grade_com_padrao(largura, altura, self.padrao)
+
+    def _novo_medidor(self):
+        return Medidor() if self.instrumentar else None
+
+    def _guardar_fases(self, versao, largura, altura, recursos, medidor):
+        if medidor is None:
+            return
+        self.instrumentacao.append({
+            "versao": versao,
+            "largura": largura,
+            "altura": altura,
+            "recursos": recursos,
+            "nucleo": self.tipo_nucleo,
+            "fases": medidor.resumo()
+        })
+
+    def _info_execucao(self, reais, ciclo):
+        # Qual carga rodou, quantas geracoes rodaram de verdade e, se parou num
+        # oscilador, onde e de que periodo (contando a partir do fim do aquecimento)
+        return {
+            "padrao": self.padrao.nome if self.padrao else "aleatorio",
+            "nucleo": self.tipo_nucleo,
+            "regra": self.regra,
+            "toroidal": self.toroidal,
+            "iteracoes_feitas": reais,
+            "ciclo_inicio": ciclo[0] if ciclo else None,
+            "periodo": ciclo[1] if ciclo else None
+        }
 
     def salvar_resultados(self, arquivo="resultados_benchmark.json"):
         # Crio a pasta se nao existir
         os.makedirs("resultados", exist_ok=True)
         caminho = os.path.join("resultados", arquivo)
-        
+
+        # Junto com os resultados vai onde e como rodou
+        dados = {
+            "ambiente": descrever_ambiente(),
+            "configuracao": {
+                "iteracoes": self.iteracoes,
+                "aquecimento": self.aquecimento,
+                "repeticoes": self.repeticoes,
+                "janela_ciclos": self.janela_ciclos,
+                "modo": "fraca" if self.fraca else "forte",
+                "memoria": self.memoria,
+                "dividir_2d": self.dividir_2d,
+            },
+            "resultados": self.resultados,
+        }
         with open(caminho, "w", encoding="utf-8") as f:
-            json.dump(self.resultados, f, indent=4)
+            json.dump(dados, f, indent=4)
         print(f"\nResultados salvos em: {caminho}")
 
+        # A instrumentacao vai num arquivo separado, do lado (o analisar_resultados le os dois)
+        if self.instrumentacao:
+            caminho = salvar_instrumentacao(self.instrumentacao, os.path.join("resultados", "instrumentacao.json"))
+            print(f"Tempo por fase salvo em: {caminho}")
+
 
 if __name__ == "__main__":
     # Uso argparse pra poder configurar os testes pela linha de comando
     parser = argparse.ArgumentParser(description="Benchmark Jogo da Vida")
-    
+
     parser.add_argument("--iteracoes", type=int, default=100)
     parser.add_argument("--tamanhos", nargs='+', type=int, default=[100, 200, 500])
     parser.add_argument("--recursos", nargs='+', type=int, default=[2, 4, 8, 16])
+    # Geracoes rodadas antes de comecar a medir, e quantas vezes cada configuracao roda
+    parser.add_argument("--aquecimento", type=int, default=10)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    # Janela da deteccao de ciclos (0 = desligada, roda sempre todas as iteracoes)
+    parser.add_argument("--ciclos", type=int, default=0)
+    # Carga: nome de um padrao embutido (gosper, acorn, ...) ou arquivo .rle/.cells
+    parser.add_argument("--padrao", default=None)
+    # Quais versoes rodar (o esparso so roda se pedir)
+    parser.add_argument("--versoes", nargs='+', default=["sequencial", "paralelo", "processos", "distribuido"],
+                        choices=["sequencial", "esparso", "paralelo", "processos", "distribuido"])
+    # Nucleo das versoes densas: soma dos vizinhos ou tabela 3x3. Com os dois, roda tudo
+    # uma vez com cada (o esparso nao usa nucleo, roda uma vez so)
+    parser.add_argument("--nucleos", nargs='+', default=["soma"], choices=["soma", "tabela"])
+    # Regra B/S (ex: B36/S23 = HighLife). Sem ela: a do padrao, ou o Conway
+    parser.add_argument("--regra", default=None)
+    # Bordas que dao a volta em vez da moldura morta
+    parser.add_argument("--toroidal", action="store_true")
+    # Mede o tempo de cada fase (calculo, espera, rede, juncao...) por thread/worker
+    parser.add_argument("--instrumentar", action="store_true")
+    # Escala fraca: paralelo/processos/distribuido rodam num tabuleiro 'recursos' vezes
+    # mais alto (cada um com uma faixa do tamanho pedido), em vez do mesmo tabuleiro
+    parser.add_argument("--fraca", action="store_true")
+    # Distribuido sempre por TCP, mesmo com os workers na mesma maquina
+    parser.add_argument("--sem-memoria", action="store_true")
+    # Paralelo e distribuido so em faixas horizontais (sem os blocos 2D)
+    parser.add_argument("--so-faixas", action="store_true")
 
     args = parser.parse_args()
 
-    print(f"Configuração: {args.iteracoes} iterações")
+    print(f"Configuração: {args.iteracoes} iterações ({args.aquecimento} de aquecimento, {args.repeticoes} repetições)")
     print(f"Tamanhos: {args.tamanhos}")
     print(f"Recursos: {args.recursos}")
+    print(f"Versoes: {args.versoes}")
+    print(f"Nucleos: {args.nucleos}")
+    print(f"Regra: {args.regra or 'do padrao / B3/S23'}")
+    print(f"Escala: {'fraca' if args.fraca else 'forte'}")
 
     app = BenchmarkVida(
         iteracoes=args.iteracoes,
         tamanhos=args.tamanhos,
-        recursos=args.recursos
+        recursos=args.recursos,
+        janela_ciclos=args.ciclos,
+        padrao=args.padrao,
+        regra=args.regra,
+        toroidal=args.toroidal,
+        instrumentar=args.instrumentar,
+        aquecimento=args.aquecimento,
+        repeticoes=args.repeticoes,
+        fraca=args.fraca,
+        memoria=not args.sem_memoria,
+        dividir_2d=not args.so_faixas
     )
-    
+
     # Garanto que vou limpar a bagunca (matar processos) quando o script acabar
     atexit.register(app.limpar_pool)
-    
+
     try:
-        app.rodar_sequencial()
-        app.rodar_paralelo()
-        app.rodar_distribuido()
+        # A ordem eh fixa: o sequencial vai primeiro porque ele eh a base do speedup
+        etapas = {
+            "sequencial": app.rodar_sequencial,
+            "esparso": app.rodar_esparso,
+            "paralelo": app.rodar_paralelo,
+            "processos": app.rodar_processos,
+            "distribuido": app.rodar_distribuido,
+        }
+        for i, nucleo in enumerate(args.nucleos):
+            app.tipo_nucleo = nucleo
+            for versao, rodar in etapas.items():
+                if versao == "esparso" and i > 0:
+                    continue
+                if versao in args.versoes:
+                    rodar()
         app.salvar_resultados()
     except KeyboardInterrupt:
         print("\nInterrompido pelo usuario.")
@@ -0,0 +1,190 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+from estatistica import mann_whitney
+
+# Portão de regressão: compara o último benchmark com uma linha de base guardada.
+#
+#   python comparar.py salvar     -> guarda o resultados_benchmark.json atual como base
+#   python comparar.py            -> compara o atual com a base; sai com código 1 se piorou
+#
+# A base é um JSON com uma entrada por configuração (versão, núcleo, tamanho, recursos),
+# cada uma com as amostras de tempo por geração das repetições (o benchmark.py grava em
+# "amostras"). Salvar de novo só troca as configurações que rodaram, o resto da base fica.
+#
+# Uma configuração é regressão quando as duas coisas valem: o Mann-Whitney diz que as
+# amostras novas são maiores que as da base (p <= alfa) e a mediana piorou mais que o
+# limiar. Só o teste pegaria diferenças minúsculas; só o limiar pegaria ruído.
+
+LINHA_BASE = "resultados/linha_base.json"
+ATUAL = "resultados/resultados_benchmark.json"
+
+# Piora mínima da mediana (5%) e nível de significância do teste
+LIMIAR = 0.05
+ALFA = 0.05
+
+# O que tem que ser igual para a comparação fazer sentido (a carga de trabalho)
+CAMPOS_CARGA = ("padrao", "regra", "toroidal")
+# O que do ambiente vale avisar se mudou entre a base e o atual
+CAMPOS_AMBIENTE = ("processador", "cpus_disponiveis", "python", "numpy", "blas")
+
+REGRESSAO = "REGRESSAO"
+MELHORA = "melhora"
+IGUAL = "igual"
+SEM_BASE = "sem base"
+SEM_AMOSTRAS = "sem amostras"
+CARGA_DIFERENTE = "carga diferente"
+
+
+def chave(d):
+    return f"{d['versao']}/{d.get('nucleo', 'soma')}/{d['largura']}x{d['altura']}/{d['recursos']}"
+
+def carregar_resultados(caminho=ATUAL):
+    # Aceita o formato antigo (só a lista) e o novo (com ambiente e configuração)
+    with open(caminho, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+    if isinstance(dados, list):
+        dados = {"ambiente": None, "configuracao": None, "resultados": dados}
+    return dados
+
+def carregar_linha_base(caminho=LINHA_BASE):
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def salvar_linha_base(dados, caminho=LINHA_BASE):
+    # Junta as configurações do benchmark na base (as que já existiam são trocadas).
+    # Devolve quantas entraram; resultado sem amostras (JSON antigo) não serve de base
+    base = carregar_linha_base(caminho) or {"entradas": {}}
+    quantas = 0
+    for d in dados["resultados"]:
+        if not d.get("amostras"):
+            continue
+        base["entradas"][chave(d)] = {
+            "versao": d["versao"],
+            "nucleo": d.get("nucleo", "soma"),
+            "largura": d["largura"],
+            "altura": d["altura"],
+            "recursos": d["recursos"],
+            **{campo: d.get(campo) for campo in CAMPOS_CARGA},
+            "amostras": d["amostras"],
+            "ambiente": dados.get("ambiente"),
+            "data": (dados.get("ambiente") or {}).get("data") or time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        quantas += 1
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(base, f, indent=4)
+    return quantas
+
+def comparar(dados, base, limiar=LIMIAR, alfa=ALFA):
+    # Uma linha por configuração do benchmark atual
+    linhas = []
+    for d in dados["resultados"]:
+        linha = {
+            "chave": chave(d),
+            "versao": d["versao"],
+            "nucleo": d.get("nucleo", "soma"),
+            "largura": d["largura"],
+            "altura": d["altura"],
+            "recursos": d["recursos"],
+            "base": None,
+            "atual": None,
+            "variacao": None,
+            "p": None,
+        }
+        linhas.append(linha)
+        entrada = base["entradas"].get(linha["chave"])
+        if entrada is None:
+            linha["situacao"] = SEM_BASE
+            continue
+        if not d.get("amostras"):
+            linha["situacao"] = SEM_AMOSTRAS
+            continue
+        if any(entrada.get(campo) != d.get(campo) for campo in CAMPOS_CARGA):
+            linha["situacao"] = CARGA_DIFERENTE
+            continue
+
+        linha["base"] = float(np.median(entrada["amostras"]))
+        linha["atual"] = float(np.median(d["amostras"]))
+        linha["variacao"] = linha["atual"] / linha["base"] - 1
+        # Unilateral para cada lado: o atual é mais lento? mais rápido?
+        _, p_pior = mann_whitney(d["amostras"], entrada["amostras"], "maior")
+        _, p_melhor = mann_whitney(d["amostras"], entrada["amostras"], "menor")
+        if p_pior <= alfa and linha["variacao"] > limiar:
+            linha["situacao"], linha["p"] = REGRESSAO, p_pior
+        elif p_melhor <= alfa and linha["variacao"] < -limiar:
+            linha["situacao"], linha["p"] = MELHORA, p_melhor
+        else:
+            linha["situacao"], linha["p"] = IGUAL, min(p_pior, p_melhor)
+    return linhas
+
+def diferencas_ambiente(dados, base):
+    # Campos do ambiente que mudaram desde a base (a comparação continua, mas é bom saber)
+    atual = dados.get("ambiente") or {}
+    mudou = {}
+    for entrada in base["entradas"].values():
+        anterior = entrada.get("ambiente") or {}
+        for campo in CAMPOS_AMBIENTE:
+            if campo in anterior and campo in atual and anterior[campo] != atual[campo]:
+                mudou[campo] = (anterior[campo], atual[campo])
+    return mudou
+
+def mostrar_comparacao(linhas):
+    print("\n" + "=" * 112)
+    print(f"{'VERSÃO':<15} | {'NÚCLEO':<8} | {'TAMANHO':<12} | {'RECURSOS':<8} | {'BASE (ms)':<10} | {'ATUAL (ms)':<10} | {'VARIAÇÃO':<9} | {'p':<7} | {'SITUAÇÃO':<15}")
+    print("-" * 112)
+    for l in linhas:
+        tam = f"{l['largura']}x{l['altura']}"
+        base = f"{l['base'] * 1e3:.4f}" if l['base'] is not None else '-'
+        atual = f"{l['atual'] * 1e3:.4f}" if l['atual'] is not None else '-'
+        variacao = f"{l['variacao']:+.1%}" if l['variacao'] is not None else '-'
+        p = f"{l['p']:.4f}" if l['p'] is not None else '-'
+        print(f"{l['versao']:<15} | {l['nucleo']:<8} | {tam:<12} | {l['recursos']:<8} | {base:<10} | {atual:<10} | {variacao:<9} | {p:<7} | {l['situacao']:<15}")
+    print("=" * 112 + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara o benchmark com a linha de base")
+    # comparar (padrão) ou salvar o atual como base
+    parser.add_argument("acao", nargs="?", default="comparar", choices=["comparar", "salvar"])
+    parser.add_argument("--atual", default=ATUAL)
+    parser.add_argument("--base", default=LINHA_BASE)
+    # Piora mínima da mediana para contar como regressão (0.05 = 5%)
+    parser.add_argument("--limiar", type=float, default=LIMIAR)
+    parser.add_argument("--alfa", type=float, default=ALFA)
+    args = parser.parse_args()
+
+    dados = carregar_resultados(args.atual)
+
+    if args.acao == "salvar":
+        quantas = salvar_linha_base(dados, args.base)
+        print(f"{quantas} configurações salvas na linha de base: {args.base}")
+        if not quantas:
+            print("Nenhum resultado com amostras (rode o benchmark.py de novo).")
+        sys.exit(0)
+
+    base = carregar_linha_base(args.base)
+    if base is None:
+        print(f"Sem linha de base em {args.base}: rode 'python comparar.py salvar' primeiro.")
+        sys.exit(2)
+
+    for campo, (antes, agora) in diferencas_ambiente(dados, base).items():
+        print(f"Aviso: {campo} mudou desde a linha de base ({antes} -> {agora})")
+
+    linhas = comparar(dados, base, args.limiar, args.alfa)
+    mostrar_comparacao(linhas)
+
+    regressoes = [l for l in linhas if l["situacao"] == REGRESSAO]
+    if regressoes:
+        print(f"{len(regressoes)} regressão(ões) acima de {args.limiar:.0%} (p <= {args.alfa}):")
+        for l in regressoes:
+            print(f"  {l['chave']}: {l['variacao']:+.1%}")
+        sys.exit(1)
+    print("Nenhuma regressão.")
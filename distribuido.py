@@ -1,233 +1,1676 @@
+import os
 import socket
+import selectors
+import signal
 import struct
+import threading
 import time
-import pickle
+import json
 import numpy as np
 import sys
+from multiprocessing import resource_tracker, shared_memory
+
+# O núcleo (e a versão com tiles ativos) fica no sequencial, eu só reaproveito aqui
+from regras import ler_regra
+from sequencial import criar_nucleo, atualizar_faixa_tiles, criar_mapa_tiles, expandir_ativos
+from sequencial import atualizar_fantasmas, atualizar_colunas_fantasmas, atualizar_linhas_fantasmas, volta_tiles
+from sequencial import DetectorCiclos, hash_grade, hash_linhas, misturar_linhas, somas_linhas, mostrar_ciclo
+from paralelo import escolher_particao
+from persistencia import Checkpoint, persistir, precisa_grade, restaurar, retomar_se_existir
+from padroes import criar_grade
+
+# --- PROTOCOLO ---
+# Nada de pickle: cada mensagem é um cabeçalho fixo + os bytes crus da matriz.
+# Cabeçalho: tipo, formato, flags, geração, linhas, colunas, deslocamento (linha global da fatia)
+CABECALHO = struct.Struct("!BBBxIIII")
+
+# Tipos de mensagem
+MSG_CONFIG = 1   # servidor -> worker: configuração em JSON (uma vez por conexão)
+MSG_FAIXA = 2    # servidor -> worker: faixa com linhas fantasma / worker -> servidor: linhas calculadas
+# Modo halo: a faixa fica morando no worker e só as bordas viajam
+MSG_CARREGAR = 3 # servidor -> worker: faixa inicial (com linhas fantasma), sem resposta
+MSG_PASSO = 4    # servidor -> worker: as 2 linhas fantasma novas (de cima e de baixo)
+MSG_BORDAS = 5   # worker -> servidor: primeira e última linha calculadas
+MSG_COLETAR = 6  # servidor -> worker: pede a faixa inteira de volta (resposta é MSG_FAIXA)
+MSG_VIVO = 7     # worker -> servidor: "ainda estou calculando" (só o cabeçalho, antes da resposta)
+# Entrada e saída de workers durante a simulação
+MSG_OLA = 8      # worker -> servidor: primeira mensagem da conexão, capacidade do worker em JSON
+MSG_TCHAU = 9    # worker -> servidor: "quero sair" (só o cabeçalho); sai entre duas gerações
+# Worker na mesma máquina (ver _Memoria)
+MSG_MEMORIA = 10 # servidor -> worker: nome da memória compartilhada em JSON / worker -> servidor: abriu (linhas=1) ou não (0)
+
+# Formatos do conteúdo
+FORMATO_JSON = 0
+FORMATO_BRUTO = 1  # uint8, uma célula por byte
+FORMATO_BITS = 2   # np.packbits por linha, 8 células por byte
+
+# Flags
+FLAG_MUDOU = 1     # a faixa mudou nessa geração
+FLAG_TILES = 2     # depois da matriz vem o mapa de tiles (ativos na ida, alterados na volta)
+FLAG_HASH = 4      # modo halo: o servidor pede (e o worker manda no fim) o hash da faixa, 8 bytes
+FLAG_TEMPO = 8     # o servidor pede (e o worker manda bem no fim) quanto o cálculo demorou, float64
+FLAG_MEMORIA = 16  # a matriz (faixa, fantasmas ou bordas) está na memória compartilhada, não no socket
+# Bloco 2D (só parte das colunas): o worker não mexe nas colunas fantasma. No MSG_CARREGAR
+# vem antes da matriz a coluna global da coluna 0 (uint32, para o hash), e no modo halo as
+# fantasmas e as bordas viram a moldura do bloco numa linha só (ver _moldura_bloco)
+FLAG_BLOCO = 32
+
+# Tolerância a falhas: sem nenhum byte nem batimento de um worker por PRAZO segundos,
+# ele é dado como morto. Enquanto calcula, o worker manda um MSG_VIVO a cada BATIMENTO.
+PRAZO = 10.0
+BATIMENTO = 1.0
+# Reconexão do worker: espera dobrando a cada tentativa, até esse máximo
+ESPERA_MAXIMA = 5.0
+
+# Memória compartilhada: os primeiros bytes da região levam uma ficha aleatória que o worker
+# confere (mesmo nome de região não garante que é a mesma, ex: containers). Quando a faixa
+# cresce, a região nova já vem com essa folga, para não refazer a cada rebalanceamento.
+TAMANHO_FICHA = 16
+FOLGA_MEMORIA = 1.25
+# Regiões criadas por este processo (um worker numa thread do próprio servidor, nos testes,
+# não pode tirar do resource_tracker o que o servidor registrou)
+_CRIADAS = set()
+
+
+def tamanho_conteudo(formato, linhas, colunas):
+    if formato == FORMATO_BITS:
+        return linhas * ((colunas + 7) // 8)
+    return linhas * colunas
+
+def forma_rede(formato, linhas, colunas):
+    # Forma da matriz como ela viaja (no formato bits, cada linha vira (colunas + 7) // 8 bytes)
+    if formato == FORMATO_BITS:
+        return linhas, (colunas + 7) // 8
+    return linhas, colunas
+
+def identificar_maquina():
+    # Vai no MSG_OLA: se bater com o do servidor, o worker está na mesma máquina e pode
+    # usar memória compartilhada. No Linux o boot_id separa máquinas com o mesmo nome
+    boot = ""
+    try:
+        with open("/proc/sys/kernel/random/boot_id", encoding="ascii") as f:
+            boot = f.read().strip()
+    except OSError:
+        pass
+    return f"{socket.gethostname()}/{boot}"
+
+def _visoes(partes):
+    # memoryviews de bytes de cada parte (vazias ficam de fora)
+    visoes = [memoryview(p).cast("B") for p in partes]
+    return [v for v in visoes if v.nbytes]
+
+def _consumir(buffers, enviado):
+    # Tiro da lista o que já foi (o sendmsg pode mandar só uma parte)
+    while buffers and enviado >= buffers[0].nbytes:
+        enviado -= buffers[0].nbytes
+        buffers.pop(0)
+    if enviado:
+        buffers[0] = buffers[0][enviado:]
+
+def _enviar_parte(sock, buffers):
+    # Windows não tem sendmsg, aí mando um pedaço de cada vez mesmo
+    if hasattr(sock, "sendmsg"):
+        return sock.sendmsg(buffers)
+    return sock.send(buffers[0])
+
+def enviar_quadro(sock, cabecalho, *partes):
+    # Manda cabeçalho + partes sem juntar tudo num bytes novo (scatter-gather com sendmsg)
+    buffers = _visoes((cabecalho,) + partes)
+    while buffers:
+        _consumir(buffers, _enviar_parte(sock, buffers))
+
+def manter_vivo(sock):
+    # TCP keepalive curto: se a outra máquina sumir sem fechar a conexão (nó desligado),
+    # o recv não fica travado para sempre (onde o sistema deixa configurar)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    for opcao, valor in (("TCP_KEEPIDLE", 10), ("TCP_KEEPINTVL", 5), ("TCP_KEEPCNT", 3)):
+        if hasattr(socket, opcao):
+            sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, opcao), valor)
+
+def preparar_conexao(sock):
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    manter_vivo(sock)
+
+def receber_em(sock, destino):
+    # Recebe direto no buffer de destino (sem ficar concatenando bytes)
+    visao = memoryview(destino).cast("B")
+    recebido = 0
+    while recebido < visao.nbytes:
+        n = sock.recv_into(visao[recebido:])
+        if n == 0: return False
+        recebido += n
+    return True
+
+
+class _Canal:
+    # Uma conversa (envia um quadro, recebe a resposta) com um worker, feita aos pouquinhos
+    # para o servidor poder falar com todos os workers ao mesmo tempo.
+    # 'ao_cabecalho' recebe o cabeçalho da resposta e devolve (buffers onde receber o resto,
+    # função chamada no final, que dá o resultado do canal).
+    # Se a conversa der errado (conexão caiu, resposta estranha, prazo estourado), o erro
+    # fica em 'erro' e quem chamou decide o que fazer com a faixa desse worker.
+
+    def __init__(self, sock, partes, ao_cabecalho, id=None):
+        self.sock = sock
+        self.id = id
+        # Quando acabou de enviar, quando chegou o cabeçalho da resposta e quando terminou
+        # (o balanceamento e a instrumentação usam)
+        self.t_envio = self.t_cab = self.t_fim = None
+        self.erro = None
+        self.tchau = False
+        # Último sinal de vida (qualquer byte que foi ou veio, ou um MSG_VIVO)
+        self.ultimo = time.perf_counter()
+        self.saida = _visoes(partes)
+        self.cab = bytearray(CABECALHO.size)
+        self.destinos = [memoryview(self.cab)]
+        self.pos = 0
+        self.ao_cabecalho = ao_cabecalho
+        self.ao_terminar = None
+        self.pronto = ao_cabecalho is None
+        self.resultado = None
+
+    def escrever(self):
+        try:
+            _consumir(self.saida, _enviar_parte(self.sock, self.saida))
+        except BlockingIOError:
+            return
+        self.ultimo = time.perf_counter()
+        if not self.saida:
+            self.t_envio = self.ultimo
+
+    def ler(self):
+        destino = self.destinos[0]
+        try:
+            n = self.sock.recv_into(destino[self.pos:])
+        except BlockingIOError:
+            return
+        if n == 0:
+            raise ConnectionError("worker fechou a conexão")
+        self.ultimo = time.perf_counter()
+        self.pos += n
+        if self.pos < destino.nbytes:
+            return
+
+        # Terminei um buffer: passo para o próximo
+        self.destinos.pop(0)
+        self.pos = 0
+        if self.ao_cabecalho is not None:
+            tipo = CABECALHO.unpack(self.cab)[0]
+            if tipo in (MSG_VIVO, MSG_TCHAU):
+                # Batimento (ou pedido de saída, que vale na próxima parada entre gerações):
+                # volto a esperar o cabeçalho da resposta de verdade
+                self.tchau |= tipo == MSG_TCHAU
+                self.destinos.insert(0, memoryview(self.cab))
+                return
+            self.t_cab = self.ultimo
+            mais, self.ao_terminar = self.ao_cabecalho(CABECALHO.unpack(self.cab))
+            self.ao_cabecalho = None
+            self.destinos.extend(_visoes(mais))
+        if not self.destinos:
+            self.resultado = self.ao_terminar() if self.ao_terminar else None
+            self.pronto = True
+            self.t_fim = time.perf_counter()
+
+
+class _Memoria:
+    # Região de memória compartilhada entre o servidor e um worker da mesma máquina.
+    # A matriz de cada mensagem (faixa, fantasmas, bordas) é escrita aqui em vez de ir pelo
+    # socket, que fica só com o cabeçalho e os extras pequenos (mapa de tiles, hash, tempo).
+    # Pedido e resposta usam a região a partir do começo: o worker só escreve a resposta
+    # depois de ler o pedido, e o servidor só escreve o próximo pedido depois da resposta.
+    # A exceção é o MSG_CARREGAR, que não tem resposta: por isso no modo halo as fantasmas
+    # e as bordas ficam logo depois da faixa, e não em cima dela.
+    # O servidor cria e apaga; o worker só pendura pelo nome.
+
+    def __init__(self, tamanho=0, nome=None):
+        self.dono = nome is None
+        if self.dono:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(tamanho, TAMANHO_FICHA))
+            _CRIADAS.add(self.shm.name)
+        else:
+            self.shm = shared_memory.SharedMemory(name=nome)
+            # Quem apaga é o servidor: sem isso o resource_tracker deste processo apagava
+            # a região (e reclamava de vazamento) quando o worker saísse
+            if os.name == "posix" and self.shm.name not in _CRIADAS:
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.nome = self.shm.name
+        self.tamanho = self.shm.size
+
+    def visao(self, forma, posicao=0):
+        # A matriz no formato da rede, direto em cima da região (sem cópia), a partir do byte 'posicao'
+        return np.ndarray(forma, dtype=np.uint8, buffer=self.shm.buf, offset=posicao)
+
+    def fechar(self):
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # ainda tem uma visão viva por aí; o sistema solta quando o processo sair
+        if self.dono:
+            _CRIADAS.discard(self.shm.name)
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def trocar_concorrente(canais, prazo=None, prazo_total=None):
+    # Escreve e lê de todos os workers ao mesmo tempo (selectors). Assim um worker lento
+    # não segura as respostas dos outros, e quem responde primeiro já é encaixado.
+    # Um canal que dá erro não derruba os outros: fica com 'erro' preenchido e sai da roda.
+    # prazo: segundos sem sinal de vida (morto); prazo_total: segundos para terminar (lento)
+    sel = selectors.DefaultSelector()
+    inicio = time.perf_counter()
+    abertos = set()
+
+    def encerrar(canal, erro=None):
+        if erro is not None:
+            canal.erro = erro
+        sel.unregister(canal.sock)
+        abertos.discard(canal)
+
+    try:
+        for canal in canais:
+            eventos = (0 if canal.pronto else selectors.EVENT_READ) | (selectors.EVENT_WRITE if canal.saida else 0)
+            if not eventos:
+                continue
+            canal.sock.setblocking(False)
+            sel.register(canal.sock, eventos, canal)
+            abertos.add(canal)
+
+        while abertos:
+            espera = None
+            if prazo is not None:
+                espera = max(0.0, min(c.ultimo for c in abertos) + prazo - time.perf_counter())
+            if prazo_total is not None:
+                resta = max(0.0, inicio + prazo_total - time.perf_counter())
+                espera = resta if espera is None else min(espera, resta)
+
+            for chave, eventos in sel.select(espera):
+                canal = chave.data
+                try:
+                    if eventos & selectors.EVENT_WRITE:
+                        canal.escrever()
+                        if not canal.saida and not canal.pronto:
+                            sel.modify(canal.sock, selectors.EVENT_READ, canal)
+                    if eventos & selectors.EVENT_READ and not canal.pronto:
+                        canal.ler()
+                except (OSError, ValueError) as erro:
+                    encerrar(canal, erro)
+                    continue
+                if canal.pronto and not canal.saida:
+                    encerrar(canal)
+
+            # Quem estourou o prazo sai da roda (o socket é fechado por quem chamou)
+            agora = time.perf_counter()
+            for canal in list(abertos):
+                if prazo is not None and agora - canal.ultimo > prazo:
+                    encerrar(canal, TimeoutError(f"sem sinal do worker há {prazo:.1f} s"))
+                elif prazo_total is not None and agora - inicio > prazo_total:
+                    encerrar(canal, TimeoutError(f"worker lento: passou de {prazo_total:.1f} s"))
+    finally:
+        sel.close()
+        for canal in canais:
+            try:
+                canal.sock.setblocking(True)
+            except OSError:
+                pass
+    return canais
+
 
 # --- SERVIDOR ---
 
+def ler_ola(sock, prazo=None):
+    # Primeira mensagem de todo worker: a capacidade dele ({"nucleos", "vazao", "nome"})
+    sock.settimeout(prazo)
+    try:
+        cab = bytearray(CABECALHO.size)
+        if not receber_em(sock, cab):
+            raise ConnectionError("worker fechou a conexão antes de se apresentar")
+        tipo, _, _, _, linhas, colunas, _ = CABECALHO.unpack(cab)
+        if tipo != MSG_OLA:
+            raise ValueError("worker não se apresentou (MSG_OLA)")
+        dados = bytearray(linhas * colunas)
+        if not receber_em(sock, dados):
+            raise ConnectionError("worker fechou a conexão antes de se apresentar")
+        return json.loads(dados.decode())
+    finally:
+        sock.settimeout(None)
+
+def dividir_proporcional(altura, pesos):
+    # Divide as linhas internas em faixas contíguas proporcionais aos pesos (mínimo 1 linha)
+    linhas = max(1, altura - 2)
+    total = float(sum(pesos))
+    brutos = [linhas * p / total for p in pesos]
+    tamanhos = [max(1, int(b)) for b in brutos]
+
+    # Acerto o arredondamento: sobra vai para quem ficou mais "devendo"
+    while sum(tamanhos) < linhas:
+        i = max(range(len(tamanhos)), key=lambda k: brutos[k] - tamanhos[k])
+        tamanhos[i] += 1
+    while sum(tamanhos) > linhas:
+        i = max(range(len(tamanhos)), key=lambda k: tamanhos[k] - brutos[k] if tamanhos[k] > 1 else -1)
+        tamanhos[i] -= 1
+
+    faixas = []
+    ini = 1
+    for tam in tamanhos:
+        faixas.append((ini, ini + tam))
+        ini += tam
+    return faixas
+
+def dividir_blocos_proporcional(largura, altura, pesos, px):
+    # Blocos 2D (ver escolher_particao): os workers vão em linhas de blocos de px em px, na
+    # ordem. A altura de cada linha de blocos é proporcional à soma dos pesos dela, e as
+    # colunas de cada um proporcionais ao peso dele, então os cortes verticais de uma linha
+    # de blocos não precisam bater com os da outra (as fantasmas saem da matriz inteira
+    # mesmo). Devolve as faixas (linhas) e as colunas de cada worker
+    grupos = [pesos[k:k + px] for k in range(0, len(pesos), px)]
+    faixas, colunas = [], []
+    for faixa, grupo in zip(dividir_proporcional(altura, [sum(g) for g in grupos]), grupos):
+        for c in dividir_proporcional(largura, grupo):
+            faixas.append(faixa)
+            colunas.append(c)
+    return faixas, colunas
+
+def _areas(faixas, colunas):
+    return [(fim - ini) * (c1 - c0) for (ini, fim), (c0, c1) in zip(faixas, colunas)]
+
+
 class VidaDistribuida:
-    def __init__(self, largura, altura, prob_viva=0.2):
+    def __init__(self, largura, altura, prob_viva=0.2, tam_tile=None, compactar=False, halo=False,
+                 balancear=False, rebalancear_a_cada=10, janela_ciclos=0, checkpoint=None, fluxo=None,
+                 grade_inicial=None, tipo_nucleo="soma", regra=None, toroidal=False,
+                 prazo=PRAZO, prazo_geracao=None, batimento=BATIMENTO, coletar_a_cada=0, medidor=None,
+                 memoria=True, dividir_2d=True):
         # Seed fixa para garantir que o teste seja igual sempre
         np.random.seed(42)
         self.largura = largura
         self.altura = altura
-        
+
+        # memoria=True: worker na mesma máquina (o identificar_maquina dele bate com o meu)
+        # recebe e devolve as matrizes por memória compartilhada (ver _Memoria). O protocolo
+        # é o mesmo, só a matriz não passa pelo socket; worker remoto nem fica sabendo.
+        # Se a região não abrir do lado de lá, esse worker continua pelo socket.
+        self.memoria = memoria
+        self._maquina = identificar_maquina()
+        self._memorias = []
+        self._mesma_maquina = []
+
+        # Instrumentação (ver instrumentacao.py). Do servidor: montar as mensagens
+        # (serialização), esperar a troca, juntar e ver se estagnou. De cada worker, visto
+        # daqui: envio, espera (cálculo lá + rede) e recebimento da resposta
+        self.medidor = medidor
+
+        # Tolerância a falhas: um worker que fica 'prazo' segundos sem dar sinal (nem
+        # batimento) ou que passa de 'prazo_geracao' numa geração (lento demais) é
+        # descartado, e as linhas dele vão para os outros. Sem halo, a faixa dele na
+        # geração em que caiu é calculada aqui mesmo (a self.grade não mudou). Com halo,
+        # a faixa se perdeu junto com ele: volto para a última matriz inteira que tenho
+        # (a do último coletar, que 'coletar_a_cada' deixa mais recente) e refaço.
+        self.prazo = prazo
+        self.prazo_geracao = prazo_geracao
+        self.batimento = batimento
+        self.coletar_a_cada = coletar_a_cada
+        self.falhas = []
+        self._geracao_grade = 0
+
+        # Recepção (ver abrir_recepcao): entre uma geração e outra entra quem chegou e sai
+        # quem pediu. 'capacidades' é o que cada worker disse no MSG_OLA.
+        self.recepcao = None
+        self.max_workers = None
+        self.capacidades = []
+        self._saindo = set()
+
+        # Modo toroidal (ver sequencial.py): cada worker refaz as colunas fantasma da
+        # sua faixa. As linhas fantasma: sem halo eu refaço aqui na matriz; com halo, o
+        # primeiro worker recebe a última linha do último e vice-versa. Em blocos 2D as
+        # colunas fantasma também são feitas aqui (na matriz ou na moldura)
+        self.toroidal = toroidal
+
+        # Detecção de osciladores, igual ao sequencial. No modo halo o servidor não tem
+        # a matriz, então cada worker manda o hash da sua faixa junto com as bordas
+        self.janela_ciclos = janela_ciclos
+        self.ciclo = None
+        self._hash_halo = 0
+
+        # Cálculo x comunicação: cada worker diz quanto tempo calculou (FLAG_TEMPO). Por
+        # geração somo o cálculo do mais lento (é ele que segura a troca) e o tempo da troca
+        # inteira; comunicação = tempo_troca - tempo_calculo (rede, cópias, fila nos sockets).
+        # O resto do passo (montar as mensagens, juntar) é do próprio servidor.
+        self.tempo_calculo = 0.0
+        self.tempo_troca = 0.0
+
+        # Persistência (ver persistencia.py). No modo halo, nas gerações que o checkpoint
+        # ou o fluxo querem, eu chamo coletar() antes para ter a matriz aqui no servidor
+        self.checkpoint = checkpoint
+        self.fluxo = fluxo
+
+        # halo=True: cada worker fica com a sua faixa e por geração só troca as bordas.
+        # O tráfego cai de O(matriz) para O(largura x workers), mas aí self.grade só
+        # é atualizada quando eu chamo coletar() (o simular já chama no final).
+        if halo and tam_tile:
+            raise ValueError("modo halo não suporta tiles (o servidor não vê a matriz a cada geração)")
+        self.halo = halo
+        self._halo_pronto = False
+
+        # balancear=True: meço quanto cada worker demora por geração e, a cada
+        # 'rebalancear_a_cada' gerações, mudo o tamanho das faixas para ficar proporcional
+        # à velocidade (linhas/segundo) de cada um. No modo halo as linhas migram pelo
+        # servidor (coleta + nova distribuição).
+        self.balancear = balancear
+        self.rebalancear_a_cada = rebalancear_a_cada
+        self._velocidades = []
+
+        # dividir_2d=True: em vez de só faixas, blocos px x py escolhidos pelo formato da
+        # matriz e pelo número de workers (ver escolher_particao e dividir_blocos_proporcional).
+        # Sem halo só com mais workers que linhas (o bloco vai inteiro toda geração, não há
+        # fronteira para economizar); com halo, quando a fronteira cai o bastante.
+        # self.colunas[i] são as colunas do worker i (nas faixas, todas). Sem halo o bloco
+        # vai com a moldura de fantasmas tirada da matriz; com halo, cada worker devolve as
+        # 4 beiradas do bloco, eu encaixo elas na self._moldura (uma matriz do tamanho da
+        # inteira, mas só as beiradas valem) e monto dali as fantasmas de cada um, com os
+        # cantos dos vizinhos da diagonal. Com tiles continua por faixas.
+        self.dividir_2d = dividir_2d
+        self.colunas = []
+        self._moldura = None
+        self._halo_blocos = False
+
+        # Mapa de tiles: o servidor decide quais tiles cada worker precisa calcular
+        self.tam_tile = tam_tile
+        if tam_tile:
+            self.ativos = criar_mapa_tiles(altura, largura, tam_tile)
+            self.alterados = np.zeros_like(self.ativos)
+            self.volta = volta_tiles(altura, largura, tam_tile) if toroidal else None
+
+        # Qual núcleo e qual regra B/S os workers usam (vão junto na configuração).
+        # O servidor também tem um, para as faixas de quem caiu
+        self.tipo_nucleo = tipo_nucleo
+        self.regra = ler_regra(regra)
+        self.nucleo = criar_nucleo(tipo_nucleo, self.regra)
+
+        # compactar=True manda as faixas com 8 células por byte (menos rede, mais CPU)
+        self.formato = FORMATO_BITS if compactar else FORMATO_BRUTO
+
         # Cria matriz aleatória (0=morto, 1=vivo)
-        self.grade = np.random.choice([0, 1], size=(altura, largura), p=[1 - prob_viva, prob_viva])
-        
+        # Uso uint8 porque é exatamente o que vai pela rede (1 byte por célula)
+        # Se vier uma grade_inicial (ex: um padrão do padroes.py), uso ela
+        self.grade = criar_grade(largura, altura, prob_viva, grade_inicial)
+
         # Zera as bordas para facilitar o cálculo
         self._zerar_bordas()
-        
+
         # Crio uma cópia para escrever o próximo estado
         self.nova_grade = np.zeros_like(self.grade)
 
         self.workers = []
         self.faixas = []
+        self.geracao = 0
+
+        # Buffers reaproveitados toda geração (resposta compactada, ou de um bloco 2D, de cada worker)
+        self._buffers_bits = []
+
+        # Modo halo: bordas que cada worker mandou na última geração (2 linhas por worker),
+        # no formato da rede. O servidor só repassa esses bytes, nem desempacota.
+        self._bytes_linha = tamanho_conteudo(self.formato, 1, largura)
+        self._bordas = []
+        self._linha_vazia = np.zeros(self._bytes_linha, dtype=np.uint8)
 
     def _zerar_bordas(self):
+        if self.toroidal:
+            atualizar_fantasmas(self.grade)
+            return
         self.grade[0, :] = 0
         self.grade[-1, :] = 0
         self.grade[:, 0] = 0
         self.grade[:, -1] = 0
 
-    def add_worker(self, sock, ini, fim):
+    def _config(self):
+        # O que o worker precisa saber que não muda de uma geração para outra
+        return {"altura": self.altura, "largura": self.largura, "tam_tile": self.tam_tile or 0,
+                "nucleo": self.tipo_nucleo, "regra": self.regra.texto, "toroidal": self.toroidal,
+                "batimento": self.batimento}
+
+    def add_worker(self, sock, ini=None, fim=None, capacidade=None):
+        # Lê o MSG_OLA (se ainda não foi lido) e manda a configuração. Sem ini/fim, as linhas
+        # de todos são divididas de novo, proporcionais à velocidade de cada um
+        if capacidade is None:
+            capacidade = ler_ola(sock, self.prazo)
+        if ini is None:
+            # No modo halo as faixas estão nos workers: trago antes de mexer
+            self.coletar()
         self.workers.append(sock)
-        self.faixas.append((ini, fim))
+        self.capacidades.append(capacidade)
+        self._buffers_bits.append(None)
+        # A região só é criada na primeira troca, quando já sei o tamanho da faixa
+        self._memorias.append(None)
+        self._mesma_maquina.append(self.memoria and capacidade.get("maquina") == self._maquina)
+        # Até medir de verdade (balancear), a velocidade é a que ele informou, em células/s
+        self._velocidades.append(capacidade["vazao"])
+
+        dados = json.dumps(self._config()).encode()
+        enviar_quadro(sock, CABECALHO.pack(MSG_CONFIG, FORMATO_JSON, 0, 0, len(dados), 1, 0), dados)
+        self.colunas.append((1, self.largura - 1))
+        if ini is None:
+            self.faixas.append(None)
+            self._redividir()
+        else:
+            self.faixas.append((ini, fim))
+
+    def _preparar_memoria(self, i, tamanho):
+        # Região do worker i com espaço para 'tamanho' bytes (None = socket). Se for
+        # preciso uma maior, crio outra e mando o nome (MSG_MEMORIA) antes da troca
+        if not self._mesma_maquina[i]:
+            return None
+        memoria = self._memorias[i]
+        if memoria is not None and memoria.tamanho >= tamanho:
+            return memoria
+        if memoria is not None:
+            memoria.fechar()
+            self._memorias[i] = None
+
+        sock = self.workers[i]
+        memoria = None
+        try:
+            memoria = _Memoria(int(tamanho * FOLGA_MEMORIA))
+            ficha = os.urandom(TAMANHO_FICHA)
+            memoria.visao((TAMANHO_FICHA,))[:] = np.frombuffer(ficha, dtype=np.uint8)
+            dados = json.dumps({"nome": memoria.nome, "ficha": ficha.hex()}).encode()
+            enviar_quadro(sock, CABECALHO.pack(MSG_MEMORIA, FORMATO_JSON, 0, 0, len(dados), 1, 0), dados)
+            abriu = self._ler_resposta_memoria(sock)
+        except (OSError, ValueError):
+            # Se foi o worker que caiu, a próxima troca descobre e faz o de sempre
+            abriu = False
+        if not abriu:
+            if memoria is not None:
+                memoria.fechar()
+            self._mesma_maquina[i] = False
+            return None
+        self._memorias[i] = memoria
+        return memoria
+
+    def _ler_resposta_memoria(self, sock):
+        # Resposta do MSG_MEMORIA; no meio podem vir batimentos (e um pedido de saída)
+        sock.settimeout(self.prazo)
+        try:
+            cab = bytearray(CABECALHO.size)
+            while True:
+                if not receber_em(sock, cab):
+                    raise ConnectionError("worker fechou a conexão")
+                tipo, _, _, _, linhas, _, _ = CABECALHO.unpack(cab)
+                if tipo == MSG_TCHAU:
+                    self._saindo.add(sock)
+                elif tipo != MSG_VIVO:
+                    if tipo != MSG_MEMORIA:
+                        raise ValueError(f"resposta inesperada ao MSG_MEMORIA (tipo {tipo})")
+                    return linhas == 1
+        finally:
+            sock.settimeout(None)
+
+    def _dividir(self, pesos):
+        # Faixas e colunas de cada worker, proporcionais aos pesos. Com dividir_2d (e sem
+        # tiles, que o worker só faz em faixas) o px x py sai do formato da matriz
+        px = 1
+        if self.dividir_2d and not self.tam_tile:
+            px = escolher_particao(self.largura, self.altura, len(pesos), troca=self.halo)[0]
+        if px > 1:
+            return dividir_blocos_proporcional(self.largura, self.altura, pesos, px)
+        return dividir_proporcional(self.altura, pesos), [(1, self.largura - 1)] * len(pesos)
+
+    def maximo_workers(self):
+        # Uma linha para cada worker; em blocos 2D, uma linha ou uma coluna
+        if self.dividir_2d and not self.tam_tile:
+            return max(1, self.altura - 2, self.largura - 2)
+        return max(1, self.altura - 2)
+
+    def _em_blocos(self):
+        # Algum worker com só parte das colunas?
+        return any(c0 > 1 or c1 < self.largura - 1 for c0, c1 in self.colunas)
+
+    def _redividir(self):
+        # Células proporcionais à velocidade de cada worker (medida ou informada no MSG_OLA)
+        if self.workers:
+            self.faixas, self.colunas = self._dividir([v or 1.0 for v in self._velocidades])
+        # No modo halo as faixas mudaram de dono: espalho de novo
+        self._halo_pronto = False
+
+    def _faixa_ativa(self, ini, fim):
+        # A faixa só precisa ir pro worker se tiver algum tile ativo nas linhas dela
+        if not self.tam_tile:
+            return True
+        return bool(self.ativos[ini // self.tam_tile:(fim - 1) // self.tam_tile + 1].any())
+
+    def _partes_faixa(self, ini, fim, memoria=None, colunas=None):
+        # Pega linhas + sobra para calcular vizinhos (as linhas da matriz são contíguas,
+        # então no formato bruto a fatia vai direto da memória pro socket, sem cópia).
+        # Num bloco 2D vão só as colunas dele + 1 de cada lado (aí a fatia é copiada)
+        c0, c1 = colunas or (1, self.largura - 1)
+        i_envio = ini - 1
+        f_envio = fim + 1
+        fatia = self.grade[i_envio:f_envio, c0 - 1:c1 + 1]
+        if self.formato == FORMATO_BITS:
+            fatia = np.packbits(fatia, axis=1)
+
+        flags = FLAG_TEMPO
+        if c0 > 1 or c1 < self.largura - 1:
+            flags |= FLAG_BLOCO
+        if memoria is not None:
+            # Mesma máquina: a fatia vai pela memória compartilhada, o socket só leva o resto
+            np.copyto(memoria.visao(fatia.shape), fatia)
+            partes = []
+            flags |= FLAG_MEMORIA
+        else:
+            partes = [np.ascontiguousarray(fatia)]
+        if self.tam_tile:
+            flags |= FLAG_TILES
+            partes.append(self.ativos)
+
+        cab = CABECALHO.pack(MSG_FAIXA, self.formato, flags, self.geracao, f_envio - i_envio, c1 - c0 + 2, i_envio)
+        return [cab] + partes
+
+    def _destinos_faixa(self, i, ini, fim, destino, destino_tempo=None, colunas=None):
+        # Monta o "ao_cabecalho" de uma resposta MSG_FAIXA que vai para destino[ini:fim]
+        # (e, se o worker mandou, o tempo de cálculo dele para destino_tempo). Num bloco
+        # 2D só entram as colunas dele: as fantasmas que voltam junto ficam de fora
+        c0, c1 = colunas or (1, self.largura - 1)
+        bloco = c0 > 1 or c1 < self.largura - 1
+
+        def ao_cabecalho(cabecalho):
+            tipo, formato, flags, geracao, linhas, colunas, _ = cabecalho
+            if tipo != MSG_FAIXA or geracao != self.geracao or linhas != fim - ini or colunas != c1 - c0 + 2:
+                raise ValueError(f"resposta inesperada do worker {i}")
+
+            # Formato bruto: recebo direto nas linhas da matriz
+            buf = None
+            if flags & FLAG_MEMORIA:
+                # A matriz já está na memória compartilhada: pelo socket só vêm os extras
+                memoria = self._memorias[i]
+                if memoria is None:
+                    raise ValueError(f"worker {i} respondeu pela memória compartilhada sem ter uma")
+                buf = memoria.visao(forma_rede(formato, linhas, colunas))
+                destinos = []
+            elif formato == FORMATO_BITS or bloco:
+                forma = forma_rede(formato, linhas, colunas)
+                buf = self._buffers_bits[i]
+                if buf is None or buf.shape != forma:
+                    buf = self._buffers_bits[i] = np.empty(forma, dtype=np.uint8)
+                destinos = [buf]
+            else:
+                destinos = [destino[ini:fim]]
+
+            alterados = None
+            if flags & FLAG_TILES:
+                alterados = np.empty_like(self.alterados)
+                destinos.append(alterados)
+            if flags & FLAG_TEMPO:
+                destinos.append(destino_tempo if destino_tempo is not None else np.empty(1, dtype="<f8"))
+
+            def ao_terminar():
+                if buf is not None:
+                    recebidas = np.unpackbits(buf, axis=1, count=colunas) if formato == FORMATO_BITS else buf
+                    if bloco:
+                        np.copyto(destino[ini:fim, c0:c1], recebidas[:, 1:-1])
+                    else:
+                        np.copyto(destino[ini:fim], recebidas)
+                if alterados is not None:
+                    self.alterados |= alterados
+                return bool(flags & FLAG_MUDOU)
+
+            return destinos, ao_terminar
+        return ao_cabecalho
 
-    # Função auxiliar para receber bytes até completar o tamanho N
-    def _recvall(self, sock, n):
-        dados = b''
-        while len(dados) < n:
-            pedaco = sock.recv(n - len(dados))
-            if not pedaco: return None
-            dados += pedaco
-        return dados
+    def _linhas_rede(self, linhas):
+        # Converte linhas da matriz para o formato que vai na rede (contíguas, para o socket)
+        if self.formato == FORMATO_BITS:
+            return np.packbits(linhas, axis=1)
+        return np.ascontiguousarray(linhas)
+
+    def _espalhar(self):
+        # Manda cada faixa (com as fantasmas) uma vez só; dali pra frente ela mora no worker
+        self._bordas = []
+        self._halo_blocos = self._em_blocos()
+        if self._halo_blocos:
+            # Beiradas iniciais de todo mundo (e a moldura da matriz) saem da própria matriz
+            if self._moldura is None:
+                self._moldura = np.empty_like(self.grade)
+            np.copyto(self._moldura, self.grade)
+        for i, (sock, (ini, fim), (c0, c1)) in enumerate(zip(self.workers, self.faixas, self.colunas)):
+            fatia = self._linhas_rede(self.grade[ini - 1:fim + 1, c0 - 1:c1 + 1])
+            # A região do worker precisa caber a faixa inteira (o coletar volta por ela) e,
+            # depois dela, as fantasmas/bordas (ver _Memoria)
+            h, w = fim - ini, c1 - c0
+            if self._halo_blocos:
+                fantasmas = tamanho_conteudo(self.formato, 1, 2 * (w + 2) + 2 * h)
+            else:
+                fantasmas = tamanho_conteudo(self.formato, 2, w + 2)
+            memoria = self._preparar_memoria(i, self._posicao_bordas(i) + fantasmas)
+            flags, partes = 0, [fatia]
+            if memoria is not None:
+                np.copyto(memoria.visao(fatia.shape), fatia)
+                flags, partes = FLAG_MEMORIA, []
+            if self._halo_blocos:
+                flags |= FLAG_BLOCO
+                partes.insert(0, np.array([c0 - 1], dtype="<u4"))
+            cab = CABECALHO.pack(MSG_CARREGAR, self.formato, flags, self.geracao, h + 2, w + 2, ini - 1)
+            enviar_quadro(sock, cab, *partes)
+
+            if self._halo_blocos:
+                # Aqui fica só o buffer onde as beiradas chegam (as iniciais já estão na moldura)
+                self._bordas.append(np.empty(forma_rede(self.formato, 1, 2 * (w + h)), dtype=np.uint8))
+                continue
+            # Bordas iniciais saem da própria matriz
+            bordas = np.empty((2, self._bytes_linha), dtype=np.uint8)
+            bordas[:] = self._linhas_rede(self.grade[[ini, fim - 1], :])
+            self._bordas.append(bordas)
+        self._halo_pronto = True
+
+    def _moldura_bloco(self, i):
+        # Fantasmas do bloco i numa linha só: a linha de cima e a de baixo (com os cantos,
+        # que são dos vizinhos da diagonal), depois a coluna da esquerda e a da direita
+        (ini, fim), (c0, c1) = self.faixas[i], self.colunas[i]
+        m = self._moldura
+        return np.concatenate([m[ini - 1, c0 - 1:c1 + 1], m[fim, c0 - 1:c1 + 1], m[ini:fim, c0 - 1], m[ini:fim, c1]])
+
+    def _juntar_bordas(self, novas, parciais):
+        # Blocos 2D: as beiradas de cada worker (linha de cima, de baixo, coluna da esquerda
+        # e da direita do bloco) vão para o lugar delas na moldura. O hash sai das somas
+        # por linha que cada um mandou (ver somas_linhas), mais as colunas fantasma
+        m = self._moldura
+        somas = np.zeros(self.altura, dtype=np.uint64) if self.janela_ciclos else None
+        for i, ((ini, fim), (c0, c1)) in enumerate(zip(self.faixas, self.colunas)):
+            h, w = fim - ini, c1 - c0
+            bordas = novas[i]
+            if self.formato == FORMATO_BITS:
+                bordas = np.unpackbits(bordas, axis=1, count=2 * (w + h))
+            bordas = bordas[0]
+            m[ini, c0:c1] = bordas[:w]
+            m[fim - 1, c0:c1] = bordas[w:2 * w]
+            m[ini:fim, c0] = bordas[2 * w:2 * w + h]
+            m[ini:fim, c1 - 1] = bordas[2 * w + h:]
+            if somas is not None:
+                somas[ini:fim] += parciais[i]
+        if self.toroidal:
+            atualizar_fantasmas(m)
+        if somas is not None:
+            if self.toroidal:
+                somas[1:-1] += somas_linhas(m[1:-1, :1], 0, self.largura)
+                somas[1:-1] += somas_linhas(m[1:-1, -1:], self.largura - 1, self.largura)
+            self._hash_halo = int(misturar_linhas(somas[1:-1], 1))
+
+    def _atualizar_halo(self):
+        if not self._halo_pronto:
+            self._espalhar()
+
+        # 1. Cada worker recebe a última linha do vizinho de cima e a primeira do de baixo.
+        # As bordas novas chegam num buffer separado, porque as antigas ainda estão sendo enviadas.
+        medidor = self.medidor
+        if medidor is not None: t = time.perf_counter()
+        n = len(self.workers)
+        novas = [np.empty_like(b) for b in self._bordas]
+        # Hash: um por faixa, ou nos blocos 2D a soma de cada linha do bloco (ver _juntar_bordas)
+        hashes = [np.zeros(fim - ini if self._halo_blocos else 1, dtype="<u8") for ini, fim in self.faixas]
+        calculos = np.zeros(n, dtype="<f8")
+        canais = []
+        for i, sock in enumerate(self.workers):
+            flags = FLAG_TEMPO | (FLAG_HASH if self.janela_ciclos else 0)
+            if self._halo_blocos:
+                # A moldura inteira do bloco, numa linha só (os cantos vêm junto)
+                (ini, fim), (c0, c1) = self.faixas[i], self.colunas[i]
+                moldura = self._linhas_rede(self._moldura_bloco(i)[np.newaxis])
+                partes, forma = [moldura], (1, 2 * (c1 - c0 + 2) + 2 * (fim - ini))
+            else:
+                # No toroidal, o primeiro e o último são vizinhos (índice -1 e n % n dão a volta)
+                if self.toroidal:
+                    topo = self._bordas[i - 1][1]
+                    baixo = self._bordas[(i + 1) % n][0]
+                else:
+                    topo = self._bordas[i - 1][1] if i > 0 else self._linha_vazia
+                    baixo = self._bordas[i + 1][0] if i < n - 1 else self._linha_vazia
+                partes, forma = [topo, baixo], (2, self.largura)
+            memoria = self._memorias[i]
+            if memoria is not None:
+                # As fantasmas vão pela memória compartilhada, logo depois da faixa
+                # (as bordas voltam no mesmo lugar)
+                fantasmas = memoria.visao(forma_rede(self.formato, *forma), self._posicao_bordas(i))
+                if self._halo_blocos:
+                    np.copyto(fantasmas, moldura)
+                else:
+                    fantasmas[0] = topo
+                    fantasmas[1] = baixo
+                flags |= FLAG_MEMORIA
+                partes = []
+            cab = CABECALHO.pack(MSG_PASSO, self.formato, flags, self.geracao, *forma, 0)
+            canais.append(_Canal(sock, [cab] + partes,
+                                 self._destinos_bordas(i, novas[i], hashes[i], calculos[i:i + 1]), id=i))
+
+        # 2. Recebe as bordas novas de todo mundo ao mesmo tempo
+        t0 = time.perf_counter()
+        if medidor is not None: medidor.registrar("serializacao", t0 - t)
+        falhos = self._trocar(canais, self.prazo_geracao, calculos)
+        if falhos:
+            # A faixa de quem caiu se perdeu com ele, e os outros já andaram uma geração
+            self._descartar([(c.id, c.erro) for c in falhos])
+            return self._refazer_ate(self.geracao + 1)
+        self._medir(canais, t0)
+
+        if medidor is not None: t = time.perf_counter()
+        mudou = any(c.resultado for c in canais)
+        if medidor is not None: t = medidor.desde("estagnacao", t)
+        if self._halo_blocos:
+            self._juntar_bordas(novas, hashes)
+        else:
+            self._bordas = novas
+            # O hash da matriz é a soma dos hashes das faixas (ver hash_linhas)
+            self._hash_halo = sum(int(h[0]) for h in hashes) % 2**64
+        self.geracao += 1
+        if medidor is not None: medidor.desde("juncao", t)
+        return mudou
+
+    def _destinos_bordas(self, i, destino, destino_hash, destino_tempo):
+        def ao_cabecalho(cabecalho):
+            tipo, _, flags, geracao, _, _, _ = cabecalho
+            if tipo != MSG_BORDAS or geracao != self.geracao:
+                raise ValueError(f"resposta inesperada do worker {i}")
+            memoria = self._memorias[i] if flags & FLAG_MEMORIA else None
+            if flags & FLAG_MEMORIA and memoria is None:
+                raise ValueError(f"worker {i} respondeu pela memória compartilhada sem ter uma")
+            destinos = [] if memoria is not None else [destino]
+            if flags & FLAG_HASH:
+                destinos.append(destino_hash)
+            if flags & FLAG_TEMPO:
+                destinos.append(destino_tempo)
+
+            def ao_terminar():
+                if memoria is not None:
+                    np.copyto(destino, memoria.visao(destino.shape, self._posicao_bordas(i)))
+                return bool(flags & FLAG_MUDOU)
+            return destinos, ao_terminar
+        return ao_cabecalho
+
+    def _posicao_bordas(self, i):
+        # Modo halo: onde ficam as fantasmas/bordas na região do worker i (logo depois da faixa)
+        (ini, fim), (c0, c1) = self.faixas[i], self.colunas[i]
+        return tamanho_conteudo(self.formato, fim - ini + 2, c1 - c0 + 2)
+
+    def _hash_atual(self):
+        if self.halo and self._halo_pronto:
+            return self._hash_halo
+        return hash_grade(self.grade)
+
+    def coletar(self):
+        # Traz as faixas de volta para self.grade (só no modo halo precisa)
+        while self._halo_pronto:
+            canais = []
+            for i, (sock, (ini, fim)) in enumerate(zip(self.workers, self.faixas)):
+                # Quem tem memória compartilhada devolve a faixa por ela (já cabe: veio por ela)
+                flags = FLAG_MEMORIA if self._memorias[i] is not None else 0
+                cab = CABECALHO.pack(MSG_COLETAR, self.formato, flags, self.geracao, 0, self.largura, 0)
+                canais.append(_Canal(sock, [cab], self._destinos_faixa(i, ini, fim, self.nova_grade,
+                                                                       colunas=self.colunas[i]), id=i))
+            falhos = self._trocar(canais)
+            if not falhos:
+                self.grade, self.nova_grade = self.nova_grade, self.grade
+                self._zerar_bordas()
+                self._geracao_grade = self.geracao
+                break
+            # Perdi a faixa de alguém: refaço até aqui com quem sobrou e peço de novo
+            self._descartar([(c.id, c.erro) for c in falhos])
+            self._refazer_ate(self.geracao)
+        return True
+
+    def carregar_checkpoint(self, caminho):
+        restaurar(self, caminho)
+        self._geracao_grade = self.geracao
+        # No modo halo as faixas dos workers ficaram velhas: espalho de novo na próxima geração
+        self._halo_pronto = False
+
+    def _trocar(self, canais, prazo_total=None, calculos=None):
+        # trocar_concorrente com os prazos; anota quem pediu para sair e devolve quem falhou.
+        # calculos[id] = tempo de cálculo que cada worker mandou (FLAG_TEMPO), se pedi
+        t0 = time.perf_counter()
+        trocar_concorrente(canais, self.prazo, prazo_total)
+        self.tempo_troca += time.perf_counter() - t0
+        if calculos is not None:
+            self.tempo_calculo += max((float(calculos[c.id]) for c in canais if c.erro is None), default=0.0)
+        self._saindo.update(self.workers[c.id] for c in canais if c.tchau)
+        if self.medidor is not None:
+            self._registrar_troca(canais, t0, calculos)
+        return [c for c in canais if c.erro is not None]
+
+    def _registrar_troca(self, canais, t0, calculos=None):
+        medidor = self.medidor
+        medidor.registrar("espera", time.perf_counter() - t0)
+        for c in canais:
+            if c.erro is not None or c.t_fim is None:
+                continue
+            origem = f"worker {c.id}"
+            # Sem t_envio/t_cab (mensagem saiu inteira antes do select), conto a partir de t0
+            envio = c.t_envio or t0
+            cab = c.t_cab or envio
+            medidor.registrar("envio", envio - t0, origem)
+            if calculos is not None:
+                # Da espera, o que o worker disse que calculou é cálculo; o resto é rede/fila
+                calculo = float(calculos[c.id])
+                medidor.registrar("calculo", calculo, origem)
+                medidor.registrar("espera", max(0.0, cab - envio - calculo), origem)
+            else:
+                medidor.registrar("espera", cab - envio, origem)
+            medidor.registrar("recebimento", c.t_fim - cab, origem)
+
+    # --- Entrada e saída de workers ---
+
+    def _remover(self, i):
+        try: self.workers[i].close()
+        except OSError: pass
+        if self._memorias[i] is not None:
+            self._memorias[i].fechar()
+        self._saindo.discard(self.workers[i])
+        for lista in (self.workers, self.faixas, self.colunas, self.capacidades, self._buffers_bits,
+                      self._velocidades, self._memorias, self._mesma_maquina):
+            del lista[i]
+
+    def fechar(self):
+        # Fecha as conexões (os workers voltam a tentar conectar) e apaga as memórias compartilhadas
+        for sock in self.workers:
+            try: sock.close()
+            except OSError: pass
+        for memoria in self._memorias:
+            if memoria is not None:
+                memoria.fechar()
+        self._memorias = [None] * len(self.workers)
+
+    def _descartar(self, perdidos):
+        # Tira quem caiu (ou estourou o prazo) e divide as linhas entre quem sobrou.
+        # perdidos: [(índice do worker, motivo)]
+        for i, motivo in sorted(perdidos, key=lambda p: p[0], reverse=True):
+            ini, fim = self.faixas[i]
+            c0, c1 = self.colunas[i]
+            onde = f"linhas {ini}-{fim}" + (f", colunas {c0}-{c1}" if c0 > 1 or c1 < self.largura - 1 else "")
+            print(f"  Worker {i} ({onde}) perdido na geração {self.geracao}: {motivo}")
+            self.falhas.append((self.geracao, i, str(motivo)))
+            self._remover(i)
+        self._redividir()
+
+    def abrir_recepcao(self, ouvinte, max_workers=None):
+        # A partir daqui, entre uma geração e outra, aceito quem se conectar em 'ouvinte'
+        # (até max_workers no total) e tiro quem pediu para sair
+        ouvinte.setblocking(False)
+        self.recepcao = ouvinte
+        self.max_workers = max_workers
+
+    def _ler_parado(self, sock):
+        # O que um worker parado (entre gerações) mandou: batimentos atrasados, MSG_TCHAU
+        # ou o fim da conexão. Devolve (pediu para sair, motivo de falha ou None)
+        cab = bytearray(CABECALHO.size)
+        tchau = False
+        try:
+            sock.setblocking(False)
+            while True:
+                try:
+                    n = sock.recv_into(cab, CABECALHO.size, socket.MSG_PEEK)
+                except BlockingIOError:
+                    return tchau, None
+                if n == 0:
+                    return tchau, "conexão fechada"
+                if n < CABECALHO.size:
+                    return tchau, None  # o resto chega depois
+                tipo = CABECALHO.unpack(cab)[0]
+                if tipo not in (MSG_VIVO, MSG_TCHAU):
+                    return tchau, f"mensagem fora de hora (tipo {tipo})"
+                sock.recv_into(cab, CABECALHO.size)
+                tchau |= tipo == MSG_TCHAU
+        except OSError as erro:
+            return tchau, erro
+        finally:
+            try: sock.setblocking(True)
+            except OSError: pass
+
+    def _aceitar_novos(self, atuais):
+        # Quem está esperando na fila do ouvinte, até completar max_workers (e no máximo
+        # um worker por linha, ver maximo_workers)
+        limite = self.maximo_workers()
+        if self.max_workers is not None:
+            limite = min(limite, self.max_workers)
+        novos = []
+        while atuais + len(novos) < limite:
+            try:
+                conn, _ = self.recepcao.accept()
+            except (BlockingIOError, InterruptedError):
+                break
+            conn.setblocking(True)
+            try:
+                preparar_conexao(conn)
+                novos.append((conn, ler_ola(conn, self.prazo)))
+            except (OSError, ValueError):
+                conn.close()
+        return novos
+
+    def _portaria(self):
+        # Entre duas gerações: quem caiu, quem pediu para sair e quem chegou
+        mortos, saindo = [], []
+        for i, sock in enumerate(self.workers):
+            tchau, erro = self._ler_parado(sock)
+            if erro is not None:
+                mortos.append((i, erro))
+            elif tchau or sock in self._saindo:
+                saindo.append(sock)
+        novos = self._aceitar_novos(len(self.workers) - len(mortos) - len(saindo))
+
+        if mortos:
+            self._descartar(mortos)
+            if self.halo:
+                # A faixa de quem caiu parado também se perdeu: volto e refaço até aqui
+                self._refazer_ate(self.geracao)
+        if not saindo and not novos:
+            return
+
+        # No modo halo trago as faixas antes (quem está saindo ainda devolve a sua)
+        self.coletar()
+        for sock in saindo:
+            if sock in self.workers:
+                print(f"  Worker {self.workers.index(sock)} saiu na geração {self.geracao}")
+                self._remover(self.workers.index(sock))
+        for conn, capacidade in novos:
+            print(f"  Worker {capacidade.get('nome', '?')} entrou na geração {self.geracao} "
+                  f"({capacidade['nucleos']} núcleos, {capacidade['vazao'] / 1e6:.0f} Mcélulas/s)")
+            self.add_worker(conn, capacidade=capacidade)
+        self._redividir()
+
+    def _calcular_local(self, ini, fim, colunas=None):
+        # Calcula as linhas [ini, fim) aqui no servidor, igual o worker faria
+        c0, c1 = colunas or (1, self.largura - 1)
+        if c0 > 1 or c1 < self.largura - 1:
+            # Bloco 2D: as colunas fantasma o _atualizar_faixas refaz no final
+            return bool(self.nucleo.calcular_bloco(self.grade, self.nova_grade, ini, fim, c0, c1).any())
+        if self.tam_tile:
+            np.copyto(self.nova_grade[ini:fim], self.grade[ini:fim])
+            atualizar_faixa_tiles(self.grade, self.nova_grade, ini, fim, self.ativos, self.alterados,
+                                  self.tam_tile, nucleo=self.nucleo)
+            mudou = False  # com tiles quem diz se mudou é o self.alterados
+        else:
+            mudou = self.nucleo.atualizar(self.grade, self.nova_grade, ini, fim)
+        if self.toroidal:
+            atualizar_colunas_fantasmas(self.nova_grade, ini, fim)
+        return mudou
+
+    def _refazer_ate(self, alvo):
+        # Modo halo: volta para self.grade (a matriz inteira da geração _geracao_grade)
+        # e anda de novo até 'alvo' com os workers que sobraram (ou sozinho, se não sobrou
+        # nenhum). Se cair mais alguém no meio, a chamada de dentro volta de novo.
+        print(f"  Refazendo da geração {self._geracao_grade} até a {alvo}")
+        self.geracao = self._geracao_grade
+        self._halo_pronto = False
+        mudou = True
+        while self.geracao < alvo:
+            mudou = self._atualizar_halo() if self.workers else self._atualizar_faixas()
+        return mudou
+
+    def _medir(self, canais, t0):
+        if not self.balancear:
+            return
+        # Velocidade de cada worker (células por segundo), com média móvel para não oscilar
+        for c in canais:
+            (ini, fim), (c0, c1) = self.faixas[c.id], self.colunas[c.id]
+            vel = (fim - ini) * (c1 - c0) / max(c.t_fim - t0, 1e-9)
+            antiga = self._velocidades[c.id]
+            self._velocidades[c.id] = vel if antiga is None else 0.5 * antiga + 0.5 * vel
+
+    def _rebalancear(self):
+        if None in self._velocidades:
+            return
+        # Tamanho (em células) de cada parte, para valer igual para faixas e blocos 2D
+        antigas = _areas(self.faixas, self.colunas)
+        alvo = _areas(*self._dividir(self._velocidades))
+
+        # Ando só metade do caminho até o alvo e não deixo faixa ficar menor que 1/4 da
+        # divisão igual. Parte do tempo de cada worker é fixo (rede), então sem isso quem
+        # ganha uma faixa pequena parece "lento" e vai perdendo linhas até sobrar uma.
+        minimo = sum(antigas) / len(antigas) / 4
+        pesos = [max(minimo, 0.5 * a + 0.5 * t) for a, t in zip(antigas, alvo)]
+        novas = self._dividir(pesos)
+
+        # Só mexo se alguma faixa mudar mais de 10% (migrar linhas também custa)
+        if all(abs(n - a) <= 0.1 * a for n, a in zip(_areas(*novas), antigas)):
+            return
+
+        if self.halo:
+            # As linhas estão nos workers: trago tudo e distribuo de novo com as faixas novas
+            if not self.coletar(): return
+            self._halo_pronto = False
+        self.faixas, self.colunas = novas
 
     def atualizar(self):
-        if not self.workers: return False
-
-        # 1. Manda pedaços para os workers
-        for sock, (ini, fim) in zip(self.workers, self.faixas):
-            # Pega linhas + sobra para calcular vizinhos
-            i_envio = max(0, ini - 1)
-            f_envio = min(self.altura, fim + 1)
-
-            fatia = self.grade[i_envio:f_envio, :].copy()
-            
-            # Serializa a matriz
-            dados = pickle.dumps(fatia, protocol=pickle.HIGHEST_PROTOCOL)
-            
-            # Manda tamanho (4 bytes) + dados
-            sock.sendall(struct.pack("!I", len(dados)))
-            sock.sendall(dados)
-
-        # 2. Recebe respostas
-        for sock, (ini, fim) in zip(self.workers, self.faixas):
-            # Lê tamanho
-            cabecalho = self._recvall(sock, 4)
-            if not cabecalho: return False
-            (tam,) = struct.unpack("!I", cabecalho)
-
-            # Lê dados
-            dados = self._recvall(sock, tam)
-            if not dados: return False
-
-            fatia_volta = pickle.loads(dados)
-
-            # Encaixa de volta na matriz principal
-            i_envio = max(0, ini - 1)
-            offset = ini - i_envio
-            linhas = fim - ini
-
-            self.nova_grade[ini:fim, 1:-1] = fatia_volta[offset:offset+linhas, 1:-1]
-
-        # Garante bordas zeradas na nova também
-        self._zerar_bordas()
-        mudou = not np.array_equal(self.nova_grade, self.grade)
+        if self.recepcao is not None:
+            self._portaria()
+        # Sem nenhum worker (todos caíram), o servidor segue sozinho pelo caminho sem halo
+        mudou = self._atualizar_halo() if self.halo and self.workers else self._atualizar_faixas()
+
+        # Entre uma geração e outra (todo mundo parado na "barreira") posso mexer nas faixas
+        if mudou and self.balancear and self.geracao % self.rebalancear_a_cada == 0:
+            self._rebalancear()
+        return mudou
+
+    def _atualizar_faixas(self):
+        medidor = self.medidor
+        if medidor is not None: t = time.perf_counter()
+        if self.tam_tile:
+            self.alterados[:] = False
+        sozinho = not self.workers
+        canais = []
+
+        calculos = np.zeros(len(self.workers), dtype="<f8")
+
+        # 1. Monta o pedaço de cada worker
+        for i, (sock, (ini, fim), (c0, c1)) in enumerate(zip(self.workers, self.faixas, self.colunas)):
+            # Faixa parada: a nova_grade já tem o mesmo conteúdo, nem mando
+            if not self._faixa_ativa(ini, fim):
+                continue
+            memoria = self._preparar_memoria(i, tamanho_conteudo(self.formato, fim - ini + 2, c1 - c0 + 2))
+            canais.append(_Canal(sock, self._partes_faixa(ini, fim, memoria, (c0, c1)),
+                                 self._destinos_faixa(i, ini, fim, self.nova_grade, calculos[i:i + 1], (c0, c1)), id=i))
+
+        # 2. Manda e recebe de todos ao mesmo tempo; cada faixa é encaixada na
+        # nova_grade assim que chega (cada worker já diz se a faixa dele mudou)
+        t0 = time.perf_counter()
+        if medidor is not None: medidor.registrar("serializacao", t0 - t)
+        falhos = self._trocar(canais, self.prazo_geracao, calculos)
+        ok = [c for c in canais if c.erro is None]
+        self._medir(ok, t0)
+
+        # Quem caiu: a self.grade não mudou, então calculo a faixa dele aqui mesmo
+        if medidor is not None: t = time.perf_counter()
+        mudou = False
+        blocos = self._em_blocos()
+        for c in falhos:
+            mudou |= self._calcular_local(*self.faixas[c.id], self.colunas[c.id])
+        if falhos:
+            self._descartar([(c.id, c.erro) for c in falhos])
+        if sozinho:
+            mudou = self._calcular_local(1, self.altura - 1)
+        if medidor is not None and (falhos or sozinho): t = medidor.desde("calculo", t)
+
+        mudou = any(c.resultado for c in ok) or mudou
+        if self.tam_tile:
+            mudou = bool(self.alterados.any())
+        if medidor is not None: t = medidor.desde("estagnacao", t)
+
+        if self.toroidal and blocos:
+            # Blocos 2D: as colunas fantasma também são feitas aqui
+            atualizar_fantasmas(self.nova_grade)
+        elif self.toroidal:
+            # As colunas fantasma já vieram certas dos workers, falta só as linhas
+            atualizar_linhas_fantasmas(self.nova_grade)
+        else:
+            # Garante bordas zeradas na nova também
+            self._zerar_bordas()
+        if self.tam_tile:
+            self.ativos = expandir_ativos(self.alterados, self.volta)
         self.grade, self.nova_grade = self.nova_grade, self.grade
+        self.geracao += 1
+        self._geracao_grade = self.geracao
+        if medidor is not None: medidor.desde("juncao", t)
         return mudou
 
     def simular(self, iteracoes):
+        medidor = self.medidor
+        detector = DetectorCiclos(self.janela_ciclos) if self.janela_ciclos else None
+        if detector:
+            detector.registrar(self.geracao, self._hash_atual())
+        if self.fluxo is not None and self.fluxo.precisa(self.geracao):
+            self.coletar()
+            self.fluxo.enviar(self.geracao, self.grade)
+
         reais = 0
         for it in range(iteracoes):
             if not self.atualizar(): break
             reais = it + 1
+            # No modo halo, coletar de tempos em tempos limita o quanto refazer se um worker cair
+            guardar = self.halo and self.coletar_a_cada and self.geracao % self.coletar_a_cada == 0
+            if (guardar or precisa_grade(self, self.geracao)) and not self.coletar(): break
+            persistir(self)
+            if detector:
+                if medidor is not None: t = time.perf_counter()
+                self.ciclo = detector.registrar(self.geracao, self._hash_atual())
+                if medidor is not None: medidor.desde("estagnacao", t)
+                if self.ciclo: break
+        # No modo halo a matriz só existe espalhada nos workers: junto tudo no final
+        self.coletar()
         return reais
 
 
 # --- WORKER ---
 
-# Essa função é quase igual a do sequencial, só mudei que aqui não precisa
-# dos índices de início/fim porque eu já recebo a fatia cortada
-def atualizar_faixa_numpy(grade, nova_grade):
-    alt, larg = grade.shape
-    
-    # Verificações básicas para não dar erro de índice
-    if alt <= 2: return
-
-    # Pego o meio da matriz (sem as bordas)
-    interior = grade[1:-1, 1:-1]
-    
-    # Pego a matriz inteira e desloco ela nas 8 direções. Somando tudo, tenho os vizinhos de todo mundo de uma vez.
-    acima = grade[:-2, :]
-    meio = grade[1:-1, :]
-    abaixo = grade[2:, :]
-
-    vizinhos = (
-        acima[:, 0:-2] + acima[:, 1:-1] + acima[:, 2:] +
-        meio[:, 0:-2] +                   meio[:, 2:] +
-        abaixo[:, 0:-2] + abaixo[:, 1:-1] + abaixo[:, 2:]
-    )
-
-    # Regras do jogo usando 0/1
-    vivas = (interior == 1)
-    
-    # Regra 1: Continua viva se tem 2 ou 3 vizinhos
-    sobrevive = vivas & ((vizinhos == 2) | (vizinhos == 3))
-    
-    # Regra 2: Nasce se tiver 3 vizinhos
-    nasce = (interior == 0) & (vizinhos == 3)
-
-    # Junta tudo e converte para 0 ou 1
-    nova_grade[1:-1, 1:-1] = np.where(sobrevive | nasce, 1, 0)
+_CAPACIDADE = None
+
+def medir_capacidade(lado=256, geracoes=5):
+    # O que o worker diz no MSG_OLA: núcleos da máquina e quantas células por segundo
+    # ele calcula (núcleo de soma numa matriz pequena). Medido uma vez só por processo.
+    global _CAPACIDADE
+    if _CAPACIDADE is None:
+        grade = (np.random.default_rng(0).random((lado, lado)) < 0.3).astype(np.uint8)
+        nova = np.zeros_like(grade)
+        nucleo = criar_nucleo()
+        nucleo.atualizar(grade, nova, 1, lado - 1)  # aquece (aloca os buffers)
+        t0 = time.perf_counter()
+        for _ in range(geracoes):
+            nucleo.atualizar(grade, nova, 1, lado - 1)
+            grade, nova = nova, grade
+        tempo = max(time.perf_counter() - t0, 1e-9)
+        _CAPACIDADE = {"nucleos": os.cpu_count() or 1, "vazao": (lado - 2) ** 2 * geracoes / tempo}
+    return _CAPACIDADE
+
+class _Worker:
+    # Guarda a configuração e os buffers de uma conexão com o servidor.
+    # Os buffers só são recriados quando a faixa fica maior que o que já tenho.
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.config = {"altura": 0, "largura": 0, "tam_tile": 0, "nucleo": "soma", "regra": None,
+                       "toroidal": False, "batimento": BATIMENTO}
+        self.cab = bytearray(CABECALHO.size)
+        self.entrada = np.zeros((0, 0), dtype=np.uint8)
+        self.saida = np.zeros((0, 0), dtype=np.uint8)
+        self.bits = np.zeros(0, dtype=np.uint8)
+        self.nucleo = criar_nucleo(self.config["nucleo"], self.config["regra"])
+        self.deslocamento = 0
+        # Modo halo com blocos 2D (FLAG_BLOCO no MSG_CARREGAR): coluna global da coluna 0
+        self.bloco = False
+        self.coluna = 0
+        # Memória compartilhada com o servidor (só se ele estiver na mesma máquina)
+        self.memoria = None
+
+        # Batimentos: enquanto 'ocupado', uma thread manda MSG_VIVO de tempos em tempos.
+        # A trava é para o batimento nunca cair no meio de uma resposta.
+        self._trava = threading.Lock()
+        self._ocupado = False
+        self._batendo = False
+        self._fim = threading.Event()
+        # sair(): o MSG_TCHAU vai pela thread dos batimentos, na primeira folga
+        self._sair = False
+        self._avisou = False
+
+    def _enviar(self, cabecalho, *partes):
+        with self._trava:
+            enviar_quadro(self.sock, cabecalho, *partes)
+
+    def _bater(self):
+        # Se o servidor passar 'prazo' sem ouvir nada, acha que eu morri. Numa faixa
+        # demorada o cálculo pode levar mais que isso, então aviso que estou vivo.
+        vivo = CABECALHO.pack(MSG_VIVO, 0, 0, 0, 0, 0, 0)
+        tchau = CABECALHO.pack(MSG_TCHAU, 0, 0, 0, 0, 0, 0)
+        while not self._fim.wait(self.config["batimento"]):
+            with self._trava:
+                if self._ocupado:
+                    mensagem = vivo
+                elif self._sair and not self._avisou:
+                    mensagem = tchau
+                    self._avisou = True
+                else:
+                    continue
+                try:
+                    self.sock.sendall(mensagem)
+                except OSError:
+                    return
+
+    def sair(self):
+        # Pede para sair entre duas gerações (o servidor ainda recolhe a minha faixa no
+        # modo halo e depois fecha a conexão). Devolve False se não dá para avisar
+        # (ainda não recebi a configuração): aí é só fechar.
+        self._sair = True
+        return self._batendo
+
+    def _garantir_buffers(self, linhas, colunas):
+        if self.entrada.shape[0] < linhas or self.entrada.shape[1] != colunas:
+            self.entrada = np.zeros((linhas, colunas), dtype=np.uint8)
+            self.saida = np.zeros((linhas, colunas), dtype=np.uint8)
+        return self.entrada[:linhas], self.saida[:linhas]
+
+    def _receber_config(self, tamanho):
+        dados = bytearray(tamanho)
+        if not receber_em(self.sock, dados): return False
+        self.config.update(json.loads(dados.decode()))
+        # ler_regra guarda as regras já lidas, então reconectar não refaz nada
+        self.nucleo = criar_nucleo(self.config["nucleo"], self.config["regra"])
+        # Os batimentos começam quando já sei de quanto em quanto tempo mandar
+        if not self._batendo:
+            self._batendo = True
+            threading.Thread(target=self._bater, daemon=True).start()
+        return True
+
+    def _abrir_memoria(self, tamanho):
+        # MSG_MEMORIA: penduro a região que o servidor criou e confiro a ficha. Respondo
+        # se deu certo; se não, ele continua mandando tudo pelo socket
+        dados = bytearray(tamanho)
+        if not receber_em(self.sock, dados): return False
+        pedido = json.loads(dados.decode())
+        if self.memoria is not None:
+            self.memoria.fechar()
+            self.memoria = None
+        try:
+            memoria = _Memoria(nome=pedido["nome"])
+            if memoria.visao((TAMANHO_FICHA,)).tobytes().hex() == pedido["ficha"]:
+                self.memoria = memoria
+            else:
+                memoria.fechar()
+        except (OSError, ValueError):
+            pass
+        abriu = 1 if self.memoria is not None else 0
+        self._enviar(CABECALHO.pack(MSG_MEMORIA, FORMATO_JSON, 0, 0, abriu, 0, 0))
+        return True
+
+    def _visao_memoria(self, formato, linhas, colunas, posicao=0):
+        if self.memoria is None:
+            raise ValueError("mensagem pela memória compartilhada sem MSG_MEMORIA antes")
+        return self.memoria.visao(forma_rede(formato, linhas, colunas), posicao)
+
+    def _matriz_resposta(self, matriz, flags, posicao=0):
+        # A matriz da resposta (já no formato da rede) volta pelo caminho que o pedido veio:
+        # memória compartilhada (aí não vai nada dela no socket) ou socket
+        if flags & FLAG_MEMORIA:
+            np.copyto(self.memoria.visao(matriz.shape, posicao), matriz)
+            return []
+        return [matriz]
+
+    def _receber_matriz(self, destino, formato, linhas, colunas, flags=0, posicao=0):
+        if flags & FLAG_MEMORIA:
+            visao = self._visao_memoria(formato, linhas, colunas, posicao)
+            if formato == FORMATO_BITS:
+                destino[:] = np.unpackbits(visao, axis=1, count=colunas)
+            else:
+                np.copyto(destino, visao)
+            return True
+        if formato == FORMATO_BITS:
+            n = tamanho_conteudo(formato, linhas, colunas)
+            if self.bits.size < n:
+                self.bits = np.empty(n, dtype=np.uint8)
+            empacotado = self.bits[:n].reshape(linhas, -1)
+            if not receber_em(self.sock, empacotado): return False
+            destino[:] = np.unpackbits(empacotado, axis=1, count=colunas)
+            return True
+        return receber_em(self.sock, destino)
+
+    def _processar_faixa(self, formato, flags, geracao, linhas, colunas, deslocamento):
+        grade, nova = self._garantir_buffers(linhas, colunas)
+        if flags & FLAG_MEMORIA and formato != FORMATO_BITS:
+            # Calculo lendo direto da memória compartilhada (só leio dela, escrevo na 'nova')
+            grade = self._visao_memoria(formato, linhas, colunas)
+        elif not self._receber_matriz(grade, formato, linhas, colunas, flags): return False
+
+        ativos = alterados = None
+        if flags & FLAG_TILES:
+            t = self.config["tam_tile"]
+            ativos = criar_mapa_tiles(self.config["altura"], self.config["largura"], t)
+            if not receber_em(self.sock, ativos): return False
+            alterados = np.zeros_like(ativos)
+
+        # Processa
+        t = time.perf_counter()
+        if ativos is not None:
+            # Modo com tiles: tile pulado fica igual ao atual, então começo copiando
+            np.copyto(nova, grade)
+            atualizar_faixa_tiles(grade, nova, 1, linhas - 1, ativos, alterados,
+                                  self.config["tam_tile"], deslocamento, nucleo=self.nucleo)
+            mudou = bool(alterados.any())
+        else:
+            mudou = self.nucleo.atualizar(grade, nova, 1, linhas - 1)
+        if self.config["toroidal"] and not flags & FLAG_BLOCO:
+            atualizar_colunas_fantasmas(nova, 1, linhas - 1)
+        calculo = time.perf_counter() - t
+
+        # Manda de volta só as linhas que eu calculei (sem as fantasmas)
+        calculadas = nova[1:-1]
+        partes = self._matriz_resposta(np.packbits(calculadas, axis=1) if formato == FORMATO_BITS else calculadas, flags)
+        resp_flags = FLAG_MUDOU if mudou else 0
+        if flags & FLAG_MEMORIA:
+            resp_flags |= FLAG_MEMORIA
+        if alterados is not None:
+            resp_flags |= FLAG_TILES
+            partes.append(alterados)
+        if flags & FLAG_TEMPO:
+            resp_flags |= FLAG_TEMPO
+            partes.append(np.array([calculo], dtype="<f8"))
+        cab = CABECALHO.pack(MSG_FAIXA, formato, resp_flags, geracao, linhas - 2, colunas, deslocamento + 1)
+        self._enviar(cab, *partes)
+        return True
+
+    # --- Modo halo ---
+
+    def _carregar_faixa(self, formato, flags, linhas, colunas, deslocamento):
+        # A faixa (com as linhas fantasma) passa a morar aqui
+        self.deslocamento = deslocamento
+        self.bloco = bool(flags & FLAG_BLOCO)
+        if self.bloco:
+            coluna = np.empty(1, dtype="<u4")
+            if not receber_em(self.sock, coluna): return False
+            self.coluna = int(coluna[0])
+        self.faixa = np.zeros((linhas, colunas), dtype=np.uint8)
+        self.faixa_nova = np.zeros_like(self.faixa)
+        return self._receber_matriz(self.faixa, formato, linhas, colunas, flags)
+
+    def _passo_halo(self, formato, flags, geracao, colunas):
+        # 1. Só as linhas fantasma chegam pela rede (ou pela memória compartilhada, logo
+        # depois de onde veio a faixa no MSG_CARREGAR)
+        posicao = tamanho_conteudo(formato, *self.faixa.shape)
+        if self.bloco:
+            # Bloco 2D: a moldura inteira numa linha só (cima, baixo, esquerda, direita)
+            moldura = np.empty((1, colunas), dtype=np.uint8)
+            if not self._receber_matriz(moldura, formato, 1, colunas, flags, posicao): return False
+            largura = self.faixa.shape[1]
+            moldura = moldura[0]
+            self.faixa[0] = moldura[:largura]
+            self.faixa[-1] = moldura[largura:2 * largura]
+            self.faixa[1:-1, 0], self.faixa[1:-1, -1] = np.split(moldura[2 * largura:], 2)
+        elif formato == FORMATO_BITS or flags & FLAG_MEMORIA:
+            fantasmas = np.empty((2, colunas), dtype=np.uint8)
+            if not self._receber_matriz(fantasmas, formato, 2, colunas, flags, posicao): return False
+            self.faixa[0] = fantasmas[0]
+            self.faixa[-1] = fantasmas[1]
+        else:
+            if not receber_em(self.sock, self.faixa[0]): return False
+            if not receber_em(self.sock, self.faixa[-1]): return False
+
+        # 2. Calcula e troca as matrizes (o novo vira o atual)
+        t = time.perf_counter()
+        mudou = self.nucleo.atualizar(self.faixa, self.faixa_nova, 1, self.faixa.shape[0] - 1)
+        if self.config["toroidal"] and not self.bloco:
+            atualizar_colunas_fantasmas(self.faixa_nova, 1, self.faixa.shape[0] - 1)
+        self.faixa, self.faixa_nova = self.faixa_nova, self.faixa
+        calculo = time.perf_counter() - t
+
+        # 3. Devolve só a primeira e a última linha calculadas (viram fantasmas dos vizinhos).
+        # Num bloco 2D, as 4 beiradas (linha de cima, de baixo, coluna da esquerda, da direita)
+        f = self.faixa
+        if self.bloco:
+            bordas = [np.concatenate([f[1, 1:-1], f[-2, 1:-1], f[1:-1, 1], f[1:-1, -2]])[np.newaxis]]
+        elif formato == FORMATO_BITS or flags & FLAG_MEMORIA:
+            bordas = [f[[1, -2]]]
+        else:
+            bordas = [f[1], f[-2]]
+        forma = bordas[0].shape if self.bloco else (2, f.shape[1])
+        if formato == FORMATO_BITS:
+            bordas = [np.packbits(bordas[0], axis=1)]
+        resp_flags = FLAG_MUDOU if mudou else 0
+        if flags & FLAG_MEMORIA:
+            bordas = self._matriz_resposta(bordas[0], flags, posicao)
+            resp_flags |= FLAG_MEMORIA
+        if flags & FLAG_HASH:
+            if self.bloco:
+                # Bloco 2D: a linha não é toda minha, mando a soma de cada uma antes da
+                # mistura e o servidor junta (ver somas_linhas)
+                bordas.append(somas_linhas(f[1:-1, 1:-1], self.coluna + 1, self.config["largura"]).astype("<u8"))
+            else:
+                # Hash só das linhas que são minhas (sem as fantasmas), com o índice global
+                h = hash_linhas(f, 1, f.shape[0] - 1, self.deslocamento)
+                bordas.append(np.array([h], dtype="<u8"))
+            resp_flags |= FLAG_HASH
+        if flags & FLAG_TEMPO:
+            resp_flags |= FLAG_TEMPO
+            bordas.append(np.array([calculo], dtype="<f8"))
+        cab = CABECALHO.pack(MSG_BORDAS, formato, resp_flags, geracao, *forma, 0)
+        self._enviar(cab, *bordas)
+        return True
+
+    def _devolver_faixa(self, formato, flags, geracao):
+        calculadas = self.faixa[1:-1]
+        if formato == FORMATO_BITS:
+            calculadas = np.packbits(calculadas, axis=1)
+        linhas, colunas = self.faixa.shape
+        cab = CABECALHO.pack(MSG_FAIXA, formato, flags & FLAG_MEMORIA, geracao, linhas - 2, colunas, 0)
+        self._enviar(cab, *self._matriz_resposta(calculadas, flags))
+        return True
+
+    def _apresentar(self):
+        capacidade = dict(medir_capacidade(), nome=f"{socket.gethostname()}:{os.getpid()}",
+                          maquina=identificar_maquina())
+        dados = json.dumps(capacidade).encode()
+        self._enviar(CABECALHO.pack(MSG_OLA, FORMATO_JSON, 0, 0, len(dados), 1, 0), dados)
+
+    def atender(self):
+        try:
+            self._apresentar()
+            while self._atender_mensagem():
+                pass
+        finally:
+            self._fim.set()
+            if self.memoria is not None:
+                self.memoria.fechar()
+                self.memoria = None
+
+    def _atender_mensagem(self):
+        # 1. Lê cabeçalho
+        if not receber_em(self.sock, self.cab): return False
+        tipo, formato, flags, geracao, linhas, colunas, deslocamento = CABECALHO.unpack(self.cab)
+
+        # 2. Lê o resto e processa, conforme o tipo (com batimentos até acabar)
+        with self._trava:
+            self._ocupado = True
+        try:
+            if tipo == MSG_CONFIG:
+                ok = self._receber_config(linhas * colunas)
+            elif tipo == MSG_FAIXA:
+                ok = self._processar_faixa(formato, flags, geracao, linhas, colunas, deslocamento)
+            elif tipo == MSG_CARREGAR:
+                ok = self._carregar_faixa(formato, flags, linhas, colunas, deslocamento)
+            elif tipo == MSG_PASSO:
+                ok = self._passo_halo(formato, flags, geracao, colunas)
+            elif tipo == MSG_COLETAR:
+                ok = self._devolver_faixa(formato, flags, geracao)
+            elif tipo == MSG_MEMORIA:
+                ok = self._abrir_memoria(linhas * colunas)
+            else:
+                ok = False
+        finally:
+            with self._trava:
+                self._ocupado = False
+        return ok
+
 
 def executar_worker_distribuido(host, porta):
     print(f"Worker rodando em {host}:{porta}")
-    
+
+    # SIGTERM (ex: máquina preemptiva sendo desligada): se estou no meio de uma
+    # simulação, aviso o servidor e saio entre duas gerações; senão saio na hora
+    estado = {"worker": None, "sair": False}
+
+    def pedir_saida(sinal, quadro):
+        estado["sair"] = True
+        worker = estado["worker"]
+        if worker is None or not worker.sair():
+            raise SystemExit(0)
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, pedir_saida)
+
     # Loop eterno para não morrer quando o teste acaba
     # Assim o benchmark pode reutilizar o processo
-    while True:
+    espera = 0.5
+    while not estado["sair"]:
         s = None
         try:
             s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             s.connect((host, porta))
-            
-            while True:
-                # 1. Lê tamanho
-                head = b''
-                while len(head) < 4:
-                    p = s.recv(4 - len(head))
-                    if not p: raise Exception()
-                    head += p
-                (tam,) = struct.unpack("!I", head)
-                
-                # 2. Lê dados
-                dados = b''
-                while len(dados) < tam:
-                    p = s.recv(tam - len(dados))
-                    if not p: raise Exception()
-                    dados += p
-                
-                # 3. Processa
-                grade = pickle.loads(dados)
-                nova = grade.copy()
-                atualizar_faixa_numpy(grade, nova)
-                
-                # 4. Manda de volta
-                resp = pickle.dumps(nova, protocol=pickle.HIGHEST_PROTOCOL)
-                s.sendall(struct.pack("!I", len(resp)))
-                s.sendall(resp)
+            preparar_conexao(s)
+            espera = 0.5
+            estado["worker"] = _Worker(s)
+            estado["worker"].atender()
+            estado["worker"] = None
+            s.close()
 
         except Exception:
-            # Se der erro (servidor caiu), espera um pouco e tenta reconectar
+            # Se der erro (servidor caiu ou ainda não subiu), espera e tenta reconectar,
+            # dobrando a espera a cada tentativa para não martelar um servidor fora do ar
+            estado["worker"] = None
             if s: s.close()
-            time.sleep(0.5)
+            time.sleep(espera)
+            espera = min(2 * espera, ESPERA_MAXIMA)
             continue
 
 
 # --- MAIN ---
 
-def executar_servidor_distribuido(larg, alt, it, n_workers, porta=8888, prob_viva=0.2):
+def executar_servidor_distribuido(larg, alt, it, n_workers, porta=8888, prob_viva=0.2, tam_tile=None, compactar=False, halo=False,
+                                  balancear=False, janela_ciclos=0, checkpoint=None, checkpoint_a_cada=100,
+                                  grade_inicial=None, tipo_nucleo="soma", regra=None, toroidal=False,
+                                  prazo=PRAZO, prazo_geracao=None, batimento=BATIMENTO, coletar_a_cada=0,
+                                  max_workers=None, medidor=None, memoria=True, dividir_2d=True):
+    # n_workers: quantos espero antes de começar. Durante a simulação entra quem chegar,
+    # até max_workers (None = n_workers: só entra alguém para substituir quem saiu/caiu)
     print(f"--- Servidor distribuído {larg}x{alt} com {n_workers} workers ---")
 
     s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     s.bind(("", porta))
-    s.listen(n_workers)
-    
+    s.listen(max(n_workers, max_workers or 0))
+
     # Timeout de 1 min para não travar para sempre se der ruim
     s.settimeout(60)
 
-    vida = VidaDistribuida(larg, alt, prob_viva)
-    conexoes = []
+    vida = VidaDistribuida(larg, alt, prob_viva, tam_tile=tam_tile, compactar=compactar, halo=halo,
+                           balancear=balancear, janela_ciclos=janela_ciclos, grade_inicial=grade_inicial,
+                           tipo_nucleo=tipo_nucleo, regra=regra, toroidal=toroidal, checkpoint=Checkpoint(checkpoint, checkpoint_a_cada) if checkpoint else None,
+                           prazo=prazo, prazo_geracao=prazo_geracao, batimento=batimento, coletar_a_cada=coletar_a_cada,
+                           medidor=medidor, memoria=memoria, dividir_2d=dividir_2d)
 
-    # Divide carga
-    linhas = max(1, alt - 2)
-    reais = min(n_workers, linhas)
-    qnt = linhas // reais
-    resto = linhas % reais
-    
-    ini = 1
     try:
-        # Aceita conexões
-        for i in range(reais):
+        # Aceita conexões: cada worker se apresenta (MSG_OLA) e as linhas são divididas
+        # pela velocidade que ele informou
+        for i in range(min(n_workers, vida.maximo_workers())):
             conn, addr = s.accept()
-            conexoes.append(conn)
-            
-            tam = qnt + (1 if i < resto else 0)
-            fim = ini + tam
-            
-            vida.add_worker(conn, ini, fim)
-            ini = fim
-
-        s.settimeout(None)
-        
+            preparar_conexao(conn)
+            vida.add_worker(conn)
+            capacidade = vida.capacidades[-1]
+            print(f"  Worker {i}: {addr[0]}, {capacidade['nucleos']} núcleos, "
+                  f"{capacidade['vazao'] / 1e6:.0f} Mcélulas/s"
+                  + (", mesma máquina (memória compartilhada)" if vida._mesma_maquina[-1] else ""))
+
+        if vida._em_blocos():
+            px, py = escolher_particao(larg, alt, len(vida.workers), troca=halo)
+            print(f"  Blocos:    {px}x{py}")
+
+        # Dali pra frente, workers entram e saem entre uma geração e outra
+        vida.abrir_recepcao(s, max_workers or n_workers)
+        retomar_se_existir(vida)
+
         t0 = time.perf_counter()
-        reais = vida.simular(it)
+        reais = vida.simular(it - vida.geracao)
         t1 = time.perf_counter()
         tempo = t1 - t0
 
         print(f"  Iterações: {reais}")
+        if vida.falhas:
+            print(f"  Falhas:    {len(vida.falhas)} worker(s) perdido(s)")
+        print(f"  Workers:   {len(vida.workers)} no final")
+        mostrar_ciclo(vida.ciclo)
         print(f"  Tempo:     {tempo:.4f} s")
-        return tempo
+        # Cálculo = o do worker mais lento em cada geração; comunicação = o resto da troca
+        comunicacao = vida.tempo_troca - vida.tempo_calculo
+        print(f"  Cálculo:   {vida.tempo_calculo:.4f} s | Comunicação: {comunicacao:.4f} s | "
+              f"Servidor: {tempo - vida.tempo_troca:.4f} s")
+        if medidor is not None: medidor.mostrar()
+        return tempo, reais, vida.ciclo
 
     finally:
-        # Fecha sockets para liberar workers
-        for c in conexoes:
-            try: c.close()
-            except: pass
+        # Fecha sockets para liberar workers (e apaga as memórias compartilhadas)
+        vida.fechar()
         s.close()
 
 if __name__ == "__main__":
@@ -237,4 +1680,7 @@ if __name__ == "__main__":
         if modo == "worker":
             executar_worker_distribuido(sys.argv[2], int(sys.argv[3]))
         elif modo == "server":
-            executar_servidor_distribuido(int(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4]), int(sys.argv[5]), int(sys.argv[6]))
\ No newline at end of file
+            # Opcional no fim: máximo de workers (os que chegarem depois entram no meio)
+            maximo = int(sys.argv[7]) if len(sys.argv) > 7 else None
+            executar_servidor_distribuido(int(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4]), int(sys.argv[5]), int(sys.argv[6]),
+                                          max_workers=maximo)
@@ -0,0 +1,204 @@
+import time
+import numpy as np
+
+from regras import ler_regra
+
+# Versão "empacotada" do sequencial: cada linha da matriz vira um vetor de uint64,
+# com 64 células por palavra (bit j da palavra k = coluna 64*k + j).
+# Em vez de somar 8 matrizes int64, eu conto os vizinhos com somadores de bits
+# (igual circuito digital), fazendo 64 células por operação.
+
+UM = np.uint64(1)
+BIT_ALTO = np.uint64(63)
+
+# Quantas linhas eu gero/empacoto por vez, pra não criar a matriz densa inteira
+LINHAS_POR_BLOCO = 256
+
+
+def _maioria(a, b, c):
+    # "Vai um" do somador completo: 1 se pelo menos dois dos três bits forem 1
+    return (a & b) | (c & (a ^ b))
+
+
+def _contagem_igual(bits, k):
+    # Máscara das células com exatamente k vizinhos, a partir dos bits da contagem
+    if k == 8:
+        return bits[3] # Só o 8 liga o bit 3
+    mascara = ~bits[3]
+    for i in range(3):
+        mascara &= bits[i] if (k >> i) & 1 else ~bits[i]
+    return mascara
+
+def _pertence(bits, valores):
+    # Máscara das células cuja contagem está em 'valores'
+    mascara = np.zeros_like(bits[0])
+    for k in valores:
+        mascara |= _contagem_igual(bits, k)
+    return mascara
+
+
+def empacotar(grade):
+    # Converte matriz 0/1 (altura x largura) em palavras uint64 (altura x ceil(largura/64))
+    altura, largura = grade.shape
+    n_palavras = (largura + 63) // 64
+    bytes_ = np.packbits(grade.astype(np.uint8, copy=False), axis=1, bitorder="little")
+
+    # Completo com zeros até fechar palavras de 8 bytes
+    completo = np.zeros((altura, n_palavras * 8), dtype=np.uint8)
+    completo[:, :bytes_.shape[1]] = bytes_
+    return completo.view("<u8")
+
+
+def desempacotar(palavras, largura, dtype=np.int64):
+    # Faz o caminho contrário: volta para a matriz 0/1 normal
+    bytes_ = np.ascontiguousarray(palavras, dtype="<u8").view(np.uint8)
+    grade = np.unpackbits(bytes_, axis=1, count=largura, bitorder="little")
+    return grade.astype(dtype, copy=False)
+
+
+class VidaEmpacotada:
+    def __init__(self, largura, altura, prob_viva=0.2, regra=None, medidor=None):
+        # Seed fixa para garantir que o teste seja igual sempre (mesma matriz do sequencial)
+        np.random.seed(42)
+
+        # Instrumentação (ver instrumentacao.py): o passo inteiro conta como cálculo
+        self.medidor = medidor
+
+        # Regra B/S (ver regras.py): o Conway usa a fórmula direta nos bits da contagem,
+        # as outras comparam a contagem com cada valor da regra
+        self.regra = ler_regra(regra)
+
+        self.largura = largura
+        self.altura = altura
+        self.n_palavras = (largura + 63) // 64
+
+        # Gero a matriz aleatória em blocos de linhas e já empacoto cada bloco.
+        # Como o np.random.choice consome os números em ordem, o resultado é
+        # idêntico a gerar tudo de uma vez (igual ao VidaSequencial).
+        self.grade = np.zeros((altura, self.n_palavras), dtype="<u8")
+        for ini in range(0, altura, LINHAS_POR_BLOCO):
+            fim = min(altura, ini + LINHAS_POR_BLOCO)
+            bloco = np.random.choice([0, 1], size=(fim - ini, largura), p=[1 - prob_viva, prob_viva])
+            self.grade[ini:fim] = empacotar(bloco)
+
+        # Máscara das colunas válidas do interior (tira a coluna 0, a última e o "resto" da palavra)
+        interior = np.zeros(largura, dtype=np.uint8)
+        interior[1:-1] = 1
+        self.mascara = empacotar(interior[np.newaxis, :])[0]
+
+        # Zera as bordas para facilitar o cálculo
+        self._zerar_bordas()
+
+        # Crio uma cópia para escrever o próximo estado
+        self.nova_grade = np.zeros_like(self.grade)
+
+        # Buffers dos deslocamentos horizontais (reaproveitados toda geração)
+        self._oeste = np.zeros_like(self.grade)
+        self._leste = np.zeros_like(self.grade)
+
+    def _zerar_bordas(self):
+        self.grade[0, :] = 0
+        self.grade[-1, :] = 0
+        self.grade &= self.mascara
+
+    def carregar_grade(self, grade):
+        # Permite começar de uma matriz densa qualquer (ex: a de um VidaSequencial)
+        self.grade = empacotar(grade)
+        self._zerar_bordas()
+
+    def para_grade(self, dtype=np.int64):
+        # Devolve a matriz densa 0/1, no mesmo formato do VidaSequencial
+        return desempacotar(self.grade, self.largura, dtype)
+
+    def _deslocar_colunas(self):
+        g = self.grade
+        oeste, leste = self._oeste, self._leste
+
+        # oeste: no bit da coluna c fica a célula da coluna c-1
+        np.left_shift(g, UM, out=oeste)
+        oeste[:, 1:] |= g[:, :-1] >> BIT_ALTO
+
+        # leste: no bit da coluna c fica a célula da coluna c+1
+        np.right_shift(g, UM, out=leste)
+        leste[:, :-1] |= g[:, 1:] << BIT_ALTO
+
+    def atualizar(self):
+        if self.largura <= 2 or self.altura <= 2:
+            return False
+
+        self._deslocar_colunas()
+        g, oeste, leste = self.grade, self._oeste, self._leste
+
+        # Linhas de cima, do meio e de baixo de cada célula do interior
+        c_o, c_m, c_l = oeste[:-2], g[:-2], leste[:-2]
+        m_o, atual, m_l = oeste[1:-1], g[1:-1], leste[1:-1]
+        b_o, b_m, b_l = oeste[2:], g[2:], leste[2:]
+
+        # Soma dos 3 vizinhos de cima e dos 3 de baixo (2 bits cada)
+        cima0 = c_o ^ c_m ^ c_l
+        cima1 = _maioria(c_o, c_m, c_l)
+        baixo0 = b_o ^ b_m ^ b_l
+        baixo1 = _maioria(b_o, b_m, b_l)
+
+        # Soma dos 2 vizinhos do meio
+        meio0 = m_o ^ m_l
+        meio1 = m_o & m_l
+
+        # Bit 0 da contagem (e o "vai um" pro bit 1)
+        soma0 = cima0 ^ baixo0 ^ meio0
+        vai0 = _maioria(cima0, baixo0, meio0)
+
+        # Bit 1 e bit 2 da contagem (contagem 8 vira 0, que também não é 2 nem 3)
+        parcial = cima1 ^ baixo1 ^ meio1
+        soma1 = parcial ^ vai0
+        soma2 = _maioria(cima1, baixo1, meio1) ^ (parcial & vai0)
+
+        if self.regra.conway:
+            # Regras do jogo: vive com 3 vizinhos, ou com 2 se já estava viva
+            novo = soma1 & ~soma2 & (soma0 | atual)
+        else:
+            # Aqui o 8 precisa ser diferente do 0, então calculo o bit 3 também
+            soma3 = _maioria(cima1, baixo1, meio1) & parcial & vai0
+            bits = (soma0, soma1, soma2, soma3)
+            novo = (atual & _pertence(bits, self.regra.sobreviver)) | (~atual & _pertence(bits, self.regra.nascer))
+        novo &= self.mascara
+
+        # Joga o resultado na nova matriz (linhas 0 e última continuam zeradas)
+        self.nova_grade[1:-1] = novo
+
+        mudou = not np.array_equal(novo, atual)
+
+        # Troca as matrizes (o novo vira o atual)
+        self.grade, self.nova_grade = self.nova_grade, self.grade
+        return mudou
+
+    def simular(self, iteracoes):
+        medidor = self.medidor
+        iteracoes_reais = 0
+        for it in range(iteracoes):
+            if medidor is not None: t = time.perf_counter()
+            mudou = self.atualizar()
+            if medidor is not None: medidor.desde("calculo", t)
+            iteracoes_reais = it + 1
+            if not mudou:
+                break # Se não mudou nada, para, para economizar tempo
+        return iteracoes_reais
+
+
+def executar_simulacao_empacotada(largura, altura, iteracoes, prob_viva=0.2, regra=None, medidor=None):
+    print(f"--- Simulação empacotada (uint64) {largura}x{altura} ---")
+
+    t0 = time.perf_counter()
+    simulacao = VidaEmpacotada(largura, altura, prob_viva=prob_viva, regra=regra, medidor=medidor)
+    reais = simulacao.simular(iteracoes)
+    t1 = time.perf_counter()
+
+    tempo = t1 - t0
+    print(f"  Iterações: {iteracoes} (feitas: {reais})")
+    print(f"  Tempo:     {tempo:.4f} s")
+    if medidor is not None: medidor.mostrar()
+    return tempo
+
+if __name__ == "__main__":
+    # Teste rápido
+    executar_simulacao_empacotada(100, 100, 1000)
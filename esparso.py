@@ -0,0 +1,190 @@
+import time
+import numpy as np
+
+from padroes import Padrao, criar_grade
+from regras import ler_regra
+from sequencial import DetectorCiclos, mostrar_ciclo
+
+# Versão esparsa: em vez da matriz inteira, guardo só as coordenadas das células vivas,
+# cada uma numa chave int64 ordenada: (linha + 2^30) << 32 | (coluna + 2^31).
+# Os vizinhos saem somando 8 constantes em todas as chaves de uma vez, e o np.unique
+# (com return_counts) conta quantas vezes cada vizinho apareceu. O custo depende da
+# população, não do tamanho da matriz: num tabuleiro enorme quase vazio isso voa.
+#
+# ilimitado=True: o plano é infinito (igual o Hashlife), não tem a borda morta.
+
+# A linha desloca menos para a chave não estourar o int64
+DESLOCAMENTO_LINHA = 1 << 30
+DESLOCAMENTO_COLUNA = 1 << 31
+MASCARA_COLUNA = np.int64((1 << 32) - 1)
+
+# As 8 direções, já no formato de chave
+VIZINHANCA = np.array([dy * (1 << 32) + dx
+                       for dy in (-1, 0, 1) for dx in (-1, 0, 1)
+                       if dy or dx], dtype=np.int64)
+
+
+def para_chaves(xs, ys):
+    xs = np.asarray(xs, dtype=np.int64)
+    ys = np.asarray(ys, dtype=np.int64)
+    return np.unique(((ys + DESLOCAMENTO_LINHA) << 32) | (xs + DESLOCAMENTO_COLUNA))
+
+def de_chaves(chaves):
+    # Devolve (xs, ys)
+    return (chaves & MASCARA_COLUNA) - DESLOCAMENTO_COLUNA, (chaves >> 32) - DESLOCAMENTO_LINHA
+
+
+class VidaEsparsa:
+    def __init__(self, largura, altura, prob_viva=0.2, ilimitado=False, grade_inicial=None, janela_ciclos=0,
+                 aleatoria=True, regra=None, medidor=None):
+        # Seed fixa para garantir que o teste seja igual sempre (mesma matriz do sequencial)
+        np.random.seed(42)
+
+        # Instrumentação (ver instrumentacao.py): o passo inteiro conta como cálculo
+        self.medidor = medidor
+
+        # Regra B/S (ver regras.py). Aqui só contam as células perto de alguma viva,
+        # então uma regra com B0 (nascer sem vizinhos) não dá pra fazer
+        self.regra = ler_regra(regra)
+        if self.regra.nasce[0]:
+            raise ValueError(f"a versão esparsa não suporta regras com B0 ({self.regra.texto})")
+
+        self.largura = largura
+        self.altura = altura
+        self.ilimitado = ilimitado
+        self.janela_ciclos = janela_ciclos
+        self.ciclo = None
+        self.geracao = 0
+
+        # Mesma matriz inicial dos outros motores, só que guardando só as vivas.
+        # Com aleatoria=False começa vazio (pra montar só com adicionar_padrao,
+        # sem nunca criar a matriz densa)
+        self.chaves = np.zeros(0, dtype=np.int64)
+        if grade_inicial is not None or aleatoria:
+            grade = criar_grade(largura, altura, prob_viva, grade_inicial)
+            self.carregar_grade(grade)
+
+    def _no_interior(self, chaves):
+        # Sem o plano infinito, as bordas são mortas (igual ao VidaSequencial)
+        xs, ys = de_chaves(chaves)
+        return chaves[(xs >= 1) & (xs < self.largura - 1) & (ys >= 1) & (ys < self.altura - 1)]
+
+    def carregar_grade(self, grade):
+        ys, xs = np.nonzero(grade)
+        self.chaves = para_chaves(xs, ys)
+        if not self.ilimitado:
+            self.chaves = self._no_interior(self.chaves)
+
+    def adicionar_padrao(self, padrao, x=0, y=0):
+        # Coloca um padrão (do padroes.py) direto nas chaves, sem passar por matriz nenhuma
+        novas = para_chaves(padrao.xs + x, padrao.ys + y)
+        if not self.ilimitado:
+            novas = self._no_interior(novas)
+        self.chaves = np.union1d(self.chaves, novas)
+
+    def para_grade(self, largura=None, altura=None, dtype=np.uint8):
+        # Matriz densa da janela (0, 0)-(largura, altura), no formato do VidaSequencial
+        largura = largura or self.largura
+        altura = altura or self.altura
+        grade = np.zeros((altura, largura), dtype=dtype)
+        xs, ys = de_chaves(self.chaves)
+        dentro = (xs >= 0) & (xs < largura) & (ys >= 0) & (ys < altura)
+        grade[ys[dentro], xs[dentro]] = 1
+        return grade
+
+    def para_padrao(self):
+        xs, ys = de_chaves(self.chaves)
+        return Padrao(xs, ys)
+
+    @classmethod
+    def de_vida(cls, vida, ilimitado=False):
+        # Cria a partir de um VidaSequencial (ou qualquer motor com .grade)
+        esparsa = cls(vida.largura, vida.altura, ilimitado=ilimitado, aleatoria=False,
+                      regra=getattr(vida, "regra", None))
+        esparsa.carregar_grade(vida.grade)
+        return esparsa
+
+    def para_vida(self, vida):
+        # Escreve o estado atual de volta na matriz do VidaSequencial (bordas zeradas)
+        vida.grade[:, :] = self.para_grade(vida.largura, vida.altura, vida.grade.dtype)
+        vida._zerar_bordas()
+        return vida
+
+    def populacao(self):
+        return self.chaves.size
+
+    def atualizar(self):
+        chaves = self.chaves
+
+        # Cada célula viva "avisa" os 8 vizinhos; quantas vezes uma chave aparece = vizinhos vivos
+        avisos = (chaves[:, np.newaxis] + VIZINHANCA).ravel()
+        candidatas, vizinhos = np.unique(avisos, return_counts=True)
+
+        # Quem já estava viva (as chaves estão ordenadas, então é uma busca binária)
+        pos = np.searchsorted(chaves, candidatas)
+        viva = np.zeros(candidatas.size, dtype=bool)
+        achou = pos < chaves.size
+        viva[achou] = chaves[pos[achou]] == candidatas[achou]
+
+        if self.regra.conway:
+            # Regras do jogo: nasce com 3, sobrevive com 2 ou 3
+            novas = candidatas[(vizinhos == 3) | ((vizinhos == 2) & viva)]
+        else:
+            # Outra regra: tabelas de pertinência indexadas pela contagem
+            novas = candidatas[np.where(viva, self.regra.sobrevive[vizinhos], self.regra.nasce[vizinhos])]
+            if self.regra.sobrevive[0]:
+                # Com S0, as vivas sem nenhum vizinho (que nem aparecem em 'candidatas') ficam
+                sozinhas = np.setdiff1d(chaves, candidatas, assume_unique=True)
+                novas = np.union1d(novas, sozinhas)
+        if not self.ilimitado:
+            novas = self._no_interior(novas)
+
+        # O np.unique já devolve ordenado, então comparar direto funciona
+        mudou = not np.array_equal(novas, chaves)
+        self.chaves = novas
+        self.geracao += 1
+        return mudou
+
+    def simular(self, iteracoes):
+        medidor = self.medidor
+        detector = DetectorCiclos(self.janela_ciclos) if self.janela_ciclos else None
+        if detector:
+            detector.registrar(self.geracao, hash(self.chaves.tobytes()))
+
+        iteracoes_reais = 0
+        for it in range(iteracoes):
+            if medidor is not None: t = time.perf_counter()
+            mudou = self.atualizar()
+            if medidor is not None: t = medidor.desde("calculo", t)
+            iteracoes_reais = it + 1
+            if not mudou:
+                break # Se não mudou nada, para, para economizar tempo
+            if detector:
+                self.ciclo = detector.registrar(self.geracao, hash(self.chaves.tobytes()))
+                if medidor is not None: medidor.desde("estagnacao", t)
+                if self.ciclo:
+                    break
+        return iteracoes_reais
+
+
+def executar_simulacao_esparsa(largura, altura, iteracoes, prob_viva=0.2, ilimitado=False, janela_ciclos=0,
+                               grade_inicial=None, regra=None, medidor=None):
+    print(f"--- Simulação esparsa {largura}x{altura} ---")
+
+    t0 = time.perf_counter()
+    simulacao = VidaEsparsa(largura, altura, prob_viva=prob_viva, ilimitado=ilimitado,
+                            grade_inicial=grade_inicial, janela_ciclos=janela_ciclos, regra=regra, medidor=medidor)
+    reais = simulacao.simular(iteracoes)
+    t1 = time.perf_counter()
+
+    tempo = t1 - t0
+    print(f"  Iterações: {iteracoes} (feitas: {reais})")
+    print(f"  População: {simulacao.populacao()}")
+    mostrar_ciclo(simulacao.ciclo)
+    print(f"  Tempo:     {tempo:.4f} s")
+    if medidor is not None: medidor.mostrar()
+    return tempo, reais, simulacao.ciclo
+
+if __name__ == "__main__":
+    # Teste rápido
+    executar_simulacao_esparsa(100, 100, 1000, janela_ciclos=64)
@@ -0,0 +1,164 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+
+# Estatística das repetições do benchmark. Tempo de execução não é normal (tem cauda
+# para a direita: GC, outro processo pegando a CPU, a rede), então eu resumo pela
+# mediana e por percentis, e o intervalo de confiança da mediana sai por bootstrap
+# (reamostrar as repetições com reposição), sem supor distribuição nenhuma.
+#
+# Para comparar duas execuções (comparar.py) uso o teste de Mann-Whitney, que também
+# não supõe distribuição: só olha a ordem das amostras. Com poucas repetições e sem
+# empates o p-valor é exato (contando as ordenações possíveis); senão, aproximação normal.
+#
+# E para a escalabilidade, a fração serial f que explica os speedups medidos:
+#   - escala forte (mesmo tabuleiro, mais recursos), Amdahl: S(p) = 1 / (f + (1 - f) / p)
+#   - escala fraca (tabuleiro cresce junto com p), Gustafson: S(p) = p - f (p - 1)
+# Karp-Flatt é o f que sai de um ponto só; se ele cresce com p, o que atrapalha não é
+# só a parte serial, é a sobrecarga (comunicação, sincronização) que aumenta com p.
+
+# Reamostragens do bootstrap e a semente (o mesmo JSON dá sempre o mesmo intervalo)
+REAMOSTRAGENS = 2000
+SEMENTE = 0
+
+# Até esse m*n (e sem empates) o Mann-Whitney usa a distribuição exata de U
+MAXIMO_EXATO = 400
+
+
+def intervalo_mediana(amostras, confianca=0.95, reamostragens=REAMOSTRAGENS):
+    # Intervalo de confiança da mediana por bootstrap (percentis das medianas reamostradas)
+    amostras = np.asarray(amostras, dtype=float)
+    if amostras.size < 2:
+        valor = float(amostras[0]) if amostras.size else 0.0
+        return valor, valor
+    rng = np.random.default_rng(SEMENTE)
+    indices = rng.integers(0, amostras.size, size=(reamostragens, amostras.size))
+    medianas = np.median(amostras[indices], axis=1)
+    alfa = (1 - confianca) / 2 * 100
+    return float(np.percentile(medianas, alfa)), float(np.percentile(medianas, 100 - alfa))
+
+
+def resumir(amostras):
+    # Tudo o que vai para o JSON sobre uma lista de tempos
+    amostras = np.asarray(amostras, dtype=float)
+    if not amostras.size:
+        return {"n": 0}
+    baixo, alto = intervalo_mediana(amostras)
+    return {
+        "n": int(amostras.size),
+        "mediana": float(np.median(amostras)),
+        "media": float(amostras.mean()),
+        "desvio": float(amostras.std(ddof=1)) if amostras.size > 1 else 0.0,
+        "min": float(amostras.min()),
+        "max": float(amostras.max()),
+        "p5": float(np.percentile(amostras, 5)),
+        "p95": float(np.percentile(amostras, 95)),
+        "ic95": [baixo, alto],
+    }
+
+
+@lru_cache(maxsize=None)
+def _distribuicao_u(m, n):
+    # Quantas das C(m+n, m) ordenações dão cada valor de U (0 a m*n), sem empates.
+    # f(m, n)[u] = f(m-1, n)[u-n] (o maior valor é do primeiro grupo) + f(m, n-1)[u]
+    if m == 0 or n == 0:
+        return (1,)
+    sem_primeiro = _distribuicao_u(m - 1, n)
+    sem_segundo = _distribuicao_u(m, n - 1)
+    contagem = [0] * (m * n + 1)
+    for u, c in enumerate(sem_primeiro):
+        contagem[u + n] += c
+    for u, c in enumerate(sem_segundo):
+        contagem[u] += c
+    return tuple(contagem)
+
+
+def mann_whitney(a, b, alternativa="maior"):
+    # Devolve (U, p). U conta os pares em que a amostra de 'a' é maior que a de 'b'
+    # (empate vale meio). alternativa: "maior" (a tende a ser maior que b), "menor"
+    # ou "diferente" (bilateral)
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    m, n = a.size, b.size
+    if not m or not n:
+        return 0.0, 1.0
+    u = float((a[:, None] > b).sum() + 0.5 * (a[:, None] == b).sum())
+    # Para "menor" é o mesmo teste olhando do outro lado
+    u_teste = m * n - u if alternativa == "menor" else u
+
+    juntos = np.concatenate([a, b])
+    _, empates = np.unique(juntos, return_counts=True)
+    if m * n <= MAXIMO_EXATO and (empates == 1).all():
+        contagem = _distribuicao_u(m, n)
+        total = math.comb(m + n, m)
+        if alternativa == "diferente":
+            # Simétrica: o dobro da cauda do lado em que U caiu
+            extremo = max(u, m * n - u)
+            p = 2 * sum(contagem[math.ceil(extremo):]) / total
+        else:
+            p = sum(contagem[math.ceil(u_teste):]) / total
+        return u, min(p, 1.0)
+
+    # Aproximação normal, com correção de empates e de continuidade
+    total = m + n
+    media = m * n / 2
+    variancia = m * n / 12 * ((total + 1) - ((empates ** 3 - empates).sum()) / (total * (total - 1)))
+    if variancia <= 0:
+        return u, 1.0
+    if alternativa == "diferente":
+        z = (abs(u - media) - 0.5) / math.sqrt(variancia)
+        p = math.erfc(z / math.sqrt(2))
+    else:
+        z = (u_teste - media - 0.5) / math.sqrt(variancia)
+        p = 0.5 * math.erfc(z / math.sqrt(2))
+    return u, min(max(p, 0.0), 1.0)
+
+
+def karp_flatt(speedup, p):
+    # Fração serial experimental de um ponto: e = (1/S - 1/p) / (1 - 1/p).
+    # e > 1 quer dizer S < 1: a execução foi mais lenta que o sequencial, não é fração
+    # nenhuma (quem mostra isso numa tabela tem que dizer que não houve ganho)
+    if p <= 1 or speedup <= 0:
+        return None
+    return (1 / speedup - 1 / p) / (1 - 1 / p)
+
+
+def _ajustar_origem(xs, ys):
+    # Mínimos quadrados de y = f x (reta pela origem); None sem nenhum x útil
+    xs = np.asarray(xs, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    denominador = float((xs * xs).sum())
+    if denominador <= 0:
+        return None
+    return float((xs * ys).sum()) / denominador
+
+
+def ajustar_amdahl(ps, speedups):
+    # Amdahl reescrito fica linear em f: 1/S - 1/p = f (1 - 1/p). O p = 1 não entra (x = 0).
+    # Igual ao Karp-Flatt, f > 1 sai quando os speedups ficam abaixo de 1
+    ps = np.asarray(ps, dtype=float)
+    speedups = np.asarray(speedups, dtype=float)
+    return _ajustar_origem(1 - 1 / ps, 1 / speedups - 1 / ps)
+
+
+def ajustar_gustafson(ps, speedups):
+    # Gustafson também: p - S = f (p - 1)
+    ps = np.asarray(ps, dtype=float)
+    speedups = np.asarray(speedups, dtype=float)
+    return _ajustar_origem(ps - 1, ps - speedups)
+
+
+if __name__ == "__main__":
+    # Teste rápido: 10 tempos em torno de 1 s com uma repetição ruim
+    tempos = [1.00, 1.02, 0.98, 1.01, 0.99, 1.03, 1.00, 0.97, 1.01, 1.60]
+    for chave, valor in resumir(tempos).items():
+        print(f"  {chave:<8} {valor}")
+    # E contra uma execução 10% mais lenta
+    u, p = mann_whitney([t * 1.1 for t in tempos[:5]], tempos[:5])
+    print(f"  Mann-Whitney (10% mais lento > original): U = {u}, p = {p:.4f}")
+    # Speedups de um programa com 10% serial: os dois ajustes têm que dar 0.1
+    ps = [1, 2, 4, 8]
+    print(f"  Amdahl:    f = {ajustar_amdahl(ps, [1 / (0.1 + 0.9 / p) for p in ps]):.4f}")
+    print(f"  Gustafson: f = {ajustar_gustafson(ps, [p - 0.1 * (p - 1) for p in ps]):.4f}")
+    print(f"  Karp-Flatt (p = 4): e = {karp_flatt(1 / (0.1 + 0.9 / 4), 4):.4f}")
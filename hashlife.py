@@ -0,0 +1,331 @@
+import time
+import numpy as np
+
+from regras import ler_regra
+
+# Hashlife (algoritmo do Gosper): a matriz vira uma quadtree onde nós iguais são
+# o MESMO objeto (canonicalizados numa tabela). Assim, o resultado de avançar um nó
+# é calculado uma vez só e reaproveitado em todo lugar que ele aparece, e dá pra
+# pular 2^k gerações de uma vez.
+#
+# Importante: aqui o plano é infinito (não tem a borda morta do sequencial).
+# Enquanto o padrão não encosta na borda da janela, o resultado é o mesmo do VidaSequencial.
+#
+# Cache limitado: a tabela de nós e os resultados memorizados ficam, cada um, em duas
+# gerações (nova e velha). Quem é achado na velha é copiado para a nova; quando a nova
+# enche, ela vira a velha e a velha de antes vai embora. É um LRU aproximado, sem custo
+# por acesso, conferido a cada inserção (então vale também no meio de um salto) e que
+# nunca joga fora de uma vez o que o salto em andamento acabou de usar. Descartar só
+# custa recalcular: um nó que saiu da tabela mas ainda está na árvore continua valendo,
+# no máximo aparece um nó igual duplicado (o resultado não muda).
+
+
+class _No:
+    __slots__ = ("nw", "ne", "sw", "se", "nivel", "pop")
+
+    def __init__(self, nw, ne, sw, se, nivel, pop):
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.nivel = nivel
+        self.pop = pop
+
+# Folhas (nível 0): uma célula só
+MORTA = _No(None, None, None, None, 0, 0)
+VIVA = _No(None, None, None, None, 0, 1)
+
+
+class VidaHashlife:
+    def __init__(self, max_nos=2_000_000, regra=None, medidor=None):
+        # Limite do cache (tabela de nós + resultados memorizados, as duas gerações de
+        # cada): cada geração guarda até um quarto dele
+        self.max_nos = max_nos
+        self._por_geracao = max(1, max_nos // 4)
+
+        # Instrumentação (ver instrumentacao.py): aqui não tem "geração a geração",
+        # então cada salto de 2^j gerações é uma medida de cálculo
+        self.medidor = medidor
+
+        # Regra B/S (ver regras.py). O vazio tem que continuar vazio (é o que deixa
+        # pular os nós sem ninguém), então regras com B0 não servem aqui
+        self.regra = ler_regra(regra)
+        if self.regra.nasce[0]:
+            raise ValueError(f"o Hashlife não suporta regras com B0 ({self.regra.texto})")
+        # proximo[viva][vizinhos] -> se fica viva (tupla pronta, sem NumPy célula a célula)
+        self._proximo = self.regra.proximo
+
+        # Tabela de canonicalização: (nw, ne, sw, se) -> nó
+        self._tabela = {}
+        self._tabela_velha = {}
+        # Resultados já calculados: (nó, j) -> centro do nó avançado 2^j gerações
+        self._memo = {}
+        self._memo_velho = {}
+        self._vazios = [MORTA]
+
+        # Começo com um quadrado vazio 8x8 com o canto em (0, 0)
+        self.raiz = self._vazio(3)
+        self.x0 = 0
+        self.y0 = 0
+        self.geracao = 0
+
+    # --- Construção dos nós ---
+
+    def _juntar(self, nw, ne, sw, se):
+        chave = (nw, ne, sw, se)
+        no = self._tabela.get(chave)
+        if no is None:
+            no = self._tabela_velha.get(chave)
+            if no is None:
+                no = _No(nw, ne, sw, se, nw.nivel + 1, nw.pop + ne.pop + sw.pop + se.pop)
+            # Geração nova cheia: vira a velha (a velha de antes vai embora)
+            if len(self._tabela) >= self._por_geracao:
+                self._tabela_velha, self._tabela = self._tabela, {}
+            self._tabela[chave] = no
+        return no
+
+    def _vazio(self, nivel):
+        while len(self._vazios) <= nivel:
+            z = self._vazios[-1]
+            self._vazios.append(self._juntar(z, z, z, z))
+        return self._vazios[nivel]
+
+    def _centralizar(self, no):
+        # Coloca o nó no meio de um nó do nível de cima, cercado de células mortas
+        z = self._vazio(no.nivel - 1)
+        return self._juntar(
+            self._juntar(z, z, z, no.nw), self._juntar(z, z, no.ne, z),
+            self._juntar(z, no.sw, z, z), self._juntar(no.se, z, z, z)
+        )
+
+    def _centro(self, no):
+        return self._juntar(no.nw.se, no.ne.sw, no.sw.ne, no.se.nw)
+
+    def _so_no_centro(self, no):
+        # True se tudo que está vivo cabe no quadrado central (metade do tamanho)
+        if no.nivel < 3:
+            return False
+        return (no.nw.nw.pop + no.nw.ne.pop + no.nw.sw.pop +
+                no.ne.nw.pop + no.ne.ne.pop + no.ne.se.pop +
+                no.sw.nw.pop + no.sw.sw.pop + no.sw.se.pop +
+                no.se.ne.pop + no.se.sw.pop + no.se.se.pop) == 0
+
+    # --- Evolução ---
+
+    def _vida_4x4(self, no):
+        # Caso base: nó 4x4, calculo uma geração "na mão" e devolvo o 2x2 do meio
+        c = [
+            [no.nw.nw.pop, no.nw.ne.pop, no.ne.nw.pop, no.ne.ne.pop],
+            [no.nw.sw.pop, no.nw.se.pop, no.ne.sw.pop, no.ne.se.pop],
+            [no.sw.nw.pop, no.sw.ne.pop, no.se.nw.pop, no.se.ne.pop],
+            [no.sw.sw.pop, no.sw.se.pop, no.se.sw.pop, no.se.se.pop],
+        ]
+        novos = []
+        for y in (1, 2):
+            for x in (1, 2):
+                vizinhos = (c[y - 1][x - 1] + c[y - 1][x] + c[y - 1][x + 1] +
+                            c[y][x - 1] + c[y][x + 1] +
+                            c[y + 1][x - 1] + c[y + 1][x] + c[y + 1][x + 1])
+                # Mesma regra dos outros motores (no Conway: nasce com 3, sobrevive com 2 ou 3)
+                viva = self._proximo[c[y][x]][vizinhos]
+                novos.append(VIVA if viva else MORTA)
+        return self._juntar(*novos)
+
+    def _sucessor(self, no, j):
+        # Devolve o centro do nó (nível - 1) avançado 2^j gerações (j <= nível - 2)
+        if no.pop == 0:
+            return no.nw
+
+        chave = (no, j)
+        res = self._memo.get(chave)
+        if res is not None:
+            return res
+        res = self._memo_velho.get(chave)
+        if res is not None:
+            self._memorizar(chave, res)
+            return res
+
+        if no.nivel == 2:
+            res = self._vida_4x4(no)
+        else:
+            a, b, c, d = no.nw, no.ne, no.sw, no.se
+            jj = min(j, no.nivel - 2)
+
+            # 9 sub-quadrados sobrepostos, cada um avançado
+            c1 = self._sucessor(a, jj)
+            c2 = self._sucessor(self._juntar(a.ne, b.nw, a.se, b.sw), jj)
+            c3 = self._sucessor(b, jj)
+            c4 = self._sucessor(self._juntar(a.sw, a.se, c.nw, c.ne), jj)
+            c5 = self._sucessor(self._juntar(a.se, b.sw, c.ne, d.nw), jj)
+            c6 = self._sucessor(self._juntar(b.sw, b.se, d.nw, d.ne), jj)
+            c7 = self._sucessor(c, jj)
+            c8 = self._sucessor(self._juntar(c.ne, d.nw, c.se, d.sw), jj)
+            c9 = self._sucessor(d, jj)
+
+            if jj < no.nivel - 2:
+                # Passo "curto": só junto os centros, sem avançar de novo
+                res = self._juntar(
+                    self._juntar(c1.se, c2.sw, c4.ne, c5.nw),
+                    self._juntar(c2.se, c3.sw, c5.ne, c6.nw),
+                    self._juntar(c4.se, c5.sw, c7.ne, c8.nw),
+                    self._juntar(c5.se, c6.sw, c8.ne, c9.nw),
+                )
+            else:
+                # Passo "completo": avanço mais uma vez os 4 quadrados do meio
+                res = self._juntar(
+                    self._sucessor(self._juntar(c1, c2, c4, c5), jj),
+                    self._sucessor(self._juntar(c2, c3, c5, c6), jj),
+                    self._sucessor(self._juntar(c4, c5, c7, c8), jj),
+                    self._sucessor(self._juntar(c5, c6, c8, c9), jj),
+                )
+
+        self._memorizar(chave, res)
+        return res
+
+    def _memorizar(self, chave, res):
+        # Mesmo esquema da tabela de nós
+        if len(self._memo) >= self._por_geracao:
+            self._memo_velho, self._memo = self._memo, {}
+        self._memo[chave] = res
+
+    def _saltar(self, j):
+        # Avança exatamente 2^j gerações
+        raiz = self.raiz
+
+        # Cresce até o padrão caber na metade central e o nível comportar o salto
+        while raiz.nivel < j + 1 or not self._so_no_centro(raiz):
+            meio = 1 << (raiz.nivel - 1)
+            raiz = self._centralizar(raiz)
+            self.x0 -= meio
+            self.y0 -= meio
+
+        # Mais duas camadas de margem para o padrão não sair do centro durante o salto
+        for _ in range(2):
+            meio = 1 << (raiz.nivel - 1)
+            raiz = self._centralizar(raiz)
+            self.x0 -= meio
+            self.y0 -= meio
+
+        quarto = 1 << (raiz.nivel - 2)
+        raiz = self._sucessor(raiz, j)
+        self.x0 += quarto
+        self.y0 += quarto
+
+        # Encolho de volta para não deixar a raiz crescer à toa
+        while raiz.nivel > 3 and self._so_no_centro(raiz):
+            quarto = 1 << (raiz.nivel - 2)
+            raiz = self._centro(raiz)
+            self.x0 += quarto
+            self.y0 += quarto
+
+        self.raiz = raiz
+        self.geracao += 1 << j
+
+    def avancar(self, geracoes):
+        # Quebro o número em potências de 2 e dou um salto para cada bit
+        medidor = self.medidor
+        j = 0
+        while geracoes:
+            if geracoes & 1:
+                if medidor is not None: t = time.perf_counter()
+                self._saltar(j)
+                if medidor is not None: medidor.desde("calculo", t)
+            geracoes >>= 1
+            j += 1
+
+    def saltar(self, k):
+        # Pula 2^k gerações de uma vez só
+        self._saltar(k)
+
+    def simular(self, iteracoes):
+        # Mesmo formato dos outros: devolve quantas iterações foram feitas
+        self.avancar(iteracoes)
+        return iteracoes
+
+    def populacao(self):
+        return self.raiz.pop
+
+    # --- Conversão de/para matriz ---
+
+    def _construir(self, grade, y, x, nivel):
+        lado = 1 << nivel
+        bloco = grade[max(y, 0):max(y + lado, 0), max(x, 0):max(x + lado, 0)]
+        if not bloco.any():
+            return self._vazio(nivel)
+        if nivel == 0:
+            return VIVA
+        meio = lado >> 1
+        return self._juntar(
+            self._construir(grade, y, x, nivel - 1),
+            self._construir(grade, y, x + meio, nivel - 1),
+            self._construir(grade, y + meio, x, nivel - 1),
+            self._construir(grade, y + meio, x + meio, nivel - 1),
+        )
+
+    def carregar_grade(self, grade):
+        # Monta a quadtree a partir de uma matriz 0/1 (partes vazias viram o nó vazio direto)
+        altura, largura = grade.shape
+        nivel = 3
+        while (1 << nivel) < max(altura, largura):
+            nivel += 1
+        self.raiz = self._construir(grade, 0, 0, nivel)
+        self.x0 = 0
+        self.y0 = 0
+
+    def _desenhar(self, no, grade, y, x):
+        if no.pop == 0:
+            return
+        lado = 1 << no.nivel
+        altura, largura = grade.shape
+        if y >= altura or x >= largura or y + lado <= 0 or x + lado <= 0:
+            return
+        if no.nivel == 0:
+            grade[y, x] = 1
+            return
+        meio = lado >> 1
+        self._desenhar(no.nw, grade, y, x)
+        self._desenhar(no.ne, grade, y, x + meio)
+        self._desenhar(no.sw, grade, y + meio, x)
+        self._desenhar(no.se, grade, y + meio, x + meio)
+
+    def para_grade(self, largura, altura, dtype=np.int64):
+        # Recorta a janela (0, 0)-(largura, altura) do plano infinito
+        grade = np.zeros((altura, largura), dtype=dtype)
+        self._desenhar(self.raiz, grade, self.y0, self.x0)
+        return grade
+
+    @classmethod
+    def de_vida(cls, vida, max_nos=2_000_000, medidor=None):
+        # Cria a partir de um VidaSequencial (ou qualquer motor com .grade), com a mesma regra
+        hl = cls(max_nos, regra=getattr(vida, "regra", None), medidor=medidor)
+        hl.carregar_grade(vida.grade)
+        return hl
+
+    def para_vida(self, vida):
+        # Escreve o estado atual de volta na matriz do VidaSequencial (bordas zeradas)
+        vida.grade[:, :] = self.para_grade(vida.largura, vida.altura, vida.grade.dtype)
+        vida._zerar_bordas()
+        return vida
+
+
+def executar_simulacao_hashlife(largura, altura, iteracoes, prob_viva=0.2, regra=None, medidor=None):
+    # Import aqui dentro só pra usar a mesma matriz inicial do sequencial
+    from sequencial import VidaSequencial
+
+    print(f"--- Simulação hashlife {largura}x{altura} ---")
+
+    t0 = time.perf_counter()
+    simulacao = VidaHashlife.de_vida(VidaSequencial(largura, altura, prob_viva=prob_viva, regra=regra), medidor=medidor)
+    reais = simulacao.simular(iteracoes)
+    t1 = time.perf_counter()
+
+    tempo = t1 - t0
+    print(f"  Iterações: {iteracoes} (feitas: {reais})")
+    print(f"  População: {simulacao.populacao()}")
+    print(f"  Tempo:     {tempo:.4f} s")
+    if medidor is not None: medidor.mostrar()
+    return tempo
+
+if __name__ == "__main__":
+    # Teste rápido
+    executar_simulacao_hashlife(100, 100, 1000)
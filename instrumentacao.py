@@ -0,0 +1,138 @@
+import json
+import math
+import os
+import threading
+import time
+
+# Instrumentação opcional: quanto tempo cada geração gasta em cada fase, separado por
+# quem gastou (o principal, cada thread, cada processo, cada worker).
+#
+# Os motores recebem medidor=None (o padrão) ou um Medidor. Com None, o custo é um
+# "if medidor is not None" por fase, nada mais. Com Medidor, cada duração vai para um
+# histograma em escala log2 (o balde k guarda durações de 2^(k-1) a 2^k nanossegundos,
+# que é o bit_length da duração; o balde 0 só guarda zeros), então registrar é só umas
+# contas de inteiro, sem lista crescendo e sem NumPy.
+
+# As fases, na ordem em que aparecem nos gráficos
+FASES = (
+    "calculo",       # o núcleo calculando (tiles inclusos)
+    "espera",        # parado na barreira / esperando a resposta do worker
+    "serializacao",  # montando o que vai pela rede (packbits, cópias)
+    "envio",         # socket: até o último byte sair
+    "recebimento",   # socket: do cabeçalho da resposta até o último byte chegar
+    "juncao",        # juntando o resultado: bordas, troca das matrizes, mapa de tiles
+    "estagnacao",    # vendo se mudou e o hash da detecção de ciclos
+)
+
+# O último balde começa em 2^39 ns (uns 9 minutos) e pega tudo o que passar disso
+BALDES = 41
+
+PRINCIPAL = "principal"
+
+
+class Histograma:
+    __slots__ = ("n", "total", "minimo", "maximo", "baldes")
+
+    def __init__(self):
+        self.n = 0
+        self.total = 0.0
+        self.minimo = math.inf
+        self.maximo = 0.0
+        self.baldes = [0] * BALDES
+
+    def adicionar(self, segundos):
+        ns = int(segundos * 1e9)
+        self.baldes[min(ns.bit_length(), BALDES - 1) if ns > 0 else 0] += 1
+        self.n += 1
+        self.total += segundos
+        if segundos < self.minimo: self.minimo = segundos
+        if segundos > self.maximo: self.maximo = segundos
+
+    def percentil(self, p):
+        # Aproximado: o meio (geométrico) do balde onde cai o percentil, sem sair do min/max
+        if not self.n:
+            return 0.0
+        alvo = p / 100 * self.n
+        acumulado = 0
+        for k, quantos in enumerate(self.baldes):
+            acumulado += quantos
+            if quantos and acumulado >= alvo:
+                meio = 2 ** (k - 0.5) * 1e-9 if k else 0.0
+                return min(max(meio, self.minimo), self.maximo)
+        return self.maximo
+
+    def para_dict(self):
+        return {
+            "n": self.n,
+            "total": self.total,
+            "media": self.total / self.n if self.n else 0.0,
+            "min": self.minimo if self.n else 0.0,
+            "max": self.maximo,
+            "p50": self.percentil(50),
+            "p90": self.percentil(90),
+            "p99": self.percentil(99),
+            # Só os baldes com alguma coisa (chave = expoente do balde)
+            "baldes": {str(k): q for k, q in enumerate(self.baldes) if q},
+        }
+
+
+class Medidor:
+    def __init__(self):
+        # (fase, origem) -> Histograma. Cada thread só escreve nos histogramas da sua
+        # origem, então a trava só é usada para criar um histograma novo
+        self.histogramas = {}
+        self._trava = threading.Lock()
+
+    def registrar(self, fase, segundos, origem=PRINCIPAL):
+        h = self.histogramas.get((fase, origem))
+        if h is None:
+            with self._trava:
+                h = self.histogramas.setdefault((fase, origem), Histograma())
+        h.adicionar(segundos)
+
+    def desde(self, fase, t0, origem=PRINCIPAL):
+        # Registra de t0 até agora e devolve agora (para emendar uma fase na outra)
+        agora = time.perf_counter()
+        self.registrar(fase, agora - t0, origem)
+        return agora
+
+    def resumo(self):
+        # {fase: {origem: estatísticas}}, no formato que vai para o JSON
+        saida = {}
+        for (fase, origem), h in sorted(self.histogramas.items(), key=lambda item: _ordem(*item[0])):
+            saida.setdefault(fase, {})[origem] = h.para_dict()
+        return saida
+
+    def mostrar(self):
+        if not self.histogramas:
+            return
+        print(f"  {'FASE':<13} {'ORIGEM':<13} {'N':>7} {'TOTAL (s)':>10} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+        for fase, origens in self.resumo().items():
+            for origem, d in origens.items():
+                print(f"  {fase:<13} {origem:<13} {d['n']:>7} {d['total']:>10.4f} "
+                      f"{d['p50'] * 1e3:>9.3f} {d['p99'] * 1e3:>9.3f}")
+
+
+def _ordem(fase, origem):
+    # Fases na ordem de FASES; origens: o principal primeiro, depois "thread 2" < "thread 10"
+    nome, _, numero = origem.rpartition(" ")
+    chave_origem = (origem != PRINCIPAL, nome, int(numero)) if numero.isdigit() else (origem != PRINCIPAL, origem, 0)
+    return (FASES.index(fase) if fase in FASES else len(FASES), fase), chave_origem
+
+
+def salvar_instrumentacao(execucoes, caminho="resultados/instrumentacao.json"):
+    # execucoes: lista de dicionários (versão, tamanho, recursos, ...) com "fases" = Medidor.resumo()
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(execucoes, f, indent=4)
+    return caminho
+
+
+if __name__ == "__main__":
+    # Teste rápido: o sequencial com o medidor ligado
+    from sequencial import VidaSequencial
+
+    medidor = Medidor()
+    vida = VidaSequencial(200, 200, janela_ciclos=64, medidor=medidor)
+    vida.simular(200)
+    medidor.mostrar()
@@ -0,0 +1,182 @@
+import time
+import numpy as np
+
+from sequencial import criar_nucleo
+
+# Vários tabuleiros pequenos de uma vez (varredura de seeds/densidades).
+# Com 100x100 o tempo do VidaSequencial é quase todo do Python (chamadas, laço), não
+# da conta. Aqui os B tabuleiros ficam empilhados numa matriz (B, H, W), e como cada um
+# já tem a sua borda morta, dá pra tratar a pilha como uma matriz só (B*H, W) e passar
+# o mesmo núcleo do sequencial (NucleoVida ou NucleoTabela) nela inteira. Depois é só
+# zerar as bordas de novo.
+#
+# Cada tabuleiro para sozinho quando estagna (ou, com parar_periodo2, quando entra
+# num pisca-pisca). O estado final dele é guardado na hora e, quando sobram muitos
+# parados na pilha, eles saem dela para não gastar conta à toa.
+
+# Quando essa fração da pilha já parou, eu tiro os parados dela
+FRACAO_COMPACTAR = 0.25
+
+
+class VidaLote:
+    def __init__(self, largura, altura, n_tabuleiros, prob_viva=0.2, sementes=None, grades_iniciais=None,
+                 parar_periodo2=False, tipo_nucleo="soma", regra=None, toroidal=False, medidor=None):
+        self.largura = largura
+        self.altura = altura
+        self.n_tabuleiros = n_tabuleiros
+        self.parar_periodo2 = parar_periodo2
+        # toroidal=True: a moldura de cada tabuleiro é cópia do lado oposto (ver sequencial.py)
+        self.toroidal = toroidal
+        # Instrumentação (ver instrumentacao.py): cálculo da pilha, bordas/troca e quem parou
+        self.medidor = medidor
+
+        # Matriz inicial de cada tabuleiro:
+        # - grades_iniciais: (B, H, W) pronto
+        # - sementes: uma seed por tabuleiro, cada um igual ao VidaSequencial com aquela seed
+        # - senão: seed 42 e tudo sorteado de uma vez (prob_viva pode ser uma por tabuleiro)
+        if grades_iniciais is not None:
+            self.grades = np.array(grades_iniciais, dtype=np.uint8)
+        elif sementes is not None:
+            probs = np.broadcast_to(prob_viva, (n_tabuleiros,))
+            self.grades = np.empty((n_tabuleiros, altura, largura), dtype=np.uint8)
+            for b, semente in enumerate(sementes):
+                np.random.seed(semente)
+                self.grades[b] = np.random.choice([0, 1], size=(altura, largura), p=[1 - probs[b], probs[b]])
+        else:
+            np.random.seed(42)
+            probs = np.broadcast_to(np.asarray(prob_viva, dtype=float), (n_tabuleiros,))
+            self.grades = (np.random.random((n_tabuleiros, altura, largura)) < probs[:, None, None]).astype(np.uint8)
+        if self.grades.shape != (n_tabuleiros, altura, largura):
+            raise ValueError(f"esperado {n_tabuleiros} tabuleiros {largura}x{altura}, veio {self.grades.shape}")
+
+        # Zera as bordas de todos para facilitar o cálculo
+        self._zerar_bordas(self.grades)
+
+        # Geração em que cada tabuleiro parou (-1 = ainda rodando) e o período em que
+        # parou (1 = estagnou, 2 = pisca-pisca)
+        self.parada = np.full(n_tabuleiros, -1, dtype=np.int64)
+        self.periodo = np.zeros(n_tabuleiros, dtype=np.int64)
+        self.geracao = 0
+
+        # Pilha de trabalho: só os tabuleiros que ainda rodam (índices em self.indices).
+        # 'anterior' só é usado para achar período 2.
+        self.indices = np.arange(n_tabuleiros)
+        self.atual = self.grades.copy()
+        self.nova = np.zeros_like(self.atual)
+        self.anterior = np.zeros_like(self.atual) if parar_periodo2 else None
+        self.rodando = np.ones(n_tabuleiros, dtype=bool)
+        self.nucleo = criar_nucleo(tipo_nucleo, regra)
+        self.regra = self.nucleo.regra
+
+    def _zerar_bordas(self, pilha):
+        if self.toroidal:
+            # Todos os tabuleiros de uma vez: colunas primeiro, depois as linhas inteiras
+            pilha[:, 1:-1, 0] = pilha[:, 1:-1, -2]
+            pilha[:, 1:-1, -1] = pilha[:, 1:-1, 1]
+            pilha[:, 0, :] = pilha[:, -2, :]
+            pilha[:, -1, :] = pilha[:, 1, :]
+            return
+        pilha[:, 0, :] = 0
+        pilha[:, -1, :] = 0
+        pilha[:, :, 0] = 0
+        pilha[:, :, -1] = 0
+
+    def _compactar(self):
+        # Tira da pilha quem já parou (o estado final deles já está em self.grades)
+        manter = self.rodando
+        self.indices = self.indices[manter]
+        self.atual = self.atual[manter]
+        self.nova = np.zeros_like(self.atual)
+        if self.anterior is not None:
+            self.anterior = self.anterior[manter]
+        self.rodando = np.ones(self.indices.size, dtype=bool)
+
+    def atualizar(self):
+        n = self.indices.size
+        if n == 0 or self.largura <= 2 or self.altura <= 2:
+            return False
+        h, w = self.altura, self.largura
+        medidor = self.medidor
+        if medidor is not None: t = time.perf_counter()
+
+        # A pilha inteira como uma matriz só: as linhas de borda de cada tabuleiro
+        # também são calculadas (misturando dois vizinhos), mas eu zero elas logo depois
+        plano_atual = self.atual.reshape(n * h, w)
+        plano_novo = self.nova.reshape(n * h, w)
+        mascara = self.nucleo.calcular_bloco(plano_atual, plano_novo, 1, n * h - 1, 1, w - 1)
+        if medidor is not None: t = medidor.desde("calculo", t)
+        self._zerar_bordas(self.nova)
+        if medidor is not None: t = medidor.desde("juncao", t)
+
+        # Quem mudou, por tabuleiro (a máscara é das linhas 1..n*h-2, sem as bordas de coluna)
+        linhas = np.zeros(n * h, dtype=bool)
+        linhas[1:-1] = mascara.any(axis=1)
+        linhas = linhas.reshape(n, h)
+        linhas[:, 0] = False
+        linhas[:, -1] = False
+        mudou = linhas.any(axis=1)
+
+        # Tabuleiros que pararam nessa geração: guardo o estado final agora
+        parou = self.rodando & ~mudou
+        periodo = np.where(parou, 1, 0)
+        if self.anterior is not None and self.geracao > 0:
+            repetiu = self.rodando & mudou & (self.nova == self.anterior).all(axis=(1, 2))
+            parou |= repetiu
+            periodo[repetiu] = 2
+
+        self.geracao += 1
+        if parou.any():
+            quem = self.indices[parou]
+            self.grades[quem] = self.nova[parou]
+            self.parada[quem] = self.geracao
+            self.periodo[quem] = periodo[parou]
+            self.rodando &= ~parou
+        if medidor is not None: medidor.desde("estagnacao", t)
+
+        # Troca as matrizes (o novo vira o atual)
+        if self.anterior is not None:
+            self.anterior, self.atual, self.nova = self.atual, self.nova, self.anterior
+        else:
+            self.atual, self.nova = self.nova, self.atual
+
+        if self.rodando.sum() <= (1 - FRACAO_COMPACTAR) * n:
+            self._compactar()
+        return self.indices.size > 0
+
+    def simular(self, iteracoes):
+        # Roda até todos pararem ou acabarem as iterações; devolve quantas gerações rodou
+        reais = 0
+        for it in range(iteracoes):
+            continua = self.atualizar()
+            reais = it + 1
+            if not continua:
+                break # Todos pararam
+
+        # Quem não parou: o estado final é o que está na pilha
+        if self.indices.size:
+            self.grades[self.indices[self.rodando]] = self.atual[self.rodando]
+        return reais
+
+
+def executar_simulacao_lote(largura, altura, n_tabuleiros, iteracoes, prob_viva=0.2, parar_periodo2=False,
+                            tipo_nucleo="soma", regra=None, toroidal=False, medidor=None):
+    print(f"--- Simulação em lote: {n_tabuleiros} tabuleiros {largura}x{altura} ---")
+
+    t0 = time.perf_counter()
+    simulacao = VidaLote(largura, altura, n_tabuleiros, prob_viva=prob_viva, parar_periodo2=parar_periodo2,
+                         tipo_nucleo=tipo_nucleo, regra=regra, toroidal=toroidal, medidor=medidor)
+    reais = simulacao.simular(iteracoes)
+    t1 = time.perf_counter()
+
+    tempo = t1 - t0
+    pararam = int((simulacao.parada >= 0).sum())
+    print(f"  Iterações: {iteracoes} (feitas: {reais})")
+    print(f"  Pararam:   {pararam} de {n_tabuleiros}")
+    print(f"  Tempo:     {tempo:.4f} s")
+    if medidor is not None: medidor.mostrar()
+    # Em vez do ciclo de um tabuleiro só, devolvo a geração de parada de cada um
+    return tempo, reais, simulacao.parada
+
+if __name__ == "__main__":
+    # Teste rápido
+    executar_simulacao_lote(32, 32, 1000, 500, parar_periodo2=True)
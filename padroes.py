@@ -0,0 +1,238 @@
+import os
+import re
+import numpy as np
+
+# Leitura de padrões prontos (RLE e plaintext .cells) para usar como matriz inicial.
+#
+# Nada de montar uma matriz densa do padrão: o arquivo vira só a lista de coordenadas
+# das células vivas (xs, ys), e essas coordenadas são escritas direto na matriz final,
+# do tamanho que for. O RLE é lido em pedaços e cada pedaço é decodificado com NumPy
+# (sem um laço Python por célula), então arquivos de vários MB carregam rápido.
+
+# Tamanho de cada pedaço lido do arquivo
+TAMANHO_PEDACO = 1 << 20
+
+# Alguns padrões clássicos, para não precisar de arquivo (nome -> RLE)
+PADROES = {
+    "glider": "x = 3, y = 3\nbo$2bo$3o!",
+    "r_pentomino": "x = 3, y = 3\nb2o$2o$bo!",
+    "acorn": "x = 7, y = 3\nbo5b$3bo3b$2o2b3o!",
+    "diehard": "x = 8, y = 3\n6bob$2o6b$bo3b3o!",
+    "gosper": (
+        "x = 36, y = 9, rule = B3/S23\n"
+        "24bo11b$22bobo11b$12b2o6b2o12b2o$11bo3bo4b2o12b2o$2o8bo5bo3b2o14b$"
+        "2o8bo3bob2o4bobo11b$10bo5bo7bo11b$11bo3bo20b$12b2o22b!"
+    ),
+}
+
+# Espaços no meio do corpo do RLE não são células
+_ESPACOS = b" \t\r\n\v\f"
+
+_CABECALHO_RLE = re.compile(rb"x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)(?:\s*,\s*rule\s*=\s*([^\s,]+))?", re.I)
+
+
+class Padrao:
+    def __init__(self, xs, ys, largura=None, altura=None, regra=None, nome=None):
+        # Coordenadas das células vivas (coluna, linha), começando em (0, 0)
+        self.xs = np.asarray(xs, dtype=np.int64)
+        self.ys = np.asarray(ys, dtype=np.int64)
+        self.largura = largura if largura is not None else int(self.xs.max() + 1 if self.xs.size else 0)
+        self.altura = altura if altura is not None else int(self.ys.max() + 1 if self.ys.size else 0)
+        self.regra = regra
+        self.nome = nome
+
+    def populacao(self):
+        return self.xs.size
+
+    def colocar(self, grade, x=None, y=None):
+        # Escreve o padrão na matriz com o canto em (x, y); sem x/y fica centralizado.
+        # O que cair fora do interior (bordas mortas) é cortado.
+        altura, largura = grade.shape
+        if x is None: x = (largura - self.largura) // 2
+        if y is None: y = (altura - self.altura) // 2
+        xs = self.xs + x
+        ys = self.ys + y
+        dentro = (xs >= 1) & (xs < largura - 1) & (ys >= 1) & (ys < altura - 1)
+        grade[ys[dentro], xs[dentro]] = 1
+        return grade
+
+
+def _decodificar_rle(corpo, x, y):
+    # Decodifica um pedaço do corpo do RLE (sem quebras de linha) a partir da posição (x, y).
+    # Devolve as coordenadas vivas, a posição final e se achou o '!'.
+    texto = np.frombuffer(corpo, dtype=np.uint8)
+    digito = (texto >= ord("0")) & (texto <= ord("9"))
+    pos_tags = np.flatnonzero(~digito)
+    if pos_tags.size == 0:
+        return None, x, y, False
+    tags = texto[pos_tags]
+
+    # O número antes de cada tag (sem número = 1): cada dígito vale d * 10^(distância até a tag - 1)
+    pos_digitos = np.flatnonzero(digito)
+    dono = np.searchsorted(pos_tags, pos_digitos)
+    validos = dono < pos_tags.size
+    pos_digitos, dono = pos_digitos[validos], dono[validos]
+    valores = (texto[pos_digitos] - ord("0")).astype(np.int64) * 10 ** (pos_tags[dono] - pos_digitos - 1)
+    cont = np.ones(pos_tags.size, dtype=np.int64)
+    tem_numero = np.zeros(pos_tags.size, dtype=bool)
+    tem_numero[dono] = True
+    cont[tem_numero] = 0
+    np.add.at(cont, dono, valores)
+
+    terminou = False
+    fim = np.flatnonzero(tags == ord("!"))
+    if fim.size:
+        tags, cont, terminou = tags[:fim[0]], cont[:fim[0]], True
+
+    nova_linha = tags == ord("$")
+    passo_x = np.where(nova_linha, 0, cont)
+    passo_y = np.where(nova_linha, cont, 0)
+
+    # Coluna de cada token: quanto andou desde o último '$' (ou desde o x de entrada)
+    andado = np.cumsum(passo_x) - passo_x
+    indices = np.where(nova_linha, np.arange(tags.size), -1)
+    ultimo = np.maximum.accumulate(indices) if tags.size else indices
+    xs_token = np.where(ultimo >= 0, andado - andado[np.maximum(ultimo, 0)], x + andado)
+    ys_token = y + np.cumsum(passo_y) - passo_y
+
+    # Expande cada "corrida" de vivas nas células dela. Viva é 'o' (e as letras A a X
+    # dos padrões com vários estados); 'b', '.' e o resto são mortas, só andam o x
+    vivas = (tags == ord("o")) | ((tags >= ord("A")) & (tags <= ord("X")))
+    n = cont[vivas]
+    inicio_corrida = np.cumsum(n) - n
+    dentro_corrida = np.arange(n.sum()) - np.repeat(inicio_corrida, n)
+    xs = np.repeat(xs_token[vivas], n) + dentro_corrida
+    ys = np.repeat(ys_token[vivas], n)
+
+    # Onde o próximo pedaço continua
+    if tags.size:
+        y += int(passo_y.sum())
+        total = int(passo_x.sum())
+        x = total - int(andado[ultimo[-1]]) if ultimo[-1] >= 0 else x + total
+    return (xs, ys), x, y, terminou
+
+def _ler_rle(linhas, nome=None):
+    # 'linhas' é qualquer iterável de linhas em bytes (arquivo aberto ou texto quebrado)
+    largura = altura = regra = None
+    pedacos = []
+    xs, ys = [], []
+    x = y = 0
+    sobra = b""
+    tamanho = 0
+
+    for linha in linhas:
+        linha = linha.strip()
+        if not linha or linha.startswith(b"#"):
+            continue
+        if largura is None and not pedacos:
+            cab = _CABECALHO_RLE.match(linha)
+            if cab:
+                largura, altura = int(cab.group(1)), int(cab.group(2))
+                regra = cab.group(3).decode() if cab.group(3) else None
+                continue
+        linha = linha.translate(None, _ESPACOS)
+        pedacos.append(linha)
+        tamanho += len(linha)
+        if tamanho < TAMANHO_PEDACO:
+            continue
+
+        # Um número pode ter ficado cortado no fim do pedaço: guardo para o próximo
+        corpo = sobra + b"".join(pedacos)
+        corte = len(corpo.rstrip(b"0123456789"))
+        corpo, sobra = corpo[:corte], corpo[corte:]
+        pedacos, tamanho = [], 0
+        vivos, x, y, terminou = _decodificar_rle(corpo, x, y)
+        if vivos is not None:
+            xs.append(vivos[0])
+            ys.append(vivos[1])
+        if terminou:
+            break
+    else:
+        vivos, x, y, _ = _decodificar_rle(sobra + b"".join(pedacos), x, y)
+        if vivos is not None:
+            xs.append(vivos[0])
+            ys.append(vivos[1])
+
+    xs = np.concatenate(xs) if xs else np.zeros(0, dtype=np.int64)
+    ys = np.concatenate(ys) if ys else np.zeros(0, dtype=np.int64)
+    # Cabeçalho com tamanho 0 (acontece em arquivo gerado por programa) = calculo pelas células
+    return Padrao(xs, ys, largura or None, altura or None, regra, nome)
+
+def _ler_plaintext(linhas, nome=None):
+    # Formato .cells: '!' é comentário, '.' morta, 'O' (ou '*') viva
+    xs, ys = [], []
+    y = 0
+    largura = 0
+    for linha in linhas:
+        linha = linha.rstrip(b"\r\n")
+        if linha.startswith(b"!"):
+            continue
+        celulas = np.frombuffer(linha, dtype=np.uint8)
+        colunas = np.flatnonzero((celulas == ord("O")) | (celulas == ord("*")))
+        xs.append(colunas)
+        ys.append(np.full(colunas.size, y, dtype=np.int64))
+        largura = max(largura, len(linha))
+        y += 1
+
+    xs = np.concatenate(xs).astype(np.int64) if xs else np.zeros(0, dtype=np.int64)
+    ys = np.concatenate(ys) if ys else np.zeros(0, dtype=np.int64)
+    return Padrao(xs, ys, largura, y, None, nome)
+
+
+def ler_padrao_texto(texto, nome=None):
+    # Mesmo formato dos arquivos, mas a partir de uma string (RLE ou plaintext)
+    dados = texto.encode() if isinstance(texto, str) else texto
+    linhas = dados.splitlines()
+    if any(_CABECALHO_RLE.match(l.strip()) for l in linhas[:50] if not l.startswith(b"#")):
+        return _ler_rle(linhas, nome)
+    return _ler_plaintext(linhas, nome)
+
+def carregar_padrao(origem):
+    # 'origem' pode ser o nome de um padrão embutido (PADROES) ou o caminho de um arquivo
+    if origem in PADROES:
+        return ler_padrao_texto(PADROES[origem], origem)
+
+    nome = os.path.splitext(os.path.basename(origem))[0]
+    with open(origem, "rb") as f:
+        if origem.lower().endswith((".cells", ".txt")):
+            return _ler_plaintext(f, nome)
+        return _ler_rle(f, nome)
+
+
+def montar_grade(largura, altura, colocacoes, dtype=np.uint8):
+    # Monta a matriz inicial já no tamanho final, só escrevendo as células vivas.
+    # colocacoes: lista de (padrão, x, y); x/y None = centralizado
+    grade = np.zeros((altura, largura), dtype=dtype)
+    for padrao, x, y in colocacoes:
+        if not isinstance(padrao, Padrao):
+            padrao = carregar_padrao(padrao)
+        padrao.colocar(grade, x, y)
+    return grade
+
+def grade_com_padrao(largura, altura, padrao, dtype=np.uint8):
+    # Atalho: um padrão só, centralizado
+    return montar_grade(largura, altura, [(padrao, None, None)], dtype)
+
+
+def criar_grade(largura, altura, prob_viva=0.2, grade_inicial=None):
+    # Matriz inicial dos motores: a grade_inicial (ex: montada com montar_grade), se
+    # tiver, senão a aleatória de sempre (a seed fica por conta de quem chama)
+    if grade_inicial is None:
+        return np.random.choice([0, 1], size=(altura, largura), p=[1 - prob_viva, prob_viva]).astype(np.uint8)
+    if grade_inicial.shape != (altura, largura):
+        raise ValueError(f"grade_inicial é {grade_inicial.shape[1]}x{grade_inicial.shape[0]}, "
+                         f"esperado {largura}x{altura}")
+    return grade_inicial.astype(np.uint8, copy=True)
+
+
+if __name__ == "__main__":
+    # Teste rápido
+    for nome in PADROES:
+        p = carregar_padrao(nome)
+        print(f"{nome:<12} {p.largura}x{p.altura}  vivas: {p.populacao()}")
+    # '.' também é morta e espaço no meio do corpo não conta
+    for texto, esperado in (("x = 3, y = 1\n2.o!", [2]), ("x = 3, y = 1\nb o b!", [1]),
+                            ("x = 3, y = 1\n.A.!", [1])):
+        p = ler_padrao_texto(texto)
+        assert p.xs.tolist() == esperado and p.ys.tolist() == [0], (texto, p.xs, p.ys)
+    print("RLE com '.', letras e espaços: ok")
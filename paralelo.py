@@ -1,65 +1,117 @@
 import threading
+import itertools
 import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
 import numpy as np
 
-# Função principal Jogo da Vida.
-# Eu uso NumPy aqui para não precisar fazer 2 loops for (o que seria lento demais em Python).
-def atualizar_faixa_numpy(grade, nova_grade, linha_inicio, linha_fim):
-    altura, largura = grade.shape
+# O núcleo (e a versão com tiles ativos) fica no sequencial, eu só reaproveito aqui
+from regras import ler_regra
+from sequencial import criar_nucleo, atualizar_faixa_tiles, criar_mapa_tiles, expandir_ativos
+from sequencial import atualizar_fantasmas, atualizar_colunas_fantasmas, atualizar_linhas_fantasmas, volta_tiles
+from sequencial import DetectorCiclos, hash_grade, mostrar_ciclo
+from persistencia import Checkpoint, persistir, restaurar, retomar_se_existir
+from padroes import criar_grade
 
-    # Verificações básicas para não dar erro de índice
-    if largura <= 2 or altura <= 2: return False
-    if linha_inicio < 1: linha_inicio = 1
-    if linha_fim > altura - 1: linha_fim = altura - 1
-    if linha_fim <= linha_inicio: return False
 
-    # Pego só o meio da matriz (sem as bordas)
-    interior_atual = grade[linha_inicio:linha_fim, 1:-1]
+def dividir_faixas(altura, n_partes):
+    # Divide a matriz em fatias iguais (threads ou processos)
+    linhas = max(1, altura - 2)
+    qnt = linhas // n_partes
+    resto = linhas % n_partes
+    faixas = []
+    ini = 1
+    for i in range(n_partes):
+        tam = qnt + (1 if i < resto else 0)
+        fim = ini + tam
+        if fim > altura - 1: fim = altura - 1
+        faixas.append((ini, fim))
+        ini = fim
+    return faixas
 
-    # Pego a matriz inteira e desloco ela nas 8 direções. Somando tudo, tenho os vizinhos de todo mundo de uma vez.
-    acima = grade[linha_inicio - 1:linha_fim - 1, :]
-    meio = grade[linha_inicio:linha_fim, :]
-    abaixo = grade[linha_inicio + 1:linha_fim + 1, :]
+# --- Blocos 2D ---
+# Faixas horizontais são simples, mas cada parte tem fantasmas do tamanho da largura
+# inteira. Dividindo em px x py blocos, o que cada parte troca com as vizinhas cai de
+# 2 x largura para 2 x (largura/px + altura/py), mais os 4 cantos (que os vizinhos da
+# diagonal calculam). E dá para ter mais partes que linhas.
+#
+# Só que bloco custa mais que faixa por si só: as linhas que o núcleo percorre ficam
+# mais curtas (2x2 numa 1000x1000 deu uns 10% a mais de cálculo) e a fatia deixa de ser
+# contígua (cópia para mandar e para receber). Então, quando ninguém troca fantasmas
+# (threads, que dividem a mesma matriz, ou o distribuído sem halo, que manda o bloco
+# inteiro toda geração), fico com as faixas enquanto tiver uma linha para cada parte.
+# Com troca (halo), só vou para os blocos se a fronteira cair pelo menos MARGEM_BLOCOS.
 
-    vizinhos = (
-        acima[:, 0:-2] + acima[:, 1:-1] + acima[:, 2:] +
-        meio[:, 0:-2] +                   meio[:, 2:] +
-        abaixo[:, 0:-2] + abaixo[:, 1:-1] + abaixo[:, 2:]
-    )
+MARGEM_BLOCOS = 0.25
 
-    # Regras do jogo usando 0/1
-    vivas = (interior_atual == 1)
-    mortas = (interior_atual == 0)
+def escolher_particao(largura, altura, n_partes, troca=True):
+    # (px, py) com px * py = n_partes e a menor fronteira entre as partes: a soma dos
+    # meios perímetros dos blocos é py * colunas + px * linhas. Empate fica com o menor
+    # px; e as faixas (1, n), que são linhas contíguas, ganham se os blocos não valerem
+    # a pena (ver acima). Quem chama garante n_partes <= max(linhas, colunas)
+    linhas, colunas = max(1, altura - 2), max(1, largura - 2)
+    def fronteira(px, py):
+        return py * colunas + px * linhas
 
-    # Regra 1: Continua viva se tem 2 ou 3 vizinhos
-    sobrevive = vivas & ((vizinhos == 2) | (vizinhos == 3))
-    
-    # Regra 2: Nasce se tiver 3 vizinhos
-    nasce = mortas & (vizinhos == 3)
-
-    # Junta tudo e converte para 0 ou 1
-    interior_novo = np.where(sobrevive | nasce, 1, 0)
-
-    # Joga o resultado na nova matriz
-    nova_grade[linha_inicio:linha_fim, 1:-1] = interior_novo
+    opcoes = [(px, n_partes // px) for px in range(1, n_partes + 1)
+              if n_partes % px == 0 and px <= colunas and n_partes // px <= linhas]
+    faixas = (1, n_partes)
+    if not opcoes:
+        return faixas
+    melhor = min(opcoes, key=lambda p: fronteira(*p))
+    if n_partes <= linhas and (not troca or fronteira(*melhor) > (1 - MARGEM_BLOCOS) * fronteira(*faixas)):
+        return faixas
+    return melhor
 
-    # Retorna se mudou alguma coisa (para saber se o jogo estagnou)
-    return not np.array_equal(interior_novo, interior_atual)
+def dividir_blocos(largura, altura, particao):
+    # Blocos (ini, fim, col_ini, col_fim) por linha de blocos, da esquerda para a direita.
+    # As colunas se dividem igual às linhas (a moldura também fica de fora)
+    px, py = particao
+    colunas = dividir_faixas(largura, px)
+    return [(ini, fim, c0, c1) for ini, fim in dividir_faixas(altura, py) for c0, c1 in colunas]
 
 
 class VidaParalela:
-    def __init__(self, largura, altura, num_threads, prob_viva=0.2):
+    def __init__(self, largura, altura, num_threads, prob_viva=0.2, tam_tile=None, tam_bloco=None, janela_ciclos=0,
+                 checkpoint=None, fluxo=None, grade_inicial=None, tipo_nucleo="soma", regra=None,
+                 toroidal=False, medidor=None, dividir_2d=True):
         # Seed fixa para garantir que o teste seja igual sempre
         np.random.seed(42)
         self.largura = largura
         self.altura = altura
+        self.regra = ler_regra(regra)
+
+        # Instrumentação (ver instrumentacao.py): cada thread mede o próprio cálculo e a
+        # espera na barreira; o principal mede a espera, a junção e a estagnação
+        self.medidor = medidor
+
+        # Modo toroidal: cada thread refaz as colunas fantasma das linhas que calculou,
+        # e o principal só as 2 linhas fantasma, com todo mundo parado na barreira
+        self.toroidal = toroidal
+
+        # Detecção de osciladores e persistência, igual ao sequencial
+        self.janela_ciclos = janela_ciclos
+        self.ciclo = None
+        self.geracao = 0
+        self.checkpoint = checkpoint
+        self.fluxo = fluxo
+
+        # Mapa de tiles compartilhado entre as threads (cada uma marca os tiles da sua faixa)
+        self.tam_tile = tam_tile
+        if tam_tile:
+            self.ativos = criar_mapa_tiles(altura, largura, tam_tile)
+            self.alterados = np.zeros_like(self.ativos)
+            self.volta = volta_tiles(altura, largura, tam_tile) if toroidal else None
         
-        # Não deixo criar mais threads que linhas para não dar erro
+        # Não deixo criar mais threads que linhas para não dar erro (com blocos 2D, que
+        # só entram com tiles e roubo de blocos desligados, o limite é o lado maior)
         linhas = max(1, altura - 2)
+        if dividir_2d and not tam_tile and not tam_bloco:
+            linhas = max(linhas, largura - 2)
         self.num_threads = max(1, min(num_threads, linhas))
 
-        # Cria matriz aleatória (0=morto, 1=vivo)
-        self.grade = np.random.choice([0, 1], size=(altura, largura), p=[1 - prob_viva, prob_viva])
+        # Cria matriz aleatória (0=morto, 1=vivo), ou usa a grade_inicial
+        self.grade = criar_grade(largura, altura, prob_viva, grade_inicial)
         
         # Zera as bordas para facilitar o cálculo
         self._zerar_bordas()
@@ -75,32 +127,51 @@ class VidaParalela:
         self.stop_event = threading.Event()
 
         self.mudou_locais = [False] * self.num_threads
+        # Cada thread tem o seu núcleo (a memória de trabalho não pode ser dividida)
+        self.tipo_nucleo = tipo_nucleo
+        self.nucleos = [criar_nucleo(tipo_nucleo, self.regra) for _ in range(self.num_threads)]
+
+        # dividir_2d=True: px x py escolhido pelo formato da matriz (ver escolher_particao).
+        # Aqui ninguém troca fantasmas, então só vira bloco com mais threads que linhas.
+        # Tiles e roubo de blocos continuam por faixas (o mapa de tiles já é 2D e a fila de
+        # blocos já tem a granularidade dela)
+        self.particao = (1, self.num_threads)
+        if dividir_2d and not tam_tile and not tam_bloco:
+            self.particao = escolher_particao(largura, altura, self.num_threads, troca=False)
         self.faixas = self._dividir_faixas()
+
+        # Balanceamento (roubo de trabalho): com tam_bloco, em vez de cada thread ficar
+        # presa na sua faixa, as linhas viram blocos pequenos numa "fila" e cada thread
+        # pega o próximo bloco livre. Quem pegou a parte parada da matriz termina rápido
+        # e vai ajudar quem pegou a parte cheia de células vivas.
+        self.tam_bloco = tam_bloco
+        if tam_bloco:
+            self.blocos = [(ini, min(ini + tam_bloco, altura - 1)) for ini in range(1, altura - 1, tam_bloco)]
+            self._proximo_bloco = itertools.count()
         self.threads = []
         self._start_threads()
 
     def _zerar_bordas(self):
+        # No modo toroidal a moldura vira cópia do lado oposto (ver sequencial.py)
+        if self.toroidal:
+            atualizar_fantasmas(self.grade)
+            return
         self.grade[0, :] = 0
         self.grade[-1, :] = 0
         self.grade[:, 0] = 0
         self.grade[:, -1] = 0
 
     def _dividir_faixas(self):
-        # Divide a matriz em fatias iguais para as threads
-        linhas = max(1, self.altura - 2)
-        qnt = linhas // self.num_threads
-        resto = linhas % self.num_threads
-        faixas = []
-        ini = 1
-        for i in range(self.num_threads):
-            tam = qnt + (1 if i < resto else 0)
-            fim = ini + tam
-            if fim > self.altura - 1: fim = self.altura - 1
-            faixas.append((ini, fim))
-            ini = fim
-        return faixas
+        # Sempre blocos (ini, fim, col_ini, col_fim); nas faixas as colunas são todas
+        return dividir_blocos(self.largura, self.altura, self.particao)
 
-    def _trabalho_thread(self, id_t, ini, fim):
+    def carregar_checkpoint(self, caminho):
+        # As threads estão paradas na barreira, posso escrever na matriz
+        restaurar(self, caminho)
+
+    def _trabalho_thread(self, id_t, ini, fim, c0, c1):
+        medidor = self.medidor
+        origem = f"thread {id_t}"
         while True:
             try:
                 # 1. Espera o sinal para começar
@@ -112,18 +183,49 @@ class VidaParalela:
                 except: pass
                 break
 
-            # 2. Trabalha só no pedaço dele
-            # Reuso a mesma função do sequencial aqui
-            self.mudou_locais[id_t] = atualizar_faixa_numpy(self.grade, self.nova_grade, ini, fim)
+            # 2. Trabalha só no pedaço dele (ou vai pegando blocos da fila)
+            if medidor is not None: t = time.perf_counter()
+            if self.tam_bloco:
+                self.mudou_locais[id_t] = self._roubar_blocos(self.nucleos[id_t])
+            else:
+                self.mudou_locais[id_t] = self._calcular_linhas(self.nucleos[id_t], ini, fim, c0, c1)
+            if medidor is not None: t = medidor.desde("calculo", t, origem)
 
             try:
                 # 3. Espera os outros terminarem
                 self.barreira_fim.wait()
             except: break
+            if medidor is not None: medidor.desde("espera", t, origem)
+
+    def _calcular_linhas(self, nucleo, ini, fim, c0=1, c1=None):
+        # Reuso o mesmo núcleo do sequencial aqui
+        if c1 is not None and (c0 > 1 or c1 < self.largura - 1):
+            # Bloco 2D: as colunas fantasma ficam para o principal (são de dois blocos)
+            return bool(nucleo.calcular_bloco(self.grade, self.nova_grade, ini, fim, c0, c1).any())
+        if self.tam_tile:
+            atualizar_faixa_tiles(self.grade, self.nova_grade, ini, fim,
+                                  self.ativos, self.alterados, self.tam_tile, nucleo=nucleo)
+            mudou = False # com tiles quem diz se mudou é o mapa 'alterados'
+        else:
+            mudou = nucleo.atualizar(self.grade, self.nova_grade, ini, fim)
+        if self.toroidal:
+            atualizar_colunas_fantasmas(self.nova_grade, ini, fim)
+        return mudou
+
+    def _roubar_blocos(self, nucleo):
+        mudou = False
+        while True:
+            # next() de um itertools.count é atômico no CPython, então duas threads
+            # nunca pegam o mesmo bloco
+            b = next(self._proximo_bloco)
+            if b >= len(self.blocos):
+                return mudou
+            ini, fim = self.blocos[b]
+            mudou = self._calcular_linhas(nucleo, ini, fim) or mudou
 
     def _start_threads(self):
-        for i, (ini, fim) in enumerate(self.faixas):
-            t = threading.Thread(target=self._trabalho_thread, args=(i, ini, fim))
+        for i, bloco in enumerate(self.faixas):
+            t = threading.Thread(target=self._trabalho_thread, args=(i, *bloco))
             t.start()
             self.threads.append(t)
 
@@ -136,40 +238,290 @@ class VidaParalela:
         for t in self.threads: t.join()
 
     def atualizar(self):
+        # Limpo o mapa antes de liberar as threads (elas só marcam True)
+        if self.tam_tile:
+            self.alterados[:] = False
+
+        # Fila de blocos nova para essa geração
+        if self.tam_bloco:
+            self._proximo_bloco = itertools.count()
+
+        medidor = self.medidor
+        if medidor is not None: t = time.perf_counter()
         try:
             self.barreira_inicio.wait() # Libera threads
             self.barreira_fim.wait()    # Espera threads
         except: return False
+        if medidor is not None: t = medidor.desde("espera", t)
 
-        # Garante bordas zeradas na nova também
-        self._zerar_bordas()
+        mudou = bool(self.alterados.any()) if self.tam_tile else any(self.mudou_locais)
+        if medidor is not None: t = medidor.desde("estagnacao", t)
+
+        if self.toroidal and self.particao[0] > 1:
+            # Blocos 2D: as colunas fantasma também ficam aqui
+            atualizar_fantasmas(self.nova_grade)
+        elif self.toroidal:
+            # As colunas fantasma as threads já fizeram, falta só as linhas
+            atualizar_linhas_fantasmas(self.nova_grade)
+        else:
+            # Garante bordas zeradas na nova também
+            self._zerar_bordas()
         
-        mudou = any(self.mudou_locais)
+        if self.tam_tile:
+            # Todo mundo já terminou, então posso montar os ativos da próxima geração
+            self.ativos = expandir_ativos(self.alterados, self.volta)
         
         # Troca as matrizes (o novo vira o atual)
         self.grade, self.nova_grade = self.nova_grade, self.grade
+        self.geracao += 1
+        if medidor is not None: medidor.desde("juncao", t)
         return mudou
 
     def simular(self, iteracoes):
-        reais = 0
-        try:
-            for it in range(iteracoes):
-                if not self.atualizar(): break
-                reais = it + 1
-        finally:
-            self._parar_tudo()
-        return reais
-
-def executar_simulacao_paralela(largura, altura, iteracoes, num_threads, prob_viva=0.2):
+        return simular_com_ciclos(self, iteracoes)
+
+
+def simular_com_ciclos(sim, iteracoes):
+    # Mesmo laço do sequencial (para quando não muda ou quando entra num ciclo),
+    # e no final sempre paro as threads/processos
+    detector = DetectorCiclos(sim.janela_ciclos) if sim.janela_ciclos else None
+    medidor = sim.medidor
+    reais = 0
+    try:
+        if detector:
+            detector.registrar(sim.geracao, hash_grade(sim.grade))
+        if sim.fluxo is not None:
+            sim.fluxo.enviar(sim.geracao, sim.grade)
+        for it in range(iteracoes):
+            if not sim.atualizar(): break
+            reais = it + 1
+            persistir(sim)
+            if detector:
+                # O hash é feito aqui no principal, com todo mundo parado na barreira
+                if medidor is not None: t = time.perf_counter()
+                sim.ciclo = detector.registrar(sim.geracao, hash_grade(sim.grade))
+                if medidor is not None: medidor.desde("estagnacao", t)
+                if sim.ciclo: break
+    finally:
+        sim._parar_tudo()
+    return reais
+
+def executar_simulacao_paralela(largura, altura, iteracoes, num_threads, prob_viva=0.2, tam_tile=None, tam_bloco=None,
+                                janela_ciclos=0, checkpoint=None, checkpoint_a_cada=100, grade_inicial=None,
+                                tipo_nucleo="soma", regra=None, toroidal=False, medidor=None, dividir_2d=True):
     print(f"--- Simulação paralela {largura}x{altura} com {num_threads} threads ---")
     t0 = time.perf_counter()
-    sim = VidaParalela(largura, altura, num_threads, prob_viva)
-    reais = sim.simular(iteracoes)
+    sim = VidaParalela(largura, altura, num_threads, prob_viva, tam_tile=tam_tile, tam_bloco=tam_bloco,
+                       janela_ciclos=janela_ciclos, grade_inicial=grade_inicial, tipo_nucleo=tipo_nucleo, regra=regra,
+                       toroidal=toroidal, medidor=medidor, dividir_2d=dividir_2d,
+                       checkpoint=Checkpoint(checkpoint, checkpoint_a_cada) if checkpoint else None)
+    if sim.particao[0] > 1:
+        print(f"  Blocos:    {sim.particao[0]}x{sim.particao[1]}")
+    retomar_se_existir(sim)
+    reais = sim.simular(iteracoes - sim.geracao)
     t1 = time.perf_counter()
     tempo = t1 - t0
     print(f"  Iterações: {iteracoes} (feitas: {reais})")
+    mostrar_ciclo(sim.ciclo)
     print(f"  Tempo:     {tempo:.4f} s")
-    return tempo
+    if medidor is not None: medidor.mostrar()
+    return tempo, reais, sim.ciclo
+
+# --- VERSÃO COM PROCESSOS ---
+# As threads ficam presas no GIL (muitas operações pequenas do NumPy), então o speedup
+# trava em ~2x. Aqui cada faixa roda num processo separado, e as duas matrizes ficam em
+# memória compartilhada: ninguém serializa nada por geração, só sincroniza nas barreiras.
+
+def _trabalho_processo(id_p, ini, fim, nomes, forma, dtype, nome_controle,
+                       barreira_inicio, barreira_fim, tipo_nucleo="soma", regra=None, toroidal=False,
+                       nome_tempos=None):
+    # Cada processo "pendura" as mesmas matrizes do processo principal
+    memorias = [shared_memory.SharedMemory(name=nome) for nome in nomes]
+    controle_mem = shared_memory.SharedMemory(name=nome_controle)
+    matrizes = [np.ndarray(forma, dtype=dtype, buffer=m.buf) for m in memorias]
+
+    # controle[0] = pedido de parada, controle[1 + id] = se a faixa mudou
+    controle = np.ndarray((controle_mem.size,), dtype=np.uint8, buffer=controle_mem.buf)
+
+    # Com instrumentação, tempos[id] = quanto o cálculo dessa geração demorou
+    tempos_mem = shared_memory.SharedMemory(name=nome_tempos) if nome_tempos else None
+    tempos = np.ndarray((tempos_mem.size // 8,), dtype=np.float64, buffer=tempos_mem.buf) if tempos_mem else None
+
+    # A regra vem como texto (a Regra é refeita aqui, uma vez por processo)
+    nucleo = criar_nucleo(tipo_nucleo, regra)
+    atual = 0
+    try:
+        while True:
+            # 1. Espera o sinal para começar
+            barreira_inicio.wait()
+            if controle[0]:
+                break
+
+            # 2. Trabalha só no pedaço dele (lê de uma matriz e escreve na outra)
+            if tempos is not None: t = time.perf_counter()
+            controle[1 + id_p] = nucleo.atualizar(matrizes[atual], matrizes[1 - atual], ini, fim)
+            if toroidal:
+                atualizar_colunas_fantasmas(matrizes[1 - atual], ini, fim)
+            if tempos is not None: tempos[id_p] = time.perf_counter() - t
+
+            # 3. Espera os outros terminarem e troca as matrizes (igual o principal faz)
+            barreira_fim.wait()
+            atual = 1 - atual
+    finally:
+        del matrizes, controle, tempos
+        for m in memorias: m.close()
+        controle_mem.close()
+        if tempos_mem: tempos_mem.close()
+
+
+class VidaProcessos:
+    def __init__(self, largura, altura, num_processos, prob_viva=0.2, janela_ciclos=0, checkpoint=None, fluxo=None,
+                 grade_inicial=None, tipo_nucleo="soma", regra=None, toroidal=False, medidor=None):
+        # Seed fixa para garantir que o teste seja igual sempre
+        np.random.seed(42)
+        self.largura = largura
+        self.altura = altura
+        self.regra = ler_regra(regra)
+        self.toroidal = toroidal
+        self.medidor = medidor
+        self.janela_ciclos = janela_ciclos
+        self.ciclo = None
+        self.geracao = 0
+        self.checkpoint = checkpoint
+        self.fluxo = fluxo
+        self.tipo_nucleo = tipo_nucleo
+
+        # Não deixo criar mais processos que linhas para não dar erro
+        linhas = max(1, altura - 2)
+        self.num_processos = max(1, min(num_processos, linhas))
+
+        # Cria matriz aleatória (0=morto, 1=vivo), ou usa a grade_inicial
+        inicial = criar_grade(largura, altura, prob_viva, grade_inicial)
+
+        # As duas matrizes (atual e próxima) vivem em memória compartilhada
+        self.memorias = [shared_memory.SharedMemory(create=True, size=max(1, inicial.nbytes)) for _ in range(2)]
+        self.controle_mem = shared_memory.SharedMemory(create=True, size=self.num_processos + 1)
+        self.grade, self.nova_grade = [np.ndarray(inicial.shape, dtype=inicial.dtype, buffer=m.buf) for m in self.memorias]
+        self.controle = np.ndarray((self.num_processos + 1,), dtype=np.uint8, buffer=self.controle_mem.buf)
+        self.grade[:] = inicial
+        self.nova_grade[:] = 0
+        self.controle[:] = 0
+
+        # Instrumentação: os processos escrevem o tempo de cálculo aqui (só se tiver medidor)
+        self.tempos_mem = None
+        if medidor is not None:
+            self.tempos_mem = shared_memory.SharedMemory(create=True, size=8 * self.num_processos)
+            self.tempos = np.ndarray((self.num_processos,), dtype=np.float64, buffer=self.tempos_mem.buf)
+
+        # Zera as bordas para facilitar o cálculo
+        self._zerar_bordas()
+
+        # Mesmas barreiras da versão com threads, só que entre processos
+        self.barreira_inicio = mp.Barrier(self.num_processos + 1)
+        self.barreira_fim = mp.Barrier(self.num_processos + 1)
+
+        self.faixas = dividir_faixas(self.altura, self.num_processos)
+        self.processos = []
+        self._start_processos()
+
+    def _zerar_bordas(self):
+        if self.toroidal:
+            atualizar_fantasmas(self.grade)
+            return
+        self.grade[0, :] = 0
+        self.grade[-1, :] = 0
+        self.grade[:, 0] = 0
+        self.grade[:, -1] = 0
+
+    def carregar_checkpoint(self, caminho):
+        # Escrevo direto na memória compartilhada (os processos leem dela na próxima geração)
+        restaurar(self, caminho)
+
+    def _start_processos(self):
+        nomes = [m.name for m in self.memorias]
+        for i, (ini, fim) in enumerate(self.faixas):
+            p = mp.Process(target=_trabalho_processo,
+                           args=(i, ini, fim, nomes, self.grade.shape, self.grade.dtype,
+                                 self.controle_mem.name, self.barreira_inicio, self.barreira_fim, self.tipo_nucleo,
+                                 self.regra.texto, self.toroidal, self.tempos_mem.name if self.tempos_mem else None),
+                           daemon=True)
+            p.start()
+            self.processos.append(p)
+
+    def _parar_tudo(self):
+        if self.processos:
+            self.controle[0] = 1
+            try:
+                self.barreira_inicio.wait(timeout=10)
+            except: pass
+            for p in self.processos:
+                p.join(timeout=10)
+                if p.is_alive(): p.terminate()
+            self.processos = []
+
+        # Solto a memória compartilhada (só o principal apaga)
+        if self.memorias:
+            del self.grade, self.nova_grade, self.controle
+            extras = [self.controle_mem]
+            if self.tempos_mem:
+                del self.tempos
+                extras.append(self.tempos_mem)
+            for m in self.memorias + extras:
+                m.close()
+                m.unlink()
+            self.memorias = []
+
+    def atualizar(self):
+        medidor = self.medidor
+        if medidor is not None: t = time.perf_counter()
+        try:
+            self.barreira_inicio.wait() # Libera processos
+            self.barreira_fim.wait()    # Espera processos
+        except: return False
+        if medidor is not None:
+            espera = time.perf_counter() - t
+            medidor.registrar("espera", espera)
+            # Cada processo: o cálculo que ele mediu, e o resto da geração ele ficou na barreira
+            for i, calculo in enumerate(self.tempos.tolist()):
+                medidor.registrar("calculo", calculo, f"processo {i}")
+                medidor.registrar("espera", max(0.0, espera - calculo), f"processo {i}")
+            t = time.perf_counter()
+
+        mudou = bool(self.controle[1:].any())
+        if medidor is not None: t = medidor.desde("estagnacao", t)
+        if self.toroidal:
+            # Os processos já fizeram as colunas fantasma das faixas deles
+            atualizar_linhas_fantasmas(self.nova_grade)
+
+        # Troca as matrizes (o novo vira o atual)
+        self.grade, self.nova_grade = self.nova_grade, self.grade
+        self.geracao += 1
+        if medidor is not None: medidor.desde("juncao", t)
+        return mudou
+
+    def simular(self, iteracoes):
+        return simular_com_ciclos(self, iteracoes)
+
+def executar_simulacao_processos(largura, altura, iteracoes, num_processos, prob_viva=0.2, janela_ciclos=0,
+                                 checkpoint=None, checkpoint_a_cada=100, grade_inicial=None, tipo_nucleo="soma",
+                                 regra=None, toroidal=False, medidor=None):
+    print(f"--- Simulação paralela {largura}x{altura} com {num_processos} processos ---")
+    t0 = time.perf_counter()
+    sim = VidaProcessos(largura, altura, num_processos, prob_viva, janela_ciclos=janela_ciclos,
+                        grade_inicial=grade_inicial, tipo_nucleo=tipo_nucleo, regra=regra, toroidal=toroidal,
+                        medidor=medidor,
+                        checkpoint=Checkpoint(checkpoint, checkpoint_a_cada) if checkpoint else None)
+    retomar_se_existir(sim)
+    reais = sim.simular(iteracoes - sim.geracao)
+    t1 = time.perf_counter()
+    tempo = t1 - t0
+    print(f"  Iterações: {iteracoes} (feitas: {reais})")
+    mostrar_ciclo(sim.ciclo)
+    print(f"  Tempo:     {tempo:.4f} s")
+    if medidor is not None: medidor.mostrar()
+    return tempo, reais, sim.ciclo
+
 
 if __name__ == "__main__":
-    executar_simulacao_paralela(200, 200, 500, 4)
\ No newline at end of file
+    executar_simulacao_paralela(200, 200, 500, 4, janela_ciclos=64)
+    executar_simulacao_processos(200, 200, 500, 4, janela_ciclos=64)
\ No newline at end of file
@@ -0,0 +1,254 @@
+import os
+import queue
+import struct
+import threading
+import zlib
+import numpy as np
+
+# Salvar e retomar simulações.
+#
+# Checkpoint: um arquivo com um cabeçalho fixo + a matriz empacotada com np.packbits
+# (8 células por byte). A matriz é lida e escrita por np.memmap, de bloco em bloco,
+# então nem para salvar nem para carregar eu preciso da versão empacotada inteira na RAM,
+# e dá pra ler só umas linhas (ex: a faixa de um worker) sem tocar no resto do arquivo.
+#
+# Fluxo: grava as gerações num arquivo só, uma atrás da outra (a matriz inteira ou só o
+# XOR com a anterior, que é quase tudo zero e comprime muito). Quem escreve no disco é uma
+# thread separada, então o laço da simulação só faz uma cópia da matriz e segue.
+
+# Cabeçalho do checkpoint: marca, versão, altura, largura, geração (64 bytes no total)
+CABECALHO_CHECKPOINT = struct.Struct("<4sHxxQQQ")
+TAMANHO_CABECALHO = 64
+MARCA_CHECKPOINT = b"VIDA"
+VERSAO = 1
+
+# Quantas linhas eu empacoto/desempacoto por vez
+LINHAS_POR_BLOCO = 256
+
+
+def _bytes_linha(largura):
+    return (largura + 7) // 8
+
+def salvar_checkpoint(caminho, grade, geracao):
+    altura, largura = grade.shape
+
+    # Escrevo num temporário e só depois troco pelo arquivo de verdade.
+    # Se o processo morrer no meio, o checkpoint anterior continua inteiro.
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as f:
+        f.write(CABECALHO_CHECKPOINT.pack(MARCA_CHECKPOINT, VERSAO, altura, largura, geracao)
+                .ljust(TAMANHO_CABECALHO, b"\0"))
+        f.truncate(TAMANHO_CABECALHO + altura * _bytes_linha(largura))
+
+    if altura:
+        bits = np.memmap(temporario, dtype=np.uint8, mode="r+", offset=TAMANHO_CABECALHO,
+                         shape=(altura, _bytes_linha(largura)))
+        for ini in range(0, altura, LINHAS_POR_BLOCO):
+            fim = min(altura, ini + LINHAS_POR_BLOCO)
+            bits[ini:fim] = np.packbits(grade[ini:fim], axis=1)
+        bits.flush()
+        del bits
+    os.replace(temporario, caminho)
+
+
+class CheckpointVida:
+    # Checkpoint aberto "preguiçoso": só o cabeçalho é lido, as linhas vêm do disco quando pedidas
+
+    def __init__(self, caminho):
+        with open(caminho, "rb") as f:
+            cabecalho = f.read(TAMANHO_CABECALHO)
+        if len(cabecalho) < TAMANHO_CABECALHO:
+            raise ValueError(f"{caminho} não é um checkpoint válido")
+        marca, versao, self.altura, self.largura, self.geracao = CABECALHO_CHECKPOINT.unpack_from(cabecalho)
+        if marca != MARCA_CHECKPOINT or versao != VERSAO:
+            raise ValueError(f"{caminho} não é um checkpoint válido")
+
+        self.caminho = caminho
+        self.bits = np.memmap(caminho, dtype=np.uint8, mode="r", offset=TAMANHO_CABECALHO,
+                              shape=(self.altura, _bytes_linha(self.largura)))
+
+    def linhas(self, ini, fim):
+        # Só as linhas [ini:fim], já desempacotadas (0/1 em uint8)
+        return np.unpackbits(self.bits[ini:fim], axis=1, count=self.largura)
+
+    def copiar_para(self, grade):
+        # Desempacota direto na matriz do motor, de bloco em bloco
+        if grade.shape != (self.altura, self.largura):
+            raise ValueError(f"checkpoint é {self.largura}x{self.altura}, a simulação é "
+                             f"{grade.shape[1]}x{grade.shape[0]}")
+        for ini in range(0, self.altura, LINHAS_POR_BLOCO):
+            fim = min(self.altura, ini + LINHAS_POR_BLOCO)
+            grade[ini:fim] = self.linhas(ini, fim)
+
+    def grade(self):
+        grade = np.empty((self.altura, self.largura), dtype=np.uint8)
+        self.copiar_para(grade)
+        return grade
+
+def abrir_checkpoint(caminho):
+    return CheckpointVida(caminho)
+
+
+class Checkpoint:
+    # Salva a matriz do motor a cada 'a_cada' gerações no mesmo arquivo
+
+    def __init__(self, caminho, a_cada=100):
+        self.caminho = caminho
+        self.a_cada = a_cada
+
+    def precisa(self, geracao):
+        return self.a_cada > 0 and geracao % self.a_cada == 0
+
+    def salvar(self, vida):
+        salvar_checkpoint(self.caminho, vida.grade, vida.geracao)
+
+    def existe(self):
+        return os.path.exists(self.caminho)
+
+
+def restaurar(vida, caminho):
+    # Parte comum de todos os motores: copia a matriz (no lugar, porque threads e
+    # processos estão olhando para ela), acerta a geração e reativa todos os tiles
+    ckpt = abrir_checkpoint(caminho)
+    ckpt.copiar_para(vida.grade)
+    vida.geracao = ckpt.geracao
+    if getattr(vida, "tam_tile", None):
+        vida.ativos = np.ones_like(vida.ativos)
+    return ckpt.geracao
+
+
+# --- Fluxo de gerações ---
+
+# Cabeçalho do arquivo: marca, altura, largura. Cada registro: geração, tipo, tamanho (zlib)
+CABECALHO_FLUXO = struct.Struct("<4sQQ")
+REGISTRO_FLUXO = struct.Struct("<QBI")
+MARCA_FLUXO = b"VIDF"
+REGISTRO_CHAVE = 0  # matriz inteira
+REGISTRO_XOR = 1    # XOR com o registro anterior
+
+
+class GravadorFluxo:
+    def __init__(self, caminho, delta=True, a_cada=1, chave_a_cada=50, buffers=8, descartar=True):
+        # delta=True grava só o XOR com a geração anterior (com uma matriz inteira a cada
+        # 'chave_a_cada' registros, pra não depender de uma corrente enorme)
+        self.caminho = caminho
+        self.delta = delta
+        self.a_cada = a_cada
+        self.chave_a_cada = chave_a_cada
+
+        # Se o disco não der conta e as cópias acabarem, a geração é pulada
+        # (nunca travo a simulação). Os XOR continuam certos: são sempre contra o
+        # último registro que foi gravado, e cada registro diz a geração dele.
+        # Com descartar=False eu espero uma cópia liberar (não perde nenhuma geração).
+        self.descartar = descartar
+        self.descartados = 0
+        self._livres = queue.Queue()
+        for _ in range(buffers):
+            self._livres.put(None)
+        self._fila = queue.Queue()
+        self._arquivo = open(caminho, "wb")
+        self._cabecalho_escrito = False
+        self._thread = threading.Thread(target=self._escrever, daemon=True)
+        self._thread.start()
+
+    def precisa(self, geracao):
+        return self.a_cada > 0 and geracao % self.a_cada == 0
+
+    def enviar(self, geracao, grade):
+        # Chamado pelo laço da simulação: só copia a matriz e põe na fila
+        if not self.precisa(geracao):
+            return
+        try:
+            buf = self._livres.get(block=not self.descartar)
+        except queue.Empty:
+            self.descartados += 1
+            return
+        if buf is None or buf.shape != grade.shape:
+            buf = np.empty(grade.shape, dtype=np.uint8)
+        np.copyto(buf, grade)
+        self._fila.put((geracao, buf))
+
+    def _escrever(self):
+        anterior = None
+        desde_chave = 0
+        while True:
+            item = self._fila.get()
+            if item is None:
+                break
+            geracao, buf = item
+            bits = np.packbits(buf, axis=1)
+            self._livres.put(buf)
+
+            if not self._cabecalho_escrito:
+                self._arquivo.write(CABECALHO_FLUXO.pack(MARCA_FLUXO, buf.shape[0], buf.shape[1]))
+                self._cabecalho_escrito = True
+
+            if self.delta and anterior is not None and desde_chave < self.chave_a_cada:
+                tipo = REGISTRO_XOR
+                dados = np.bitwise_xor(bits, anterior)
+                desde_chave += 1
+            else:
+                tipo = REGISTRO_CHAVE
+                dados = bits
+                desde_chave = 0
+            anterior = bits
+
+            comprimido = zlib.compress(dados.tobytes(), 1)
+            self._arquivo.write(REGISTRO_FLUXO.pack(geracao, tipo, len(comprimido)))
+            self._arquivo.write(comprimido)
+
+    def fechar(self):
+        if self._thread.is_alive():
+            self._fila.put(None)
+            self._thread.join()
+        self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+
+def ler_fluxo(caminho):
+    # Devolve (geração, matriz) de cada registro, desfazendo os XOR pelo caminho
+    with open(caminho, "rb") as f:
+        cabecalho = f.read(CABECALHO_FLUXO.size)
+        if not cabecalho:
+            return
+        marca, altura, largura = CABECALHO_FLUXO.unpack(cabecalho)
+        if marca != MARCA_FLUXO:
+            raise ValueError(f"{caminho} não é um fluxo de gerações")
+
+        forma = (altura, _bytes_linha(largura))
+        bits = None
+        while True:
+            registro = f.read(REGISTRO_FLUXO.size)
+            if len(registro) < REGISTRO_FLUXO.size:
+                break
+            geracao, tipo, tamanho = REGISTRO_FLUXO.unpack(registro)
+            comprimido = f.read(tamanho)
+            if len(comprimido) < tamanho:
+                break # Último registro ficou pela metade (o programa morreu escrevendo)
+            dados = np.frombuffer(zlib.decompress(comprimido), dtype=np.uint8).reshape(forma)
+            bits = dados.copy() if tipo == REGISTRO_CHAVE else np.bitwise_xor(bits, dados)
+            yield geracao, np.unpackbits(bits, axis=1, count=largura)
+
+
+def precisa_grade(vida, geracao):
+    # Se alguém (checkpoint ou fluxo) vai querer a matriz nessa geração
+    return ((vida.checkpoint is not None and vida.checkpoint.precisa(geracao)) or
+            (vida.fluxo is not None and vida.fluxo.precisa(geracao)))
+
+def retomar_se_existir(vida):
+    # Usado pelos executar_*: se já tem checkpoint dessa simulação, continua dele
+    if vida.checkpoint is not None and vida.checkpoint.existe():
+        vida.carregar_checkpoint(vida.checkpoint.caminho)
+        print(f"  Retomando de {vida.checkpoint.caminho} (geração {vida.geracao})")
+
+def persistir(vida):
+    # Chamado pelo simular() dos motores depois de cada geração
+    if vida.checkpoint is not None and vida.checkpoint.precisa(vida.geracao):
+        vida.checkpoint.salvar(vida)
+    if vida.fluxo is not None:
+        vida.fluxo.enviar(vida.geracao, vida.grade)
@@ -0,0 +1,88 @@
+import re
+import numpy as np
+
+# Regras "life-like" na notação B/S: B = com quantos vizinhos uma célula morta nasce,
+# S = com quantos uma viva sobrevive. B3/S23 é o Conway, B36/S23 o HighLife e
+# B3678/S34678 o Day & Night. Também aceito a notação antiga S/B ("23/3").
+#
+# Cada texto de regra é lido uma vez só e vira uma Regra guardada em _REGRAS. A Regra já
+# traz tudo pronto pros motores: as tabelas de pertinência (nasce[v], sobrevive[v]) e as
+# faixas de vizinhos seguidas (ex: S34678 -> 3..4 e 6..8), que é o que o NucleoVida usa
+# para comparar com poucas operações. Nada de regra é decidido dentro do laço.
+
+CONWAY = "B3/S23"
+
+_FORMATO_BS = re.compile(r"^B([0-8]*)/S([0-8]*)$", re.I)
+_FORMATO_SB = re.compile(r"^([0-8]*)/([0-8]*)$")
+
+# Texto (como veio e o canônico) -> Regra
+_REGRAS = {}
+
+
+def _faixas(valores):
+    # Junta os valores em faixas seguidas: (2, 3, 6, 7, 8) -> [(2, 3), (6, 8)]
+    faixas = []
+    for v in valores:
+        if faixas and faixas[-1][1] == v - 1:
+            faixas[-1] = (faixas[-1][0], v)
+        else:
+            faixas.append((v, v))
+    return faixas
+
+
+class Regra:
+    def __init__(self, nascer, sobreviver):
+        self.nascer = tuple(sorted(set(nascer)))
+        self.sobreviver = tuple(sorted(set(sobreviver)))
+        self.texto = "B" + "".join(map(str, self.nascer)) + "/S" + "".join(map(str, self.sobreviver))
+
+        # Tabelas de pertinência, indexadas pelo número de vizinhos (0 a 8)
+        self.nasce = np.zeros(9, dtype=bool)
+        self.nasce[list(self.nascer)] = True
+        self.sobrevive = np.zeros(9, dtype=bool)
+        self.sobrevive[list(self.sobreviver)] = True
+        # Mesma coisa em tupla, para quem trabalha célula a célula (Hashlife)
+        self.proximo = (tuple(bool(b) for b in self.nasce), tuple(bool(s) for s in self.sobrevive))
+
+        self.faixas_nascer = _faixas(self.nascer)
+        self.faixas_sobreviver = _faixas(self.sobreviver)
+
+        # O Conway tem caminho próprio (o mesmo código de antes) em todos os motores
+        self.conway = self.texto == CONWAY
+
+    def __repr__(self):
+        return f"Regra({self.texto})"
+
+
+def ler_regra(regra=None):
+    # Aceita uma Regra pronta, um texto B/S ou S/B, ou None (= Conway)
+    if isinstance(regra, Regra):
+        return regra
+    if regra is None:
+        regra = CONWAY
+    pronta = _REGRAS.get(regra)
+    if pronta is not None:
+        return pronta
+
+    texto = regra.strip()
+    achou = _FORMATO_BS.match(texto)
+    if achou:
+        nascer, sobreviver = achou.group(1), achou.group(2)
+    else:
+        achou = _FORMATO_SB.match(texto)
+        if not achou:
+            raise ValueError(f"regra inválida: {regra!r} (use o formato B3/S23)")
+        sobreviver, nascer = achou.group(1), achou.group(2)
+
+    nova = Regra(map(int, nascer), map(int, sobreviver))
+    # "b3/s23", "23/3" e "B3/S23" ficam todos com o mesmo objeto
+    pronta = _REGRAS.setdefault(nova.texto, nova)
+    _REGRAS[regra] = pronta
+    return pronta
+
+
+if __name__ == "__main__":
+    # Teste rápido
+    for texto in ("B3/S23", "b36/s23", "B3678/S34678", "23/3"):
+        r = ler_regra(texto)
+        print(f"{texto:<14} -> {r.texto:<14} nasce: {r.faixas_nascer}  sobrevive: {r.faixas_sobreviver}")
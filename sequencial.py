@@ -1,9 +1,14 @@
 import time
+from collections import deque
 import numpy as np
 
+from persistencia import Checkpoint, persistir, restaurar, retomar_se_existir
+from padroes import criar_grade
+from regras import ler_regra
+
 # Função principal que faz a mágica do Jogo da Vida.
 # Eu uso NumPy aqui para não precisar fazer 2 loops for (o que seria lento demais em Python).
-def atualizar_faixa_numpy(grade, nova_grade, linha_inicio, linha_fim):
+def atualizar_faixa_numpy(grade, nova_grade, linha_inicio, linha_fim, regra=None):
     altura, largura = grade.shape
 
     # Verificações básicas para não dar erro de índice
@@ -29,12 +34,18 @@ def atualizar_faixa_numpy(grade, nova_grade, linha_inicio, linha_fim):
     # Regras do jogo usando 0/1
     vivas = (interior_atual == 1)
     mortas = (interior_atual == 0)
+    regra = ler_regra(regra)
+
+    if regra.conway:
+        # Regra 1: Continua viva se tem 2 ou 3 vizinhos
+        sobrevive = vivas & ((vizinhos == 2) | (vizinhos == 3))
 
-    # Regra 1: Continua viva se tem 2 ou 3 vizinhos
-    sobrevive = vivas & ((vizinhos == 2) | (vizinhos == 3))
-    
-    # Regra 2: Nasce se tiver 3 vizinhos
-    nasce = mortas & (vizinhos == 3)
+        # Regra 2: Nasce se tiver 3 vizinhos
+        nasce = mortas & (vizinhos == 3)
+    else:
+        # Outra regra B/S: olho nas tabelas de pertinência da regra
+        sobrevive = vivas & regra.sobrevive[vizinhos]
+        nasce = mortas & regra.nasce[vizinhos]
 
     # Junta tudo e converte para 0 ou 1
     interior_novo = np.where(sobrevive | nasce, 1, 0)
@@ -46,16 +57,433 @@ def atualizar_faixa_numpy(grade, nova_grade, linha_inicio, linha_fim):
     return not np.array_equal(interior_novo, interior_atual)
 
 
+# --- Núcleo com memória reaproveitada ---
+# O atualizar_faixa_numpy cria umas 12 matrizes temporárias por geração (as somas,
+# as máscaras, o np.where...). O NucleoVida faz a mesma conta, mas com a memória de
+# trabalho alocada uma vez só e usando 'out=' em tudo, em uint8 (o máximo de vizinhos
+# é 8, cabe folgado). O resultado vai direto para a nova_grade.
+# Cada thread precisa do seu próprio núcleo (a memória de trabalho não é compartilhada).
+#
+# A regra (ver regras.py) é escolhida uma vez, no construtor: o Conway usa as mesmas
+# comparações de sempre, e as outras regras comparam com as faixas de vizinhos da regra
+# (uma ou duas operações por faixa), então o custo por célula continua o mesmo.
+
+class NucleoVida:
+    def __init__(self, regra=None):
+        self.regra = ler_regra(regra)
+        self._capacidade = 0
+
+    def _reservar(self, n):
+        # Só realoca se o bloco pedido for maior que o maior que já vi
+        if n > self._capacidade:
+            self._vizinhos = np.empty(n, dtype=np.uint8)
+            self._vive = np.empty(n, dtype=bool)
+            self._aux = np.empty(n, dtype=bool)
+            if not self.regra.conway:
+                # Só as outras regras precisam desses dois (ver _pertence)
+                self._faixa = np.empty(n, dtype=bool)
+                self._diferenca = np.empty(n, dtype=np.uint8)
+            self._capacidade = n
+
+    def _pertence(self, vizinhos, faixas, saida):
+        # saida = vizinhos está em alguma das faixas [a, b] da regra
+        if not faixas:
+            saida[...] = False
+            return
+        n = vizinhos.size
+        for i, (a, b) in enumerate(faixas):
+            alvo = saida if i == 0 else self._faixa[:n].reshape(vizinhos.shape)
+            if a == b:
+                np.equal(vizinhos, a, out=alvo)
+            elif a == 0:
+                np.less_equal(vizinhos, b, out=alvo)
+            elif b == 8:
+                np.greater_equal(vizinhos, a, out=alvo)
+            else:
+                # a <= v <= b numa comparação só: em uint8, v - a dá a volta quando v < a
+                diferenca = self._diferenca[:n].reshape(vizinhos.shape)
+                np.subtract(vizinhos, a, out=diferenca)
+                np.less_equal(diferenca, b - a, out=alvo)
+            if i > 0:
+                np.logical_or(saida, alvo, out=saida)
+
+    def calcular_bloco(self, grade, nova_grade, l0, l1, c0, c1):
+        # Calcula as células [l0:l1, c0:c1] (precisa de 1 célula de sobra em volta)
+        # e devolve a máscara de quem mudou (vale até a próxima chamada)
+        forma = (l1 - l0, c1 - c0)
+        n = forma[0] * forma[1]
+        self._reservar(n)
+        vizinhos = self._vizinhos[:n].reshape(forma)
+        vive = self._vive[:n].reshape(forma)
+        aux = self._aux[:n].reshape(forma)
+
+        interior_atual = grade[l0:l1, c0:c1]
+        acima = grade[l0 - 1:l1 - 1, c0 - 1:c1 + 1]
+        meio = grade[l0:l1, c0 - 1:c1 + 1]
+        abaixo = grade[l0 + 1:l1 + 1, c0 - 1:c1 + 1]
+
+        # Mesma soma dos 8 deslocamentos, acumulando no mesmo buffer
+        np.add(acima[:, 0:-2], acima[:, 1:-1], out=vizinhos)
+        np.add(vizinhos, acima[:, 2:], out=vizinhos)
+        np.add(vizinhos, meio[:, 0:-2], out=vizinhos)
+        np.add(vizinhos, meio[:, 2:], out=vizinhos)
+        np.add(vizinhos, abaixo[:, 0:-2], out=vizinhos)
+        np.add(vizinhos, abaixo[:, 1:-1], out=vizinhos)
+        np.add(vizinhos, abaixo[:, 2:], out=vizinhos)
+
+        if self.regra.conway:
+            # Nasce/sobrevive com 3, ou sobrevive com 2 se já estava viva
+            np.equal(vizinhos, 3, out=vive)
+            np.equal(vizinhos, 2, out=aux)
+            np.logical_and(aux, interior_atual, out=aux)
+            np.logical_or(vive, aux, out=vive)
+        else:
+            # Qualquer regra B/S: 'vive' = nasceria, 'aux' = sobreviveria, e quem já
+            # estava viva fica com o 'aux': vive ^ ((vive ^ aux) & atual). Com XOR em vez
+            # de np.copyto(where=), que é umas 50x mais lento
+            self._pertence(vizinhos, self.regra.faixas_nascer, vive)
+            self._pertence(vizinhos, self.regra.faixas_sobreviver, aux)
+            np.logical_xor(aux, vive, out=aux)
+            np.logical_and(aux, interior_atual, out=aux)
+            np.logical_xor(vive, aux, out=vive)
+
+        # Quem mudou: já aproveito para comparar com o estado atual nessa mesma passada
+        np.not_equal(vive, interior_atual, out=aux)
+        np.copyto(nova_grade[l0:l1, c0:c1], vive)
+        return aux
+
+    def atualizar(self, grade, nova_grade, linha_inicio, linha_fim):
+        # Mesma interface do atualizar_faixa_numpy
+        altura, largura = grade.shape
+
+        # Verificações básicas para não dar erro de índice
+        if largura <= 2 or altura <= 2: return False
+        if linha_inicio < 1: linha_inicio = 1
+        if linha_fim > altura - 1: linha_fim = altura - 1
+        if linha_fim <= linha_inicio: return False
+
+        mudou = self.calcular_bloco(grade, nova_grade, linha_inicio, linha_fim, 1, largura - 1)
+        return bool(mudou.any())
+
+
+# --- Núcleo com tabela ---
+# Em vez de somar os vizinhos e comparar, junto as 9 células da vizinhança 3x3 num número
+# de 9 bits e olho o próximo estado numa tabela de 512 posições. Para montar o índice sem
+# repetir trabalho, primeiro cada coluna vira um código de 3 bits (cima, meio, baixo) e
+# depois o índice é código da esquerda, do meio e da direita, 3 bits cada.
+# A tabela é montada na primeira vez que alguém pede e fica guardada (uma por regra).
+
+_TABELAS = {}
+
+def tabela_transicao(regra=None):
+    regra = ler_regra(regra)
+    tabela = _TABELAS.get(regra.texto)
+    if tabela is None:
+        bits = (np.arange(512)[:, np.newaxis] >> np.arange(9)) & 1
+        # Bit 4 é a própria célula (coluna do meio, linha do meio)
+        centro = bits[:, 4]
+        vizinhos = bits.sum(axis=1) - centro
+        tabela = np.where(centro == 1, regra.sobrevive[vizinhos], regra.nasce[vizinhos])
+        _TABELAS[regra.texto] = tabela
+    return tabela
+
+
+class NucleoTabela(NucleoVida):
+    def __init__(self, regra=None):
+        super().__init__(regra)
+        self._tabela = None
+        self._capacidade_codigo = 0
+
+    def _reservar_codigo(self, n_codigo, n):
+        if n_codigo > self._capacidade_codigo:
+            self._codigo = np.empty(n_codigo, dtype=np.uint8)
+            self._capacidade_codigo = n_codigo
+        if n > getattr(self, "_capacidade_indice", 0):
+            self._indice = np.empty(n, dtype=np.uint16)
+            self._capacidade_indice = n
+
+    def calcular_bloco(self, grade, nova_grade, l0, l1, c0, c1):
+        # Mesma interface do NucleoVida.calcular_bloco
+        if self._tabela is None:
+            self._tabela = tabela_transicao(self.regra)
+
+        forma = (l1 - l0, c1 - c0)
+        n = forma[0] * forma[1]
+        forma_codigo = (forma[0], forma[1] + 2)
+        self._reservar(n)
+        self._reservar_codigo(forma_codigo[0] * forma_codigo[1], n)
+        vive = self._vive[:n].reshape(forma)
+        aux = self._aux[:n].reshape(forma)
+        indice = self._indice[:n].reshape(forma)
+        codigo = self._codigo[:forma_codigo[0] * forma_codigo[1]].reshape(forma_codigo)
+
+        interior_atual = grade[l0:l1, c0:c1]
+        acima = grade[l0 - 1:l1 - 1, c0 - 1:c1 + 1]
+        meio = grade[l0:l1, c0 - 1:c1 + 1]
+        abaixo = grade[l0 + 1:l1 + 1, c0 - 1:c1 + 1]
+
+        # Código de cada coluna: (cima*2 + meio)*2 + baixo. Com soma em vez de shift,
+        # porque o shift em uint8 não é vetorizado e sai bem mais lento
+        np.add(acima, acima, out=codigo)
+        np.add(codigo, meio, out=codigo)
+        np.add(codigo, codigo, out=codigo)
+        np.add(codigo, abaixo, out=codigo)
+
+        # Índice: esquerda << 6 | meio << 3 | direita
+        np.multiply(codigo[:, 0:-2], np.uint16(8), out=indice)
+        np.add(indice, codigo[:, 1:-1], out=indice)
+        np.left_shift(indice, 3, out=indice)
+        np.add(indice, codigo[:, 2:], out=indice)
+
+        # Próximo estado direto da tabela. O índice sempre cabe nas 512 posições, então o
+        # 'wrap' nunca dá a volta, só pula a checagem de limite (que é o mais caro do take)
+        np.take(self._tabela, indice, out=vive, mode="wrap")
+
+        np.not_equal(vive, interior_atual, out=aux)
+        np.copyto(nova_grade[l0:l1, c0:c1], vive)
+        return aux
+
+
+# Núcleos disponíveis (os motores recebem o nome em 'tipo_nucleo')
+NUCLEOS = {"soma": NucleoVida, "tabela": NucleoTabela}
+
+def criar_nucleo(tipo="soma", regra=None):
+    if tipo not in NUCLEOS:
+        raise ValueError(f"núcleo desconhecido: {tipo} (use {', '.join(NUCLEOS)})")
+    return NUCLEOS[tipo](regra)
+
+
+# --- Detecção de ciclos ---
+# O 'mudou' só pega quando a matriz parou de vez. Se sobrar um pisca-pisca (período 2)
+# ou outro oscilador, a simulação vai até o fim à toa. Então guardo o hash de cada
+# geração numa janela limitada e paro assim que um estado se repete.
+#
+# O hash é por linha: cada linha vira um número (palavras de 8 bytes x pesos aleatórios),
+# misturado com o índice global da linha, e o hash da matriz é a soma de todas (mod 2^64).
+# Assim quem tem só uma faixa (thread, worker) calcula o hash dela e é só somar.
+# Num bloco 2D a linha fica dividida entre vários donos, mas antes da mistura o número
+# da linha é linear nas células (cada coluna tem um peso, ver _pesos_colunas): cada bloco
+# soma os pesos das suas colunas vivas (somas_linhas), quem junta soma as partes de cada
+# linha e só então mistura (misturar_linhas).
+
+# Constantes do splitmix64 (misturador de bits bem conhecido)
+_OURO = np.uint64(0x9E3779B97F4A7C15)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+_PESOS_HASH = {}
+_PESOS_COLUNAS = {}
+
+def _pesos_hash(largura):
+    # Mesmos pesos em todo lugar (inclusive nos workers), sem mexer na seed global
+    pesos = _PESOS_HASH.get(largura)
+    if pesos is None:
+        rng = np.random.default_rng(largura)
+        pesos = rng.integers(0, 2**64, size=largura // 8 + largura % 8, dtype=np.uint64)
+        _PESOS_HASH[largura] = pesos
+    return pesos
+
+def hash_linhas(grade, linha_inicio, linha_fim, deslocamento=0):
+    # Hash das linhas [linha_inicio:linha_fim]; 'deslocamento' é a linha global da linha 0
+    if linha_fim <= linha_inicio:
+        return np.uint64(0)
+    largura = grade.shape[1]
+    pesos = _pesos_hash(largura)
+    n8 = largura // 8
+    linhas = grade[linha_inicio:linha_fim]
+
+    # Cada linha vira um uint64: 8 células por palavra, e o resto célula a célula
+    h = linhas[:, :n8 * 8].view("<u8") @ pesos[:n8]
+    if largura % 8:
+        h += linhas[:, n8 * 8:].astype(np.uint64) @ pesos[n8:]
+    return misturar_linhas(h, linha_inicio + deslocamento)
+
+def misturar_linhas(somas, primeira_linha):
+    # Parte não linear do hash: 'somas' é o número de cada linha, a partir da linha global
+    # 'primeira_linha'. Misturo com o número da linha (senão trocar duas linhas daria o mesmo hash)
+    h = somas + np.arange(primeira_linha, primeira_linha + somas.size, dtype=np.uint64) * _OURO
+    h ^= h >> np.uint64(30)
+    h *= _MIX1
+    h ^= h >> np.uint64(27)
+    h *= _MIX2
+    h ^= h >> np.uint64(31)
+    return h.sum(dtype=np.uint64)
+
+def _pesos_colunas(largura):
+    # Peso de cada coluna, o mesmo que a conta por palavras do hash_linhas dá: a célula k
+    # de uma palavra vale o byte k do uint64 (little-endian), então o peso dela é o da
+    # palavra vezes 256^k (mod 2^64). As colunas que sobram têm o peso delas mesmo
+    pesos = _PESOS_COLUNAS.get(largura)
+    if pesos is None:
+        pesos_hash = _pesos_hash(largura)
+        n8 = largura // 8
+        pesos = np.empty(largura, dtype=np.uint64)
+        deslocamentos = (np.arange(n8 * 8, dtype=np.uint64) % np.uint64(8)) * np.uint64(8)
+        pesos[:n8 * 8] = np.repeat(pesos_hash[:n8], 8) << deslocamentos
+        pesos[n8 * 8:] = pesos_hash[n8:]
+        _PESOS_COLUNAS[largura] = pesos
+    return pesos
+
+def somas_linhas(bloco, coluna, largura):
+    # Número de cada linha do 'bloco' antes da mistura, só com as colunas dele: o bloco
+    # começa na coluna global 'coluna' de uma matriz com 'largura' colunas. Somando as
+    # partes de todos os blocos de uma linha dá o mesmo número da linha inteira
+    pesos = _pesos_colunas(largura)[coluna:coluna + bloco.shape[1]]
+    return bloco.astype(np.uint64) @ pesos
+
+def hash_grade(grade):
+    # Só o interior: as bordas são sempre zero
+    return hash_linhas(grade, 1, grade.shape[0] - 1)
+
+
+class DetectorCiclos:
+    def __init__(self, janela=64):
+        # Só lembro das últimas 'janela' gerações, então pego ciclos de período <= janela
+        self.janela = janela
+        self._vistos = {}
+        self._ordem = deque()
+
+    def registrar(self, geracao, h):
+        # Devolve (geração onde o ciclo começou, período) se esse estado já apareceu
+        h = int(h)
+        anterior = self._vistos.get(h)
+        if anterior is not None:
+            return anterior, geracao - anterior
+
+        self._vistos[h] = geracao
+        self._ordem.append(h)
+        if len(self._ordem) > self.janela:
+            del self._vistos[self._ordem.popleft()]
+        return None
+
+
+# --- Modo toroidal ---
+# Com toroidal=True a moldura da matriz (linha/coluna 0 e a última) deixa de ser morta e
+# vira "fantasma": uma cópia do lado oposto do interior. O tabuleiro de verdade é o
+# interior, e o núcleo continua igual (ele já lê 1 célula de sobra em volta). Nada de
+# np.pad/np.roll da matriz inteira: por geração só copio as 2 linhas e 2 colunas da moldura.
+
+def atualizar_colunas_fantasmas(grade, linha_inicio, linha_fim):
+    # Só as linhas [linha_inicio:linha_fim] (cada thread/worker faz as da sua faixa)
+    grade[linha_inicio:linha_fim, 0] = grade[linha_inicio:linha_fim, -2]
+    grade[linha_inicio:linha_fim, -1] = grade[linha_inicio:linha_fim, 1]
+
+def atualizar_linhas_fantasmas(grade):
+    # Linhas inteiras (com as colunas fantasma já certas), então os cantos saem junto
+    grade[0, :] = grade[-2, :]
+    grade[-1, :] = grade[1, :]
+
+def atualizar_fantasmas(grade):
+    atualizar_colunas_fantasmas(grade, 1, grade.shape[0] - 1)
+    atualizar_linhas_fantasmas(grade)
+
+def volta_tiles(altura, largura, tam_tile):
+    # Tiles que se encostam pela volta: os da primeira linha/coluna do interior (tile 0)
+    # com os da última linha/coluna do interior
+    return (altura - 2) // tam_tile, (largura - 2) // tam_tile
+
+
+# --- Tiles "sujos" ---
+# Divido a matriz em quadrados (tiles) de tam_tile x tam_tile. Só recalculo um tile se ele
+# ou algum vizinho dele mudou na geração anterior. Se nada em volta mudou, a próxima
+# geração desse tile é igual à atual, então dá pra pular.
+# Detalhe: como eu troco grade <-> nova_grade, o tile pulado na nova_grade tem o estado
+# de duas gerações atrás, que é igual ao atual justamente porque ele não mudou.
+
+def criar_mapa_tiles(altura, largura, tam_tile):
+    # Um bool por tile. Começa tudo ativo (na primeira geração calculo tudo)
+    return np.ones(((altura + tam_tile - 1) // tam_tile, (largura + tam_tile - 1) // tam_tile), dtype=bool)
+
+def expandir_ativos(alterados, volta=None):
+    # Tile fica ativo se ele ou qualquer um dos 8 vizinhos mudou.
+    # No modo toroidal, 'volta' (ver volta_tiles) diz quais tiles são vizinhos pela volta
+    linhas = alterados.copy()
+    linhas[1:, :] |= alterados[:-1, :]
+    linhas[:-1, :] |= alterados[1:, :]
+    if volta:
+        linhas[0, :] |= alterados[volta[0], :]
+        linhas[volta[0], :] |= alterados[0, :]
+    ativos = linhas.copy()
+    ativos[:, 1:] |= linhas[:, :-1]
+    ativos[:, :-1] |= linhas[:, 1:]
+    if volta:
+        ativos[:, 0] |= linhas[:, volta[1]]
+        ativos[:, volta[1]] |= linhas[:, 0]
+    return ativos
+
+def atualizar_faixa_tiles(grade, nova_grade, linha_inicio, linha_fim, ativos, alterados, tam_tile,
+                          deslocamento=0, nucleo=None):
+    # Igual ao atualizar_faixa_numpy, mas só calcula os tiles ativos (usando o NucleoVida).
+    # 'deslocamento' é a linha global da linha 0 de 'grade' (o worker recebe só uma fatia).
+    # Os tiles que mudaram são marcados com True em 'alterados'. Nunca escrevo False,
+    # assim várias threads podem marcar o mesmo mapa sem atrapalhar uma à outra.
+    altura, largura = grade.shape
+
+    # Verificações básicas para não dar erro de índice
+    if largura <= 2 or altura <= 2: return
+    if linha_inicio < 1: linha_inicio = 1
+    if linha_fim > altura - 1: linha_fim = altura - 1
+    if linha_fim <= linha_inicio: return
+    if nucleo is None: nucleo = NucleoVida()
+
+    t = tam_tile
+    tile_ini = (linha_inicio + deslocamento) // t
+    tile_fim = (linha_fim - 1 + deslocamento) // t
+
+    for tl in range(tile_ini, tile_fim + 1):
+        colunas = np.flatnonzero(ativos[tl])
+        if colunas.size == 0:
+            continue
+
+        # Linhas desse tile dentro da faixa
+        l0 = max(linha_inicio, tl * t - deslocamento)
+        l1 = min(linha_fim, (tl + 1) * t - deslocamento)
+
+        # Junto tiles ativos vizinhos na mesma linha para calcular de uma vez só
+        quebras = np.flatnonzero(np.diff(colunas) > 1) + 1
+        for trecho in np.split(colunas, quebras):
+            c0 = max(1, trecho[0] * t)
+            c1 = min(largura - 1, (trecho[-1] + 1) * t)
+            if c1 <= c0:
+                continue
+
+            mudou = nucleo.calcular_bloco(grade, nova_grade, l0, l1, c0, c1)
+
+            # Marco quais tiles do trecho mudaram (o último pode ser só a borda, que fica de fora)
+            coluna_mudou = mudou.any(axis=0)
+            inicios = np.maximum(trecho * t, c0) - c0
+            validos = inicios < (c1 - c0)
+            mudaram = np.logical_or.reduceat(coluna_mudou, inicios[validos])
+            alterados[tl, trecho[validos][mudaram]] = True
+
+
 class VidaSequencial:
-    def __init__(self, largura, altura, prob_viva=0.2):
+    def __init__(self, largura, altura, prob_viva=0.2, tam_tile=None, janela_ciclos=0, checkpoint=None, fluxo=None,
+                 grade_inicial=None, tipo_nucleo="soma", regra=None, toroidal=False, medidor=None):
         # Seed fixa para garantir que o teste seja igual sempre
         np.random.seed(42)
 
         self.largura = largura
         self.altura = altura
 
-        # Cria matriz aleatória (0=morto, 1=vivo)
-        self.grade = np.random.choice([0, 1], size=(altura, largura), p=[1 - prob_viva, prob_viva])
+        # Instrumentação (ver instrumentacao.py): None = desligada
+        self.medidor = medidor
+
+        # toroidal=True: as bordas dão a volta (ver atualizar_fantasmas)
+        self.toroidal = toroidal
+
+        # Regra B/S (ver regras.py); None = Conway
+        self.regra = ler_regra(regra)
+
+        # Se tam_tile for passado, só recalculo os tiles ativos (ver atualizar_faixa_tiles)
+        self.tam_tile = tam_tile
+        if tam_tile:
+            self.ativos = criar_mapa_tiles(altura, largura, tam_tile)
+            self.alterados = np.zeros_like(self.ativos)
+            self.volta = volta_tiles(altura, largura, tam_tile) if toroidal else None
+
+        # Cria matriz aleatória (0=morto, 1=vivo), em uint8 (1 byte por célula),
+        # ou usa a grade_inicial que foi passada (ex: um padrão do padroes.py)
+        self.grade = criar_grade(largura, altura, prob_viva, grade_inicial)
 
         # Zera as bordas para facilitar o cálculo
         self._zerar_bordas()
@@ -63,49 +491,122 @@ class VidaSequencial:
         # Crio uma cópia para escrever o próximo estado
         self.nova_grade = np.zeros_like(self.grade)
 
+        # Núcleo com a memória de trabalho reaproveitada entre gerações
+        # (tipo_nucleo: "soma" = soma dos vizinhos, "tabela" = NucleoTabela)
+        self.tipo_nucleo = tipo_nucleo
+        self.nucleo = criar_nucleo(tipo_nucleo, self.regra)
+
+        # janela_ciclos > 0 liga a detecção de osciladores (ver DetectorCiclos).
+        # Quando acha, self.ciclo = (geração onde o ciclo começou, período)
+        self.janela_ciclos = janela_ciclos
+        self.ciclo = None
+
+        # Persistência (ver persistencia.py): checkpoint é um Checkpoint (salva a cada N
+        # gerações) e fluxo é um GravadorFluxo (grava as gerações numa thread separada)
+        self.geracao = 0
+        self.checkpoint = checkpoint
+        self.fluxo = fluxo
+
+    def carregar_checkpoint(self, caminho):
+        # Continua de onde o checkpoint parou (a matriz tem que ter o mesmo tamanho)
+        restaurar(self, caminho)
+
     def _zerar_bordas(self):
+        # No modo toroidal a moldura não é zerada: vira cópia do lado oposto
+        if self.toroidal:
+            atualizar_fantasmas(self.grade)
+            return
         self.grade[0, :] = 0
         self.grade[-1, :] = 0
         self.grade[:, 0] = 0
         self.grade[:, -1] = 0
 
     def atualizar(self):
-        # Calcula tudo de uma vez
-        mudou = atualizar_faixa_numpy(self.grade, self.nova_grade, 1, self.altura - 1)
+        medidor = self.medidor
+        if medidor is not None: t = time.perf_counter()
+        if self.tam_tile:
+            # Calcula só os tiles ativos e já prepara os ativos da próxima geração
+            self.alterados[:] = False
+            atualizar_faixa_tiles(self.grade, self.nova_grade, 1, self.altura - 1,
+                                  self.ativos, self.alterados, self.tam_tile, nucleo=self.nucleo)
+            if medidor is not None: t = medidor.desde("calculo", t)
+            mudou = bool(self.alterados.any())
+            if medidor is not None: t = medidor.desde("estagnacao", t)
+            self.ativos = expandir_ativos(self.alterados, self.volta)
+        else:
+            # Calcula tudo de uma vez
+            mudou = self.nucleo.atualizar(self.grade, self.nova_grade, 1, self.altura - 1)
+            if medidor is not None: t = medidor.desde("calculo", t)
 
-        # Garante bordas zeradas na nova também
-        self.nova_grade[0, :] = 0
-        self.nova_grade[-1, :] = 0
-        self.nova_grade[:, 0] = 0
-        self.nova_grade[:, -1] = 0
+        if self.toroidal:
+            # Só a moldura da nova é refeita (cópia do lado oposto)
+            atualizar_fantasmas(self.nova_grade)
+        else:
+            # Garante bordas zeradas na nova também
+            self.nova_grade[0, :] = 0
+            self.nova_grade[-1, :] = 0
+            self.nova_grade[:, 0] = 0
+            self.nova_grade[:, -1] = 0
 
         # Troca as matrizes (o novo vira o atual)
         self.grade, self.nova_grade = self.nova_grade, self.grade
+        self.geracao += 1
+        if medidor is not None: medidor.desde("juncao", t)
         return mudou
 
     def simular(self, iteracoes):
+        medidor = self.medidor
+        detector = DetectorCiclos(self.janela_ciclos) if self.janela_ciclos else None
+        # Gerações absolutas: retomado de um checkpoint, o ciclo sai na geração de verdade
+        if detector:
+            detector.registrar(self.geracao, hash_grade(self.grade))
+        if self.fluxo is not None:
+            self.fluxo.enviar(self.geracao, self.grade)
+
         iteracoes_reais = 0
         for it in range(iteracoes):
             mudou = self.atualizar()
             iteracoes_reais = it + 1
+            persistir(self)
             if not mudou:
                 break # Se não mudou nada, para, para economizar tempo
+            if detector:
+                if medidor is not None: t = time.perf_counter()
+                self.ciclo = detector.registrar(self.geracao, hash_grade(self.grade))
+                if medidor is not None: medidor.desde("estagnacao", t)
+                if self.ciclo:
+                    break # Entrou num oscilador: daqui pra frente só se repete
         return iteracoes_reais
 
+def mostrar_ciclo(ciclo):
+    if ciclo:
+        print(f"  Ciclo:     período {ciclo[1]} a partir da geração {ciclo[0]}")
+
 # Função para rodar e medir tempo
-def executar_simulacao_sequencial(largura, altura, iteracoes, prob_viva=0.2):
+# Devolve (tempo, iterações feitas, ciclo) - ciclo é None ou (início, período)
+# Com 'checkpoint' (caminho do arquivo), salva a cada checkpoint_a_cada gerações e,
+# se o arquivo já existir, continua dele até completar as 'iteracoes'
+def executar_simulacao_sequencial(largura, altura, iteracoes, prob_viva=0.2, tam_tile=None, janela_ciclos=0,
+                                  checkpoint=None, checkpoint_a_cada=100, grade_inicial=None, tipo_nucleo="soma",
+                                  regra=None, toroidal=False, medidor=None):
     print(f"--- Simulação sequencial {largura}x{altura} ---")
 
     t0 = time.perf_counter()
-    simulacao = VidaSequencial(largura, altura, prob_viva=prob_viva)
-    reais = simulacao.simular(iteracoes)
+    simulacao = VidaSequencial(largura, altura, prob_viva=prob_viva, tam_tile=tam_tile,
+                               janela_ciclos=janela_ciclos, grade_inicial=grade_inicial, tipo_nucleo=tipo_nucleo,
+                               regra=regra, toroidal=toroidal, medidor=medidor,
+                               checkpoint=Checkpoint(checkpoint, checkpoint_a_cada) if checkpoint else None)
+    retomar_se_existir(simulacao)
+    reais = simulacao.simular(iteracoes - simulacao.geracao)
     t1 = time.perf_counter()
 
     tempo = t1 - t0
     print(f"  Iterações: {iteracoes} (feitas: {reais})")
+    mostrar_ciclo(simulacao.ciclo)
     print(f"  Tempo:     {tempo:.4f} s")
-    return tempo
+    if medidor is not None: medidor.mostrar()
+    return tempo, reais, simulacao.ciclo
 
 if __name__ == "__main__":
     # Teste rápido
-    executar_simulacao_sequencial(100, 100, 1000)
\ No newline at end of file
+    executar_simulacao_sequencial(100, 100, 1000, janela_ciclos=64)
\ No newline at end of file